@@ -0,0 +1,273 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from threading import Lock
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+
+# Upper bounds of histogram buckets (in milliseconds); last bucket is open
+HISTOGRAM_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Name of the phase covering the whole request
+TOTAL_PHASE = 'total'
+
+_CURRENT_TIMER = ContextVar('appraise_request_timer', default=None)
+
+_HISTOGRAMS = {}
+_HISTOGRAMS_LOCK = Lock()
+
+
+class RequestTimer:
+    """
+    Collects durations and SQL query counts of the phases of one request.
+    """
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = 0
+        self.phases = []
+        self.current = None
+
+    def __call__(self, execute, sql, params, many, context):
+        # pylint: disable=too-many-arguments
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def elapsed(self):
+        """
+        Returns seconds since the start of the request.
+        """
+        return perf_counter() - self.start
+
+    def add_phase(self, name, seconds, queries):
+        """
+        Records a phase; repeated phases are summed up.
+        """
+        for index, (_name, _seconds, _queries) in enumerate(self.phases):
+            if _name == name:
+                self.phases[index] = (name, _seconds + seconds, _queries + queries)
+                return
+
+        self.phases.append((name, seconds, queries))
+
+    def mark(self, name):
+        """
+        Ends the current phase, if any, and starts phase name.
+        """
+        self.end_phase()
+        self.current = (name, perf_counter(), self.queries)
+
+    def end_phase(self):
+        """
+        Ends the phase started by the last mark(), if any.
+        """
+        if self.current is not None:
+            name, start, queries = self.current
+            self.add_phase(name, perf_counter() - start, self.queries - queries)
+            self.current = None
+
+    def finish(self):
+        """
+        Ends the current phase and records the whole request.
+        """
+        self.end_phase()
+        self.add_phase(TOTAL_PHASE, self.elapsed(), self.queries)
+
+    def server_timing(self):
+        """
+        Returns value of the Server-Timing header for recorded phases.
+        """
+        metrics = []
+        for name, seconds, queries in self.phases:
+            metrics.append(
+                '{0};dur={1:.1f};desc="{2} queries"'.format(
+                    name, seconds * 1000, queries
+                )
+            )
+        return ', '.join(metrics)
+
+
+def current_timer():
+    """
+    Returns timer of the current request, or None outside of requests.
+    """
+    return _CURRENT_TIMER.get()
+
+
+def mark_phase(name):
+    """
+    Starts phase name of the current request, ending the previous phase.
+
+    The last phase ends with the response. Does nothing if the current
+    request is not timed, see timed_phase().
+    """
+    timer = current_timer()
+    if timer is not None:
+        timer.mark(name)
+
+
+@contextmanager
+def timed_phase(name):
+    """
+    Records duration and number of SQL queries of the enclosed code.
+
+    Does nothing if the current request is not timed, e.g., in management
+    commands or when RequestTimingMiddleware is not installed.
+    """
+    timer = current_timer()
+    if timer is None:
+        yield
+        return
+
+    start, queries = perf_counter(), timer.queries
+    try:
+        yield
+    finally:
+        timer.add_phase(name, perf_counter() - start, timer.queries - queries)
+
+
+def debug_times():
+    """
+    Returns durations of phases so far and of the whole request.
+
+    The current phase counts up to now. Used for the 'debug_times'
+    template context of annotation views.
+    """
+    timer = current_timer()
+    if timer is None:
+        return ()
+
+    times = [timedelta(seconds=seconds) for _, seconds, _ in timer.phases]
+    if timer.current is not None:
+        times.append(timedelta(seconds=perf_counter() - timer.current[1]))
+    times.append(timedelta(seconds=timer.elapsed()))
+    return tuple(times)
+
+
+def _bucket_index(milliseconds):
+    for index, bound in enumerate(HISTOGRAM_BUCKETS_MS):
+        if milliseconds <= bound:
+            return index
+    return len(HISTOGRAM_BUCKETS_MS)
+
+
+def record_timings(view_name, phases):
+    """
+    Adds (name, seconds, queries) phases to histograms of the given view.
+    """
+    with _HISTOGRAMS_LOCK:
+        view_histograms = _HISTOGRAMS.setdefault(view_name, {})
+        for name, seconds, queries in phases:
+            histogram = view_histograms.get(name)
+            if histogram is None:
+                histogram = {
+                    'count': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'queries': 0,
+                    'max_queries': 0,
+                    'buckets': [0] * (len(HISTOGRAM_BUCKETS_MS) + 1),
+                }
+                view_histograms[name] = histogram
+
+            milliseconds = seconds * 1000
+            histogram['count'] += 1
+            histogram['total_ms'] += milliseconds
+            histogram['max_ms'] = max(histogram['max_ms'], milliseconds)
+            histogram['queries'] += queries
+            histogram['max_queries'] = max(histogram['max_queries'], queries)
+            histogram['buckets'][_bucket_index(milliseconds)] += 1
+
+
+def timing_histograms():
+    """
+    Returns a copy of the per-view histograms of this process.
+    """
+    with _HISTOGRAMS_LOCK:
+        return {
+            view_name: {
+                name: dict(histogram, buckets=list(histogram['buckets']))
+                for name, histogram in view_histograms.items()
+            }
+            for view_name, view_histograms in _HISTOGRAMS.items()
+        }
+
+
+def reset_timing_histograms():
+    """
+    Removes all collected histograms of this process.
+    """
+    with _HISTOGRAMS_LOCK:
+        _HISTOGRAMS.clear()
+
+
+class RequestTimingMiddleware:
+    """
+    Times requests and their phases, see timed_phase().
+
+    Adds a Server-Timing header with duration and SQL query count of each
+    phase and of the whole request for staff users or if DEBUG is set, and
+    aggregates them into histograms per view. Histograms are kept in memory
+    of each server process.
+
+    Streaming responses are timed until their content has been sent. Their
+    headers are sent before that, so they get no Server-Timing header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = RequestTimer()
+        token = _CURRENT_TIMER.set(timer)
+        try:
+            with connection.execute_wrapper(timer):
+                response = self.get_response(request)
+        finally:
+            _CURRENT_TIMER.reset(token)
+
+        view_name = None
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is not None:
+            view_name = resolver_match.view_name
+
+        if response.streaming:
+            response.streaming_content = self._timed_content(
+                timer, view_name, response.streaming_content
+            )
+            return response
+
+        timer.finish()
+        if self._show_timings(request):
+            response['Server-Timing'] = timer.server_timing()
+        if view_name is not None:
+            record_timings(view_name, timer.phases)
+
+        return response
+
+    @staticmethod
+    def _show_timings(request):
+        if settings.DEBUG:
+            return True
+
+        user = getattr(request, 'user', None)
+        return user is not None and user.is_staff
+
+    @staticmethod
+    def _timed_content(timer, view_name, content):
+        # Queries may still run while rendering streamed content
+        try:
+            with connection.execute_wrapper(timer):
+                yield from content
+        finally:
+            timer.finish()
+            if view_name is not None:
+                record_timings(view_name, timer.phases)
@@ -133,6 +133,7 @@ if DEBUG:
 
 MIDDLEWARE.extend(
     [
+        'Appraise.request_timing.RequestTimingMiddleware',
         'django.middleware.security.SecurityMiddleware',
         'whitenoise.middleware.WhiteNoiseMiddleware',
         'django.contrib.sessions.middleware.SessionMiddleware',
@@ -78,6 +78,11 @@ urlpatterns = [
         name='update-profile',
     ),  # TODO: remove?
     re_path(r'^dashboard/$', dashboard_views.dashboard, name='dashboard'),
+    re_path(
+        r'^dashboard/timings/$',
+        dashboard_views.request_timings,
+        name='request-timings',
+    ),
     re_path(
         r'^data-assessment/$',
         evalview_views.data_assessment,
@@ -129,6 +134,16 @@ urlpatterns = [
         evalview_views.direct_assessment_document,
         name='direct-assessment-document',
     ),
+    re_path(
+        r'^direct-assessment-document/next/$',
+        evalview_views.direct_assessment_document_next,
+        name='direct-assessment-document-next',
+    ),
+    re_path(
+        r'^direct-assessment-document/submit/$',
+        evalview_views.direct_assessment_document_submit,
+        name='direct-assessment-document-submit',
+    ),
     re_path(
         r'^direct-assessment-document/(?P<code>[a-z]{3})/$',
         evalview_views.direct_assessment_document,
@@ -177,6 +192,11 @@ urlpatterns = [
         evalview_views.pairwise_assessment_document,
         name='pairwise-assessment-document',
     ),
+    re_path(
+        r'^pairwise-assessment-document/submit/$',
+        evalview_views.pairwise_assessment_document_submit,
+        name='pairwise-assessment-document-submit',
+    ),
     re_path(
         r'^pairwise-assessment-document/(?P<code>[a-z]{3})/$',
         evalview_views.pairwise_assessment_document,
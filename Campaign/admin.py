@@ -8,6 +8,7 @@ from django.contrib.admin.filters import AllValuesFieldListFilter
 
 from Campaign.models import Campaign
 from Campaign.models import CampaignData
+from Campaign.models import CampaignStatusSnapshot
 from Campaign.models import CampaignTeam
 from Campaign.models import TrustedUser
 from EvalData.admin import BaseMetadataAdmin
@@ -188,7 +189,18 @@ class TrustedUserAdmin(admin.ModelAdmin):
     fieldsets = ((None, {"fields": ("user", "campaign")}),)
 
 
+class CampaignStatusSnapshotAdmin(admin.ModelAdmin):
+    """
+    Model admin for CampaignStatusSnapshot instances.
+    """
+
+    list_display = ["campaign", "campaignOptions", "dateModified"]
+    search_fields = ["campaign__campaignName"]
+    readonly_fields = ["campaign", "campaignOptions", "rows", "dateModified"]
+
+
 admin.site.register(CampaignTeam, CampaignTeamAdmin)
 admin.site.register(CampaignData, CampaignDataAdmin)
 admin.site.register(Campaign, CampaignAdmin)
 admin.site.register(TrustedUser, TrustedUserAdmin)
+admin.site.register(CampaignStatusSnapshot, CampaignStatusSnapshotAdmin)
@@ -3,3 +3,22 @@ from django.apps import AppConfig
 
 class CampaignConfig(AppConfig):
     name = 'Campaign'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from django.db.models.signals import post_delete
+        from django.db.models.signals import post_save
+
+        from Campaign.models import _invalidate_trusted_users
+        from Campaign.models import TrustedUser
+
+        post_save.connect(
+            _invalidate_trusted_users,
+            sender=TrustedUser,
+            dispatch_uid='trusted-users-save',
+        )
+        post_delete.connect(
+            _invalidate_trusted_users,
+            sender=TrustedUser,
+            dispatch_uid='trusted-users-delete',
+        )
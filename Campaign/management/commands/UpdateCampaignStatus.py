@@ -0,0 +1,64 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Campaign.models import Campaign
+from Campaign.models import CampaignStatusSnapshot
+from Campaign.views import collect_status_rows
+
+
+class Command(BaseCommand):
+    help = 'Recomputes status snapshots served by campaign status pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'campaign_names',
+            nargs='*',
+            help='Names of campaigns to update; defaults to all active campaigns',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Keep updating snapshots every given number of seconds',
+        )
+
+    def handle(self, *args, **options):
+        if options['interval'] < 0:
+            raise CommandError('Interval must not be negative')
+
+        while True:
+            self._update_snapshots(options['campaign_names'])
+            if not options['interval']:
+                break
+            sleep(options['interval'])
+
+    def _update_snapshots(self, campaign_names):
+        campaigns = Campaign.objects.filter(activated=True)
+        if campaign_names:
+            campaigns = Campaign.objects.filter(campaignName__in=campaign_names)
+
+        campaigns = list(campaigns.order_by('id'))
+        rows_by_campaign = collect_status_rows(campaigns)
+        for campaign in campaigns:
+            rows = rows_by_campaign.get(campaign.id)
+            if rows is None:
+                self.stdout.write(
+                    'Skipped campaign {0} of unknown type'.format(campaign)
+                )
+                continue
+
+            CampaignStatusSnapshot.store(campaign, rows)
+            self.stdout.write(
+                'Updated status snapshot of campaign {0} ({1} rows)'.format(
+                    campaign, len(rows)
+                )
+            )
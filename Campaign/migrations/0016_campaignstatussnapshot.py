@@ -0,0 +1,54 @@
+# Generated by Django 4.2.22 on 2026-10-17 09:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Campaign', '0015_alter_campaign_activatedby_alter_campaign_batches_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampaignStatusSnapshot',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'campaignOptions',
+                    models.TextField(
+                        blank=True, verbose_name='Campaign task-specific options'
+                    ),
+                ),
+                (
+                    'rows',
+                    models.TextField(help_text='(JSON)', verbose_name='Status rows'),
+                ),
+                (
+                    'dateModified',
+                    models.DateTimeField(auto_now=True, verbose_name='Date modified'),
+                ),
+                (
+                    'campaign',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to='Campaign.campaign',
+                        verbose_name='Campaign',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Campaign status snapshot',
+                'verbose_name_plural': 'Campaign status snapshots',
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@ Campaign models.py
 """
 
 # pylint: disable=C0111,C0330,E1101
+from datetime import timedelta
+from json import dumps
 from json import JSONDecodeError
 from json import loads
 from pathlib import Path
@@ -10,8 +12,10 @@ from zipfile import is_zipfile
 from zipfile import ZipFile
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 from django.utils.text import format_lazy as f
 from django.utils.translation import gettext_lazy as _
 
@@ -27,6 +31,14 @@ MAX_SMALLINTEGER_VALUE = 32767
 MAX_FILEFILED_SIZE = 10  # TODO: this does not get enforced currently; remove?
 MAX_CAMPAIGNNAME_LENGTH = 250
 
+# Cached trusted user sets are invalidated on change, but only for the
+# current process when using a local memory cache, so keep this short
+TRUSTED_USERS_CACHE_TIMEOUT = 5 * 60
+
+# Status snapshots older than this are ignored, e.g., if the command which
+# refreshes them is no longer running (in seconds)
+STATUS_SNAPSHOT_MAX_AGE = 60 * 60
+
 # TODO: _validate_task_json(task_json)
 
 
@@ -510,6 +522,135 @@ class Campaign(BaseMetadata):
         _msg = 'Unknown type for campaign {0}'.format(self.campaignName)
         raise LookupError(_msg)  # This should never happen, thus raise!
 
+    @staticmethod
+    def _trusted_users_key(campaign_id):
+        return 'trusted-users:{0}'.format(campaign_id)
+
+    @classmethod
+    def trusted_user_ids_for_campaign(cls, campaign_id):
+        """
+        Returns set of ids of trusted users in campaign with the given id.
+
+        The set is cached per campaign and invalidated whenever a
+        TrustedUser instance is saved or deleted.
+        """
+        _key = cls._trusted_users_key(campaign_id)
+        user_ids = cache.get(_key)
+        if user_ids is None:
+            user_ids = set(
+                TrustedUser.objects.filter(campaign_id=campaign_id).values_list(
+                    'user_id', flat=True
+                )
+            )
+            cache.set(_key, user_ids, TRUSTED_USERS_CACHE_TIMEOUT)
+
+        return user_ids
+
+    def trusted_user_ids(self):
+        """
+        Returns set of ids of trusted users in this campaign.
+        """
+        return self.trusted_user_ids_for_campaign(self.id)
+
+    def is_trusted_user(self, user):
+        """
+        Returns True if user is a trusted user in this campaign.
+        """
+        return user.id in self.trusted_user_ids()
+
+    @classmethod
+    def invalidate_trusted_users(cls, campaign_id):
+        """
+        Removes cached trusted user set for campaign with the given id.
+        """
+        cache.delete(cls._trusted_users_key(campaign_id))
+
+
+class CampaignStatusSnapshot(models.Model):
+    """
+    Models precomputed status rows of a campaign.
+
+    Snapshots are recomputed by the UpdateCampaignStatus management command,
+    so that campaign status pages do not need to query result tables for
+    every request. Rows are only valid for the stored campaign options.
+    """
+
+    campaign = models.OneToOneField(
+        Campaign, models.CASCADE, verbose_name=_('Campaign')
+    )
+
+    campaignOptions = models.TextField(
+        blank=True, verbose_name=_('Campaign task-specific options')
+    )
+
+    rows = models.TextField(verbose_name=_('Status rows'), help_text=_('(JSON)'))
+
+    dateModified = models.DateTimeField(auto_now=True, verbose_name=_('Date modified'))
+
+    class Meta:
+        verbose_name = _('Campaign status snapshot')
+        verbose_name_plural = _('Campaign status snapshots')
+
+    def __str__(self):
+        return '{0}@{1}'.format(self.campaign, self.dateModified)
+
+    @classmethod
+    def store(cls, campaign, rows):
+        """
+        Stores status rows as the latest snapshot of the given campaign.
+        """
+        snapshot, _ = cls.objects.update_or_create(
+            campaign=campaign,
+            defaults={
+                'campaignOptions': campaign.campaignOptions or '',
+                'rows': dumps(rows),
+            },
+        )
+        return snapshot
+
+    @classmethod
+    def latest(cls, campaign, max_age=STATUS_SNAPSHOT_MAX_AGE):
+        """
+        Returns the latest snapshot of the given campaign, or None.
+
+        Snapshots older than max_age seconds or computed for different
+        campaign options are ignored.
+        """
+        return cls.latest_for([campaign], max_age=max_age).get(campaign.id)
+
+    @classmethod
+    def latest_for(cls, campaigns, max_age=STATUS_SNAPSHOT_MAX_AGE):
+        """
+        Returns dict mapping campaign id to its latest valid snapshot.
+
+        Campaigns without a valid snapshot are left out.
+        """
+        options = {
+            campaign.id: campaign.campaignOptions or '' for campaign in campaigns
+        }
+        snapshots = {}
+        for snapshot in cls.objects.filter(campaign__in=options.keys()):
+            if snapshot.campaignOptions != options[snapshot.campaign_id]:
+                continue
+
+            if snapshot.age() > timedelta(seconds=max_age):
+                continue
+
+            snapshots[snapshot.campaign_id] = snapshot
+        return snapshots
+
+    def age(self):
+        """
+        Returns time elapsed since the snapshot was computed.
+        """
+        return timezone.now() - self.dateModified
+
+    def get_rows(self):
+        """
+        Returns the stored status rows.
+        """
+        return loads(self.rows)
+
 
 class TrustedUser(models.Model):
     '''
@@ -523,3 +664,8 @@ class TrustedUser(models.Model):
     # TODO: decide whether this needs to be optimized.
     def __str__(self):
         return 'trusted:{0}/{1}'.format(self.user.username, self.campaign.campaignName)
+
+
+def _invalidate_trusted_users(sender, instance, **kwargs):
+    # pylint: disable=unused-argument
+    Campaign.invalidate_trusted_users(instance.campaign_id)
@@ -4,17 +4,32 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 
+from io import StringIO
 from pathlib import Path
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.files.base import File
+from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 from Campaign.models import _validate_package_file
 from Campaign.models import Campaign
+from Campaign.models import CampaignStatusSnapshot
+from Campaign.models import CampaignTeam
+from Appraise.annotation_time import coarse_span
+from Appraise.annotation_time import gap_total_time
+from Appraise.annotation_time import grouped_clamped_total_time
+from Appraise.annotation_time import grouped_coarse_span
+from Appraise.annotation_time import grouped_gap_total_time
 from Appraise.utils import _compute_user_total_annotation_time
+from Campaign.views import _member_slices
+from Campaign.views import campaign_status_esa
+from EvalData.models import DirectAssessmentTask
 
 
 class TestInitCampaign(TestCase):
@@ -189,3 +204,199 @@ class TestCampaignUtils(TestCase):
         # Same start and end timestamps
         timestamps = [(100, 100), (100, 100), (100, 100), (100, 100), (150, 150)]
         self.assertEqual(_compute_user_total_annotation_time(timestamps), 0)
+
+        # Long annotations are clamped, contained ones subtract time
+        timestamps = [(100, 800), (900, 950), (910, 920)]
+        self.assertEqual(_compute_user_total_annotation_time(timestamps), 320)
+
+    def test_computing_gap_total_time_and_coarse_span(self):
+        '''Verifies time between actions and coarse time span.'''
+        starts = [100, 120, 1000]
+        ends = [110, 140, 1010]
+        self.assertEqual(gap_total_time(starts, ends), 50)
+        self.assertEqual(coarse_span(starts, ends), 910)
+        self.assertEqual(gap_total_time([], []), 0)
+        self.assertIsNone(coarse_span([], []))
+
+    def test_computing_grouped_annotation_times(self):
+        '''Verifies that grouped times match times computed per user.'''
+        timestamps = {
+            'alice': [(120, 130), (115, 125), (100, 900)],
+            'bob': [(100, 110), (100, 120), (1000, 1100)],
+        }
+
+        # Interleave rows of both users as returned by a single query
+        rows = [
+            ('bob', 100, 110),
+            ('alice', 120, 130),
+            ('bob', 100, 120),
+            ('alice', 115, 125),
+            ('alice', 100, 900),
+            ('bob', 1000, 1100),
+        ]
+        groups, starts, ends = zip(*rows)
+
+        clamped = grouped_clamped_total_time(groups, starts, ends)
+        gaps = grouped_gap_total_time(groups, starts, ends)
+        spans = grouped_coarse_span(groups, starts, ends)
+        for username, user_timestamps in timestamps.items():
+            user_starts = [x[0] for x in user_timestamps]
+            user_ends = [x[1] for x in user_timestamps]
+            self.assertEqual(
+                clamped[username],
+                _compute_user_total_annotation_time(user_timestamps),
+            )
+            self.assertEqual(gaps[username], gap_total_time(user_starts, user_ends))
+            self.assertEqual(spans[username], (min(user_starts), max(user_ends)))
+
+    def test_splitting_rows_by_member(self):
+        '''Verifies that rows ordered by campaign and user are split by member.'''
+        rows = [(1, 1, 'a'), (1, 1, 'b'), (1, 3, 'c'), (2, 1, 'd'), (2, 7, 'e')]
+        slices = _member_slices(rows)
+        self.assertEqual(list(slices), [(1, 1), (1, 3), (2, 1), (2, 7)])
+        self.assertEqual(rows[slices[1, 1]], [(1, 1, 'a'), (1, 1, 'b')])
+        self.assertEqual(rows[slices[1, 3]], [(1, 3, 'c')])
+        self.assertEqual(rows[slices[2, 1]], [(2, 1, 'd')])
+        self.assertEqual(rows[slices[2, 7]], [(2, 7, 'e')])
+        self.assertEqual(_member_slices([]), {})
+
+
+class TestCampaignStatusSnapshots(TestCase):
+    '''Tests for campaign status snapshots.'''
+
+    def setUp(self):
+        self.staff = User.objects.create(username='staff', is_staff=True)
+        self.campaign = Campaign.objects.create(
+            campaignName='SnapshotCampaign',
+            campaignOptions='',
+            activated=True,
+            createdBy=self.staff,
+        )
+        DirectAssessmentTask.objects.create(
+            campaign=self.campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=self.staff,
+        )
+        self.team = CampaignTeam.objects.create(
+            teamName='SnapshotTeam',
+            owner=self.staff,
+            requiredAnnotations=1,
+            requiredHours=1,
+            createdBy=self.staff,
+        )
+        self.team.members.add(User.objects.create(username='annotator01'))
+        self.campaign.teams.add(self.team)
+        self.url = reverse('campaign_status', args=[self.campaign.campaignName])
+
+    def _get_status(self, query=''):
+        response = self.client.get(self.url + query)
+        self.assertTrue(response.streaming)
+        return response, response.getvalue().decode('utf-8')
+
+    def test_status_is_computed_without_snapshot(self):
+        response, content = self._get_status()
+        self.assertIn('annotator01', content)
+        self.assertNotIn('Snapshot from', content)
+        self.assertFalse(response.has_header('Age'))
+
+    def test_status_is_served_from_snapshot(self):
+        call_command('UpdateCampaignStatus', stdout=StringIO())
+        self.team.members.add(User.objects.create(username='annotator02'))
+
+        response, content = self._get_status()
+        self.assertIn('Snapshot from', content)
+        self.assertIn('annotator01', content)
+        self.assertNotIn('annotator02', content)
+        self.assertTrue(response.has_header('Age'))
+
+        # Only staff can force a refresh
+        _, content = self._get_status('?refresh')
+        self.assertNotIn('annotator02', content)
+
+        self.client.force_login(self.staff)
+        response, content = self._get_status('?refresh')
+        self.assertIn('annotator02', content)
+        self.assertEqual(response['Age'], '0')
+        self.assertEqual(
+            len(CampaignStatusSnapshot.objects.get(campaign=self.campaign).get_rows()),
+            2,
+        )
+
+    def test_outdated_snapshot_is_ignored(self):
+        CampaignStatusSnapshot.store(self.campaign, [])
+        self.assertIsNotNone(CampaignStatusSnapshot.latest(self.campaign))
+        self.assertIsNone(CampaignStatusSnapshot.latest(self.campaign, max_age=-1))
+
+        self.campaign.campaignOptions = 'newcampaignstatuspage'
+        self.campaign.save()
+        self.assertIsNone(CampaignStatusSnapshot.latest(self.campaign))
+
+    def _add_campaign(self, name, options, username):
+        campaign = Campaign.objects.create(
+            campaignName=name,
+            campaignOptions=options,
+            activated=True,
+            createdBy=self.staff,
+        )
+        DirectAssessmentTask.objects.create(
+            campaign=campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=self.staff,
+        )
+        team = CampaignTeam.objects.create(
+            teamName=name + 'Team',
+            owner=self.staff,
+            requiredAnnotations=1,
+            requiredHours=1,
+            createdBy=self.staff,
+        )
+        team.members.add(User.objects.create(username=username))
+        campaign.teams.add(team)
+        return campaign
+
+    def test_multiple_campaigns_are_combined(self):
+        self._add_campaign('OtherCampaign', '', 'annotator02')
+        self.url = reverse('campaign_status', args=['SnapshotCampaign,OtherCampaign'])
+        with CaptureQueriesContext(connection) as multi_queries:
+            _, content = self._get_status()
+
+        lines = content.split('\n')
+        self.assertEqual(len(lines), 3)
+        self.assertIn('campaign', lines[0])
+        self.assertIn('SnapshotCampaign', content)
+        self.assertIn('OtherCampaign', content)
+        self.assertIn('annotator02', content)
+
+        # Results of both campaigns are collected with one grouped query
+        result_queries = [
+            query
+            for query in multi_queries.captured_queries
+            if 'EvalData_directassessmentresult' in query['sql']
+        ]
+        self.assertEqual(len(result_queries), 1)
+
+    def test_mixing_unrelated_campaigns_is_rejected(self):
+        self._add_campaign('OtherCampaign', 'ESA', 'annotator02')
+        self.url = reverse('campaign_status', args=['SnapshotCampaign,OtherCampaign'])
+        response = self.client.get(self.url)
+        self.assertContains(response, 'You are mixing unrelated campaigns')
+
+    def test_esa_status_escapes_all_cells(self):
+        row = {
+            'campaign': '<i>Campaign</i>',
+            'username': '<u>annotator01</u>',
+            'status_emoji': '💤',
+            'progress': '<s>No task assigned</s>',
+            'first_modified_trim': '',
+            'last_modified_trim': '',
+            'coarse_time_html': '',
+            'annotation_time_html': '',
+        }
+        response = campaign_status_esa('<b>Title</b>', [row], with_campaign=True)
+        content = response.getvalue().decode('utf-8')
+        self.assertIn('&lt;b&gt;Title&lt;/b&gt;', content)
+        self.assertIn('<td>&lt;i&gt;Campaign&lt;/i&gt;</td>', content)
+        self.assertIn('<td>&lt;u&gt;annotator01&lt;/u&gt; 💤</td>', content)
+        self.assertIn('<td>&lt;s&gt;No task assigned&lt;/s&gt;</td>', content)
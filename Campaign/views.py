@@ -11,11 +11,18 @@ import json
 from math import floor
 from math import sqrt
 
+import numpy as np
 from django.core.management.base import CommandError
+from django.db.models import prefetch_related_objects
 from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.utils.html import escape
 
-from Appraise.utils import _get_logger, _compute_user_total_annotation_time
+from Appraise.annotation_time import grouped_clamped_total_time
+from Appraise.annotation_time import grouped_coarse_span
+from Appraise.annotation_time import grouped_gap_total_time
+from Appraise.utils import _get_logger
+from Campaign.models import CampaignStatusSnapshot
 from Campaign.utils import _get_campaign_instance
 from EvalData.models import DataAssessmentResult
 from EvalData.models import DirectAssessmentDocumentResult
@@ -30,6 +37,22 @@ from EvalData.models.direct_assessment_document import DirectAssessmentDocumentT
 
 RESULT_TYPE_BY_CLASS_NAME = {tup[1].__name__: tup[2] for tup in TASK_DEFINITIONS}
 
+STATUS_PAGE_HEAD = """
+    <meta charset="UTF-8">
+
+    <style>
+    table, tr, td, th {
+        border: 1px solid black; border-collapse: collapse;
+    }
+    td, th {
+        padding: 5px;
+    }
+    * {
+    font-family: monospace;
+    }
+    </style>\n
+    """
+
 LOGGER = _get_logger(name=__name__)
 
 
@@ -54,45 +77,110 @@ def _format_timestamp_strings(epoch_seconds):
     return (full_value, trimmed_value)
 
 
-def _resolve_task_from_object_id(object_id):
-    try:
-        return object_id.get_object_instance()
-    except Exception:  # pylint: disable=broad-except
-        LOGGER.debug('Failed to resolve task object for %s', object_id, exc_info=True)
-        return None
+def _status_options(campaign):
+    """
+    Returns (result type, lowercased options) of the given campaign.
 
+    Raises LookupError for campaigns of unknown type.
+    """
+    campaign_opts = (campaign.campaignOptions or '').lower().split(';')
+    result_type = RESULT_TYPE_BY_CLASS_NAME[campaign.get_campaign_type()]
+    return result_type, campaign_opts
 
-def _estimate_total_items(user, campaign, first_result):
-    agenda = TaskAgenda.objects.filter(user=user, campaign=campaign).first()
-    total_items = 0
-    has_items = False
 
-    if agenda:
-        for serialized_task in agenda.serialized_open_tasks():
-            task_obj = _resolve_task_from_object_id(serialized_task)
-            if task_obj and hasattr(task_obj, 'items'):
-                total_items += task_obj.items.count()
-                has_items = True
+def _status_page_kind(campaign_opts):
+    if 'esa' in campaign_opts:
+        return 'esa'
+    if 'newcampaignstatuspage' in campaign_opts:
+        return 'new'
+    return 'plain'
 
-        if not has_items:
-            for serialized_task in agenda._completed_tasks.all():  # pylint: disable=protected-access
-                task_obj = _resolve_task_from_object_id(serialized_task)
-                if task_obj and hasattr(task_obj, 'items'):
-                    total_items += task_obj.items.count()
-                    has_items = True
 
-        if has_items:
-            return total_items
+def _campaign_members(campaigns, include_staff=True):
+    """
+    Returns list of (campaign, user) pairs for team members of campaigns.
+    """
+    prefetch_related_objects(campaigns, 'teams__members')
+    return [
+        (campaign, user)
+        for campaign in campaigns
+        for team in campaign.teams.all()
+        for user in team.members.all()
+        if include_staff or not user.is_staff
+    ]
 
-    if first_result and hasattr(first_result, 'task'):
-        task = first_result.task
-        if task and hasattr(task, 'items'):
-            try:
-                return task.items.count()
-            except Exception:  # pylint: disable=broad-except
-                LOGGER.debug('Failed to count items for task %s', task, exc_info=True)
 
-    return None
+def _first_agendas(members):
+    """
+    Returns dict mapping (campaign id, user id) to id of their first agenda.
+    """
+    agendas = {}
+    for agenda_id, campaign_id, user_id in (
+        TaskAgenda.objects.filter(
+            campaign__in={campaign.id for campaign, _ in members},
+            user__in={user.id for _, user in members},
+        )
+        .order_by('id')
+        .values_list('id', 'campaign_id', 'user_id')
+    ):
+        agendas.setdefault((campaign_id, user_id), agenda_id)
+    return agendas
+
+
+def _member_slices(rows):
+    """
+    Returns dict mapping (campaign id, user id) to slice of their rows.
+
+    Rows must be ordered by the campaign id and user id in their first two
+    columns.
+    """
+    keys = np.array([row[:2] for row in rows], dtype=np.int64).reshape(-1, 2)
+    bounds = np.flatnonzero(np.any(np.diff(keys, axis=0), axis=1)) + 1
+    firsts = np.concatenate(([0], bounds)).tolist()
+    lasts = np.concatenate((bounds, [len(rows)])).tolist()
+    return {
+        tuple(rows[first][:2]): slice(first, last)
+        for first, last in zip(firsts, lasts)
+        if first < last
+    }
+
+
+def _estimate_total_items(members, first_tasks):
+    """
+    Estimates total items for each member from their agenda in the campaign.
+
+    Open tasks are counted if there are any, completed tasks otherwise.
+    Members without agenda tasks fall back to first_tasks, which maps
+    (campaign id, user id) to the (task class, id) task of their first
+    result.
+
+    Returns dict mapping (campaign id, user id) to total items or None.
+    """
+    agendas = _first_agendas(members)
+    open_totals = TaskAgenda.total_items(agendas.values())
+    completed_totals = TaskAgenda.total_items(agendas.values(), completed=True)
+
+    task_ids_by_class = defaultdict(set)
+    for task_cls, task_id in first_tasks.values():
+        task_ids_by_class[task_cls].add(task_id)
+
+    item_counts = {}
+    for task_cls, task_ids in task_ids_by_class.items():
+        for task_id, count in task_cls.item_counts(task_ids).items():
+            item_counts[(task_cls, task_id)] = count
+
+    total_items = {}
+    for campaign, user in members:
+        key = (campaign.id, user.id)
+        agenda_id = agendas.get(key)
+        if agenda_id in open_totals:
+            total_items[key] = open_totals[agenda_id]
+        elif agenda_id in completed_totals:
+            total_items[key] = completed_totals[agenda_id]
+        else:
+            total_items[key] = item_counts.get(first_tasks.get(key))
+
+    return total_items
 
 
 def _derive_status_emoji(is_active, annotations, total_items, has_data):
@@ -122,174 +210,220 @@ def _reliability_sort_value(value):
         return float('inf')
 
 
-def _collect_campaign_status_rows(campaign, result_type, campaign_opts):
-    rows = []
+def _by_member(grouped, keys):
+    return {keys[index]: value for index, value in grouped.items()}
 
-    for team in campaign.teams.all():
-        for user in team.members.all():
-            results_qs = result_type.objects.filter(
-                createdBy=user, completed=True, task__campaign=campaign.id
-            )
-            first_result = results_qs.first()
-            data_qs = results_qs
-            is_mqm_or_esa = False
-
-            if (
-                result_type is DirectAssessmentDocumentResult
-                or result_type is PairwiseAssessmentDocumentResult
-            ):
-                data_qs = data_qs.exclude(item__isCompleteDocument=True)
-
-            if (
-                result_type is PairwiseAssessmentResult
-                or result_type is PairwiseAssessmentDocumentResult
-            ):
-                data_rows = list(
-                    data_qs.values_list(
-                        'start_time',
-                        'end_time',
-                        'score1',
-                        'item__itemID',
-                        'item__target1ID',
-                        'item__itemType',
-                        'item__id',
-                    )
-                )
-                time_pairs = [(row[0], row[1]) for row in data_rows]
-            elif 'mqm' in campaign_opts:
-                is_mqm_or_esa = True
-                raw_rows = list(
-                    data_qs.values_list(
-                        'start_time',
-                        'end_time',
-                        'mqm',
-                        'item__itemID',
-                        'item__targetID',
-                        'item__itemType',
-                        'item__id',
-                        'item__documentID',
-                    )
+
+def _collect_user_results(campaigns, result_type, with_mqm):
+    """
+    Collects completed results of all campaign members with one grouped query.
+
+    Returns dict mapping (campaign id, user id) to a tuple (data rows, first
+    task) and dicts mapping (campaign id, user id) to annotation time and
+    (first, last) timestamps, computed over all members at once.
+    """
+    is_pairwise = (
+        result_type is PairwiseAssessmentResult
+        or result_type is PairwiseAssessmentDocumentResult
+    )
+    is_document = (
+        result_type is DirectAssessmentDocumentResult
+        or result_type is PairwiseAssessmentDocumentResult
+    )
+    is_mqm_or_esa = not is_pairwise and with_mqm
+
+    fields = ['start_time', 'end_time']
+    if is_pairwise:
+        fields.extend(('score1', 'item__itemID', 'item__target1ID'))
+    elif is_mqm_or_esa:
+        fields.extend(('mqm', 'item__itemID', 'item__targetID'))
+    else:
+        fields.extend(('score', 'item__itemID', 'item__targetID'))
+    fields.extend(('item__itemType', 'item__id'))
+    if is_mqm_or_esa:
+        fields.append('item__documentID')
+
+    # The first result of each member identifies a fallback task, so results
+    # for complete documents are only excluded from the data rows
+    extra_fields = ['task__campaign_id', 'createdBy', 'task_id']
+    if is_document:
+        extra_fields.append('item__isCompleteDocument')
+
+    results = result_type.objects.filter(
+        completed=True, task__campaign__in=[campaign.id for campaign in campaigns]
+    ).order_by('task__campaign_id', 'createdBy', *result_type._meta.ordering, 'id')
+    rows = list(results.values_list(*extra_fields, *fields))
+
+    task_cls = result_type.task.field.related_model
+    member_results = {}
+    time_groups, time_starts, time_ends = [], [], []
+    for key, member_rows in _member_slices(rows).items():
+        first_task = None
+        if rows[member_rows.start][2] is not None:
+            first_task = (task_cls, rows[member_rows.start][2])
+
+        data_rows = [
+            row[len(extra_fields) :]
+            for row in rows[member_rows]
+            if not (is_document and row[3])
+        ]
+
+        if is_mqm_or_esa:
+            doc_time_pairs = defaultdict(list)
+            for row in data_rows:
+                doc_time_pairs[f'{row[7]} ||| {row[4]}'].append((row[0], row[1]))
+
+            time_pairs = [
+                (
+                    min(start for start, _ in doc_rows),
+                    max(end for _, end in doc_rows),
                 )
-                doc_time_pairs = defaultdict(list)
-                for row in raw_rows:
-                    doc_time_pairs[f'{row[7]} ||| {row[4]}'].append((row[0], row[1]))
-
-                time_pairs = [
-                    (
-                        min(start for start, _ in doc_rows),
-                        max(end for _, end in doc_rows),
-                    )
-                    for doc_rows in doc_time_pairs.values()
-                ]
-
-                data_rows = [
-                    (
-                        row[0],
-                        row[1],
-                        -len(json.loads(row[2])),
-                        row[3],
-                        row[4],
-                        row[5],
-                        row[6],
-                    )
-                    for row in raw_rows
-                ]
-            else:
-                data_rows = list(
-                    data_qs.values_list(
-                        'start_time',
-                        'end_time',
-                        'score',
-                        'item__itemID',
-                        'item__targetID',
-                        'item__itemType',
-                        'item__id',
-                    )
-                )
-                time_pairs = [(row[0], row[1]) for row in data_rows]
-
-            reliability = stat_reliable_testing(data_rows, campaign_opts, result_type)
-            annotations = len({row[6] for row in data_rows})
-            start_times = [row[0] for row in data_rows]
-            end_times = [row[1] for row in data_rows]
-            first_epoch = min(start_times) if start_times else None
-            last_epoch = max(end_times) if end_times else None
-            first_full, first_trim = _format_timestamp_strings(first_epoch)
-            last_full, last_trim = _format_timestamp_strings(last_epoch)
-            has_data = bool(data_rows)
-
-            if not has_data:
-                first_trim = ''
-                last_trim = ''
-
-            annotation_time_seconds = (
-                _compute_user_total_annotation_time(time_pairs)
-                if time_pairs
-                else 0
-            )
-            coarse_seconds = None
-            if first_epoch is not None and last_epoch is not None:
-                coarse_seconds = max(int(last_epoch - first_epoch), 0)
-
-            annotation_time_plain = 'n/a'
-            annotation_time_html = ''
-            if annotation_time_seconds:
-                annotation_time_plain = _format_duration(annotation_time_seconds)
-                annotation_time_html = _format_duration(
-                    annotation_time_seconds, with_space=True
+                for doc_rows in doc_time_pairs.values()
+            ]
+
+            data_rows = [
+                (
+                    row[0],
+                    row[1],
+                    -len(json.loads(row[2])),
+                    row[3],
+                    row[4],
+                    row[5],
+                    row[6],
                 )
+                for row in data_rows
+            ]
+        else:
+            time_pairs = [(row[0], row[1]) for row in data_rows]
+
+        # Grouped timings are computed over integer indices of members
+        time_groups.extend([len(member_results)] * len(time_pairs))
+        time_starts.extend(pair[0] for pair in time_pairs)
+        time_ends.extend(pair[1] for pair in time_pairs)
+        member_results[key] = (data_rows, first_task)
+
+    keys = list(member_results)
+    span_groups, span_starts, span_ends = [], [], []
+    for index, (data_rows, _) in enumerate(member_results.values()):
+        span_groups.extend([index] * len(data_rows))
+        span_starts.extend(row[0] for row in data_rows)
+        span_ends.extend(row[1] for row in data_rows)
+
+    annotation_times = grouped_clamped_total_time(time_groups, time_starts, time_ends)
+    spans = grouped_coarse_span(span_groups, span_starts, span_ends)
+    return (
+        member_results,
+        _by_member(annotation_times, keys),
+        _by_member(spans, keys),
+    )
 
-            coarse_plain = None
-            coarse_html = ''
-            if coarse_seconds is not None:
-                coarse_plain = _format_duration(coarse_seconds)
-                coarse_html = _format_duration(coarse_seconds, with_space=True)
-
-            if (
-                is_mqm_or_esa
-                and annotation_time_plain != 'n/a'
-                and coarse_plain
-            ):
-                annotation_time_plain = f'{annotation_time_plain}--{coarse_plain}'
-
-            total_items = _estimate_total_items(user, campaign, first_result)
-            if total_items is None:
-                progress_text = 'Task not found' if annotations else 'No task assigned'
-            elif total_items:
-                completion_ratio = min(annotations / total_items, 1.0)
-                progress_text = f'{annotations}/{total_items} ({completion_ratio:.0%})'
-            else:
-                progress_text = '0/0'
-
-            status_emoji = _derive_status_emoji(
-                user.is_active, annotations, total_items, has_data
-            )
 
-            rows.append(
-                {
-                    'username': user.username,
-                    'is_active': user.is_active,
-                    'annotations': annotations,
-                    'first_modified_epoch': first_epoch,
-                    'first_modified_full': first_full,
-                    'first_modified_trim': first_trim,
-                    'last_modified_epoch': last_epoch,
-                    'last_modified_full': last_full,
-                    'last_modified_trim': last_trim,
-                    'annotation_time_seconds': annotation_time_seconds,
-                    'annotation_time_plain': annotation_time_plain,
-                    'annotation_time_html': annotation_time_html,
-                    'coarse_seconds': coarse_seconds,
-                    'coarse_time_plain': coarse_plain,
-                    'coarse_time_html': coarse_html,
-                    'reliability': reliability,
-                    'progress': progress_text,
-                    'status_emoji': status_emoji,
-                    'total_items': total_items,
-                    'has_data': has_data,
-                }
+def _collect_campaign_status_rows(campaigns, result_type, campaign_opts):
+    """
+    Computes status rows of campaigns sharing the given result type.
+
+    campaign_opts maps campaign id to its options; campaigns must agree on
+    whether they use the "mqm" option.
+
+    Returns dict mapping campaign id to its rows.
+    """
+    members = _campaign_members(campaigns)
+    with_mqm = 'mqm' in campaign_opts[campaigns[0].id]
+    member_results, annotation_times, spans = _collect_user_results(
+        campaigns, result_type, with_mqm
+    )
+    total_items_by_member = _estimate_total_items(
+        members,
+        {
+            key: first_task
+            for key, (_, first_task) in member_results.items()
+            if first_task is not None
+        },
+    )
+    is_mqm_or_esa = (
+        result_type is not PairwiseAssessmentResult
+        and result_type is not PairwiseAssessmentDocumentResult
+        and with_mqm
+    )
+
+    rows = {campaign.id: [] for campaign in campaigns}
+    for campaign, user in members:
+        key = (campaign.id, user.id)
+        data_rows, _ = member_results.get(key, ([], None))
+
+        reliability = stat_reliable_testing(
+            data_rows, campaign_opts[campaign.id], result_type
+        )
+        annotations = len({row[6] for row in data_rows})
+        first_epoch, last_epoch = spans.get(key, (None, None))
+        first_full, first_trim = _format_timestamp_strings(first_epoch)
+        last_full, last_trim = _format_timestamp_strings(last_epoch)
+        has_data = bool(data_rows)
+
+        if not has_data:
+            first_trim = ''
+            last_trim = ''
+
+        annotation_time_seconds = annotation_times.get(key, 0)
+        coarse_seconds = None
+        if has_data:
+            coarse_seconds = max(int(last_epoch - first_epoch), 0)
+
+        annotation_time_plain = 'n/a'
+        annotation_time_html = ''
+        if annotation_time_seconds:
+            annotation_time_plain = _format_duration(annotation_time_seconds)
+            annotation_time_html = _format_duration(
+                annotation_time_seconds, with_space=True
             )
 
+        coarse_plain = None
+        coarse_html = ''
+        if coarse_seconds is not None:
+            coarse_plain = _format_duration(coarse_seconds)
+            coarse_html = _format_duration(coarse_seconds, with_space=True)
+
+        if is_mqm_or_esa and annotation_time_plain != 'n/a' and coarse_plain:
+            annotation_time_plain = f'{annotation_time_plain}--{coarse_plain}'
+
+        total_items = total_items_by_member[key]
+        if total_items is None:
+            progress_text = 'Task not found' if annotations else 'No task assigned'
+        elif total_items:
+            completion_ratio = min(annotations / total_items, 1.0)
+            progress_text = f'{annotations}/{total_items} ({completion_ratio:.0%})'
+        else:
+            progress_text = '0/0'
+
+        status_emoji = _derive_status_emoji(
+            user.is_active, annotations, total_items, has_data
+        )
+
+        rows[campaign.id].append(
+            {
+                'username': user.username,
+                'is_active': user.is_active,
+                'annotations': annotations,
+                'first_modified_epoch': first_epoch,
+                'first_modified_full': first_full,
+                'first_modified_trim': first_trim,
+                'last_modified_epoch': last_epoch,
+                'last_modified_full': last_full,
+                'last_modified_trim': last_trim,
+                'annotation_time_seconds': annotation_time_seconds,
+                'annotation_time_plain': annotation_time_plain,
+                'annotation_time_html': annotation_time_html,
+                'coarse_seconds': coarse_seconds,
+                'coarse_time_plain': coarse_plain,
+                'coarse_time_html': coarse_html,
+                'reliability': reliability,
+                'progress': progress_text,
+                'status_emoji': status_emoji,
+                'total_items': total_items,
+                'has_data': has_data,
+            }
+        )
+
     return rows
 
 
@@ -329,77 +463,158 @@ def _sort_campaign_rows(rows, sort_key, include_staff):
 def campaign_status(request, campaign_name, sort_key=None):
     """
     Campaign status view with completion details.
+
+    Comma-separated campaign names render one combined table with a
+    campaign column, collected for all campaigns at once.
     """
     LOGGER.info(
         'Rendering campaign status view for user "%s".',
         request.user.username or "Anonymous",
     )
 
-    if "," in campaign_name:
-        responses = [campaign_status(request, name, sort_key) for name in campaign_name.split(",")]
-        if not all([response.headers["Content-Type"] == responses[0].headers["Content-Type"] for response in responses]):
+    # Get Campaign instances for campaign names
+    campaigns = []
+    for name in campaign_name.split(","):
+        try:
+            campaigns.append(_get_campaign_instance(name))
+
+        except CommandError:
+            _msg = 'Failure to identify campaign {0}'.format(name)
+            return HttpResponse(_msg, content_type='text/plain')
+
+    status_options = {}
+    page_kinds = set()
+    for campaign in campaigns:
+        try:
+            status_options[campaign.id] = _status_options(campaign)
+        except LookupError as exc:
+            LOGGER.debug(f'Invalid campaign type for campaign {campaign.campaignName}')
+            LOGGER.error(exc)
             return HttpResponse(
-                'ERROR: You are mixing unrelated campaigns (views.py:campaign_status).',
+                'Invalid campaign type for campaign {0}'.format(campaign.campaignName),
                 content_type='text/plain',
             )
-        else:
-            return HttpResponse(
-                "\n\n".join([response.content.decode('utf-8') for response in responses]),
-                content_type=responses[0].headers["Content-Type"],
-            )
+        page_kinds.add(_status_page_kind(status_options[campaign.id][1]))
 
-    # Get Campaign instance for campaign name
-    try:
-        campaign = _get_campaign_instance(campaign_name)
-
-    except CommandError:
-        _msg = 'Failure to identify campaign {0}'.format(campaign_name)
-        return HttpResponse(_msg, content_type='text/plain')
-
-    try:
-        campaign_opts = campaign.campaignOptions.lower().split(";")
-        # may raise KeyError
-        result_type = RESULT_TYPE_BY_CLASS_NAME[campaign.get_campaign_type()]
-    except KeyError as exc:
-        LOGGER.debug(
-            f'Invalid campaign type {campaign.get_campaign_type()} for campaign {campaign.campaignName}'
-        )
-        LOGGER.error(exc)
+    if len(page_kinds) > 1:
         return HttpResponse(
-            'Invalid campaign type for campaign {0}'.format(campaign.campaignName),
+            'ERROR: You are mixing unrelated campaigns (views.py:campaign_status).',
             content_type='text/plain',
         )
 
+    # Staff can force recomputing the snapshots with ?refresh
+    refresh = request.user.is_staff and 'refresh' in request.GET
+    snapshots = {}
+    if not refresh:
+        snapshots = CampaignStatusSnapshot.latest_for(campaigns)
+
+    rows_by_campaign = {
+        campaign_id: snapshot.get_rows() for campaign_id, snapshot in snapshots.items()
+    }
+    missing = [campaign for campaign in campaigns if campaign.id not in snapshots]
+    if missing:
+        rows_by_campaign.update(collect_status_rows(missing, status_options))
+        if refresh:
+            for campaign in missing:
+                snapshots[campaign.id] = CampaignStatusSnapshot.store(
+                    campaign, rows_by_campaign[campaign.id]
+                )
+
+    # The page is as old as the oldest snapshot it is served from
+    snapshot = min(snapshots.values(), key=lambda x: x.dateModified, default=None)
+
+    with_campaign = len(campaigns) > 1
+    if with_campaign:
+        rows = [
+            dict(row, campaign=campaign.campaignName)
+            for campaign in campaigns
+            for row in rows_by_campaign[campaign.id]
+        ]
+    else:
+        rows = rows_by_campaign[campaigns[0].id]
+    title = ', '.join(campaign.campaignName for campaign in campaigns)
+
     # special handling for ESA
-    if "esa" in campaign_opts:
-        return campaign_status_esa(campaign)
-    if "newcampaignstatuspage" in campaign_opts:
+    page_kind = page_kinds.pop()
+    if page_kind == 'esa':
+        return campaign_status_esa(title, rows, snapshot, with_campaign)
+    if page_kind == 'new':
         return campaign_status_new(
-            request, campaign, result_type, campaign_opts, sort_key
+            request, title, rows, sort_key, snapshot, with_campaign
         )
-    return campaign_status_plain(
-        request, campaign, result_type, campaign_opts, sort_key
+    return campaign_status_plain(request, rows, sort_key, snapshot, with_campaign)
+
+
+def collect_status_rows(campaigns, status_options=None):
+    """
+    Computes status rows of the given campaigns for their status pages.
+
+    Campaigns are collected together with one grouped query per result
+    type; campaigns of unknown type are left out. status_options may map
+    campaign id to its already resolved (result type, options).
+
+    Returns dict mapping campaign id to its rows.
+    """
+    status_options = status_options or {}
+    esa_campaigns = []
+    batches = defaultdict(list)
+    campaign_opts = {}
+    for campaign in campaigns:
+        try:
+            if campaign.id not in status_options:
+                status_options[campaign.id] = _status_options(campaign)
+        except LookupError:
+            LOGGER.warning(
+                'Invalid campaign type for campaign %s', campaign.campaignName
+            )
+            continue
+
+        result_type, campaign_opts[campaign.id] = status_options[campaign.id]
+
+        if "esa" in campaign_opts[campaign.id]:
+            esa_campaigns.append(campaign)
+        else:
+            with_mqm = 'mqm' in campaign_opts[campaign.id]
+            batches[(result_type, with_mqm)].append(campaign)
+
+    rows = {}
+    if esa_campaigns:
+        rows.update(_collect_esa_status_rows(esa_campaigns))
+    for (result_type, _), batch in batches.items():
+        rows.update(_collect_campaign_status_rows(batch, result_type, campaign_opts))
+    return rows
+
+
+def _snapshot_notice(snapshot):
+    return 'Snapshot from {0:%Y-%m-%d %H:%M:%S} ({1} old)'.format(
+        snapshot.dateModified,
+        _format_duration(snapshot.age().total_seconds(), with_space=True),
     )
 
 
-def campaign_status_plain(request, campaign, result_type, campaign_opts, sort_key):
-    rows = _collect_campaign_status_rows(campaign, result_type, campaign_opts)
+def _status_response(chunks, content_type, snapshot):
+    """
+    Returns response streaming the given chunks of a status page.
+
+    Rows are rendered while the response is sent, so that the first rows
+    reach the browser before the whole table is rendered.
+    """
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    if snapshot is not None:
+        response['Age'] = max(0, int(snapshot.age().total_seconds()))
+    return response
+
+
+def campaign_status_plain(request, rows, sort_key, snapshot=None, with_campaign=False):
     _sort_campaign_rows(rows, sort_key, request.user.is_staff)
+    return _status_response(
+        _plain_status_lines(rows, request.user.is_staff, snapshot, with_campaign),
+        'text/plain',
+        snapshot,
+    )
 
-    formatted_rows = []
-    for row in rows:
-        formatted = (
-            row['username'],
-            row['is_active'],
-            row['annotations'],
-            row['first_modified_full'],
-            row['last_modified_full'],
-            row['annotation_time_plain'],
-        )
-        if request.user.is_staff:
-            formatted += (row['reliability'],)
-        formatted_rows.append(formatted)
 
+def _plain_status_lines(rows, include_staff, snapshot, with_campaign):
     _header = (
         'username',
         'active',
@@ -408,45 +623,57 @@ def campaign_status_plain(request, campaign, result_type, campaign_opts, sort_ke
         'last_modified',
         'annotation_time',
     )
-    if request.user.is_staff:
+    if include_staff:
         _header += ('random',)
 
-    _txt = []
-    for _row in [_header] + formatted_rows:
-        _local_fmt = '|{0:>15}|{1:>6}|{2:>11}|{3:>20}|{4:>20}|{5:>15}|'
-        if request.user.is_staff:
-            _local_fmt += '{6:>10}|'
+    _local_fmt = '|{0:>15}|{1:>6}|{2:>11}|{3:>20}|{4:>20}|{5:>15}|'
+    if include_staff:
+        _local_fmt += '{6:>10}|'
+
+    # Campaign names are prepended in their own column, if needed
+    _campaign_fmt = '|{0:>20}' if with_campaign else ''
 
-        _local_out = _local_fmt.format(*_row)
-        _txt.append(_local_out)
+    if snapshot is not None:
+        yield _snapshot_notice(snapshot) + '\n'
+    yield _campaign_fmt.format('campaign') + _local_fmt.format(*_header)
 
-    return HttpResponse('\n'.join(_txt), content_type='text/plain')
+    for row in rows:
+        formatted = (
+            row['username'],
+            row['is_active'],
+            row['annotations'],
+            row['first_modified_full'],
+            row['last_modified_full'],
+            row['annotation_time_plain'],
+        )
+        if include_staff:
+            formatted += (row['reliability'],)
+        campaign_cell = _campaign_fmt.format(row['campaign']) if with_campaign else ''
+        yield '\n' + campaign_cell + _local_fmt.format(*formatted)
 
 
-def campaign_status_new(request, campaign, result_type, campaign_opts, sort_key):
-    rows = _collect_campaign_status_rows(campaign, result_type, campaign_opts)
+def campaign_status_new(
+    request, title, rows, sort_key, snapshot=None, with_campaign=False
+):
     _sort_campaign_rows(rows, sort_key, request.user.is_staff)
+    return _status_response(
+        _new_status_chunks(title, rows, request.user.is_staff, snapshot, with_campaign),
+        'text/html',
+        snapshot,
+    )
 
-    out_str = """
-    <meta charset="UTF-8">
 
-    <style>
-    table, tr, td, th {
-        border: 1px solid black; border-collapse: collapse;
-    }
-    td, th {
-        padding: 5px;
-    }
-    * {
-    font-family: monospace;
-    }
-    </style>\n
-    """
-    out_str += f"<h1>{escape(campaign.campaignName)}</h1>\n"
+def _new_status_chunks(title, rows, include_staff, snapshot, with_campaign):
+    out_str = STATUS_PAGE_HEAD
+    out_str += f"<h1>{escape(title)}</h1>\n"
+    if snapshot is not None:
+        out_str += f"<p>{escape(_snapshot_notice(snapshot))}</p>\n"
     out_str += "<table>\n"
 
-    header = """<tr>
-<th>Username</th>
+    header = "<tr>\n"
+    if with_campaign:
+        header += "<th>Campaign</th>\n"
+    header += """<th>Username</th>
 <th>Progress</th>
 <th>First Modified</th>
 <th>Last Modified</th>
@@ -454,11 +681,11 @@ def campaign_status_new(request, campaign, result_type, campaign_opts, sort_key)
 <th style="cursor: pointer" title="Sum of times between any two interactions that are not longer than 10 minutes.">Time (Real❔)</th>
 """
 
-    if request.user.is_staff:
+    if include_staff:
         header += "<th>Reliability</th>"
 
     header += "</tr>\n"
-    out_str += header
+    yield out_str + header
 
     for row in rows:
         username_cell = escape(row['username'])
@@ -473,7 +700,9 @@ def campaign_status_new(request, campaign, result_type, campaign_opts, sort_key)
         coarse_cell = escape(row['coarse_time_html']) if row['coarse_time_html'] else ''
         real_cell = escape(row['annotation_time_html']) if row['annotation_time_html'] else ''
 
-        out_str += "<tr>"
+        out_str = "<tr>"
+        if with_campaign:
+            out_str += f"<td>{escape(row['campaign'])}</td>"
         out_str += f"<td>{username_cell}</td>"
         out_str += f"<td>{progress_cell}</td>"
         out_str += f"<td>{first_modified_cell}</td>"
@@ -481,37 +710,188 @@ def campaign_status_new(request, campaign, result_type, campaign_opts, sort_key)
         out_str += f"<td>{coarse_cell}</td>"
         out_str += f"<td>{real_cell}</td>"
 
-        if request.user.is_staff:
+        if include_staff:
             reliability_cell = escape(row['reliability']) if row['reliability'] else 'n/a'
             out_str += f"<td>{reliability_cell}</td>"
 
-        out_str += "</tr>\n"
+        yield out_str + "</tr>\n"
 
-    out_str += "</table>"
-    return HttpResponse(out_str, content_type='text/html')
+    yield "</table>"
 
 
-def campaign_status_esa(campaign) -> str:
-    import collections
-    out_str = """
-    <meta charset="UTF-8">
+def _collect_esa_results(campaigns):
+    """
+    Collects completed document results of all campaign members with one
+    query.
 
-    <style>
-    table, tr, td, th {
-        border: 1px solid black; border-collapse: collapse;
-    }
-    td, th {
-        padding: 5px;
-    }
-    * {
-    font-family: monospace;
-    }
-    </style>\n
+    Returns dict mapping (campaign id, user id) to a tuple (annotated item
+    ids, first task id) and dicts mapping (campaign id, user id) to the time
+    between any two actions and (first, last) timestamps, computed over all
+    members at once.
+    """
+    results = DirectAssessmentDocumentResult.objects.filter(
+        completed=True, task__campaign__in=[campaign.id for campaign in campaigns]
+    ).order_by(
+        'task__campaign_id',
+        'createdBy',
+        *DirectAssessmentDocumentResult._meta.ordering,
+        'id',
+    )
+    rows = list(
+        results.values_list(
+            'task__campaign_id',
+            'createdBy',
+            'task_id',
+            'item_id',
+            'start_time',
+            'end_time',
+        )
+    )
+
+    member_results = {}
+    groups = []
+    for index, (key, member_rows) in enumerate(_member_slices(rows).items()):
+        member_results[key] = (
+            {row[3] for row in rows[member_rows]},
+            rows[member_rows.start][2],
+        )
+        groups.extend([index] * (member_rows.stop - member_rows.start))
+
+    keys = list(member_results)
+    starts = [row[4] for row in rows]
+    ends = [row[5] for row in rows]
+    times = grouped_gap_total_time(groups, starts, ends)
+    spans = grouped_coarse_span(groups, starts, ends)
+    return member_results, _by_member(times, keys), _by_member(spans, keys)
+
+
+def _esa_tasks(members, member_results):
+    """
+    Returns dict mapping (campaign id, user id) to (task id, total items) of
+    the member's task.
+
+    This is the first document task among open tasks of the member's agenda,
+    then among completed tasks, falling back to the task of their first
+    result. Members without any existing task are left out.
+    """
+    task_name = DirectAssessmentDocumentTask.__name__
+    agendas = _first_agendas(members)
+
+    candidates = defaultdict(list)
+    for through_cls in (
+        TaskAgenda._open_tasks.through,
+        TaskAgenda._completed_tasks.through,
+    ):
+        for agenda_id, primary_id in (
+            through_cls.objects.filter(
+                taskagenda_id__in=agendas.values(), objectid__typeName=task_name
+            )
+            .order_by('id')
+            .values_list('taskagenda_id', 'objectid__primaryID')
+        ):
+            try:
+                candidates[agenda_id].append(int(primary_id))
+            except ValueError:
+                LOGGER.warning('ObjectID %s.%s invalid', task_name, primary_id)
+
+    task_ids = {x for tasks in candidates.values() for x in tasks}
+    task_ids.update(x for _, x in member_results.values() if x is not None)
+    item_counts = DirectAssessmentDocumentTask.item_counts(task_ids)
+
+    tasks = {}
+    for campaign, user in members:
+        key = (campaign.id, user.id)
+        member_tasks = candidates.get(agendas.get(key), [])
+        if key in member_results:
+            member_tasks = member_tasks + [member_results[key][1]]
+
+        for task_id in member_tasks:
+            if task_id in item_counts:
+                tasks[key] = (task_id, item_counts[task_id])
+                break
+
+    return tasks
+
+
+def _collect_esa_status_rows(campaigns):
     """
-    out_str += f"<h1>{campaign.campaignName}</h1>\n"
+    Computes ESA status rows of non-staff members of the given campaigns.
+
+    Returns dict mapping campaign id to its rows.
+    """
+    members = _campaign_members(campaigns, include_staff=False)
+    member_results, times, spans = _collect_esa_results(campaigns)
+    tasks = _esa_tasks(members, member_results)
+
+    rows = {campaign.id: [] for campaign in campaigns}
+    for campaign, user in members:
+        key = (campaign.id, user.id)
+        task_id, total_count = tasks.get(key, (None, None))
+        item_ids, _ = member_results.get(key, ((), None))
+        annotations = len(item_ids)
+
+        row = {
+            'username': user.username,
+            'annotations': annotations,
+            'first_modified_trim': '',
+            'last_modified_trim': '',
+            'coarse_time_html': '',
+            'annotation_time_html': '',
+        }
+
+        # If no data, show 0 progress or show that no task is assigned
+        if not annotations:
+            row['status_emoji'] = '💤'
+            row['progress'] = 'No task assigned'
+            if task_id is not None:
+                row['progress'] = f'0/{total_count} (0%)'
+
+        elif task_id is None:
+            row['status_emoji'] = '❌'
+            row['progress'] = 'Task not found'
+
+        # If we have data, show the progress
+        else:
+            row['status_emoji'] = '🛠️'
+            if total_count == annotations:
+                row['status_emoji'] = '✅'
+            row['progress'] = (
+                f'{annotations}/{total_count} ({annotations / total_count:.0%})'
+            )
+
+            first_modified, last_modified = spans[key]
+            _, row['first_modified_trim'] = _format_timestamp_strings(first_modified)
+            _, row['last_modified_trim'] = _format_timestamp_strings(last_modified)
+            row['coarse_time_html'] = _format_duration(
+                last_modified - first_modified, with_space=True
+            )
+
+            # consider time that's in any action within 10 minutes
+            row['annotation_time_html'] = _format_duration(times[key], with_space=True)
+
+        rows[campaign.id].append(row)
+
+    return rows
+
+
+def campaign_status_esa(title, rows, snapshot=None, with_campaign=False):
+    return _status_response(
+        _esa_status_chunks(title, rows, snapshot, with_campaign),
+        'text/html',
+        snapshot,
+    )
+
+
+def _esa_status_chunks(title, rows, snapshot, with_campaign):
+    out_str = STATUS_PAGE_HEAD
+    out_str += f"<h1>{escape(title)}</h1>\n"
+    if snapshot is not None:
+        out_str += f"<p>{escape(_snapshot_notice(snapshot))}</p>\n"
     out_str += "<table>\n"
-    out_str += """<tr>
-<th>Username</th>
+    out_str += "<tr>\n"
+    if with_campaign:
+        out_str += "<th>Campaign</th>\n"
+    out_str += """<th>Username</th>
 <th>Progress</th>
 <th>First Modified</th>
 <th>Last Modified</th>
@@ -519,101 +899,21 @@ def campaign_status_esa(campaign) -> str:
 <th style="cursor: pointer" title="Sum of times between any two interactions that are not longer than 10 minutes.">Time (Real❔)</th>
 </tr>\n
 """ 
-    for team in campaign.teams.all():
-        for user in team.members.all():
-            if user.is_staff:
-                continue
-            out_str += "<tr>"
-
-            # Get the task for this user even when there's no completed data
-            task = None
-
-            # First try to get the task from TaskAgenda
-            agenda = TaskAgenda.objects.filter(user=user, campaign=campaign).first()
-            if agenda:
-                # Try to get an open or completed task from the agenda
-                for serialized_task in agenda.serialized_open_tasks():
-                    potential_task = serialized_task.get_object_instance()
-                    if isinstance(potential_task, DirectAssessmentDocumentTask):
-                        task = potential_task
-                        break
-                # If no open task, try completed tasks
-                if not task:
-                    for serialized_task in agenda._completed_tasks.all():
-                        potential_task = serialized_task.get_object_instance()
-                        if isinstance(potential_task, DirectAssessmentDocumentTask):
-                            task = potential_task
-                            break
-
-            # Get the completed data for this user
-            _data = DirectAssessmentDocumentResult.objects.filter(
-                createdBy=user, completed=True, task__campaign=campaign.id
-            )
-            _data_uniq_len = len({(item.item.sourceID, item.item.targetID, item.item.itemType, item.item.id) for item in _data})
-
-            # If no data, show 0 progress or show that no task is assigned
-            if not _data:
-                if task:
-                    total_count = task.items.count()
-                    out_str += f"<td>{user.username} 💤</td>"
-                    out_str += f"<td>0/{total_count} (0%)</td>"
-                else:
-                    # No task assigned to this user
-                    out_str += f"<td>{user.username} 💤</td>"
-                    out_str += "<td>No task assigned</td>"
-                out_str += "<td></td>"
-                out_str += "<td></td>"
-                out_str += "<td></td>"
-                out_str += "<td></td>"
-
-            # If we have data, show the progress
-            else:
-                if not task:
-                    # Fallback to checking the first result's task for the task ID
-                    task = DirectAssessmentDocumentTask.objects.filter(id=_data[0].task_id).first()
-                if not task:
-                    # Skip this user if we can't find the task
-                    out_str += f"<td>{user.username} ❌</td>"
-                    out_str += "<td>Task not found</td>"
-                    out_str += "<td></td>"
-                    out_str += "<td></td>"
-                    out_str += "<td></td>"
-                    out_str += "<td></td>"
-                    out_str += "</tr>\n"
-                    continue
-
-                total_count = task.items.count()
-                if total_count == _data_uniq_len:
-                    out_str += f"<td>{user.username} ✅</td>"
-                else:
-                    out_str += f"<td>{user.username} 🛠️</td>"
-                out_str += f"<td>{_data_uniq_len}/{total_count} ({_data_uniq_len / total_count:.0%})</td>"
-                first_modified = min([x.start_time for x in _data])
-                last_modified = max([x.end_time for x in _data])
-
-                first_modified_str = str(datetime(1970, 1, 1) + seconds_to_timedelta(first_modified)).split('.')[0]
-                last_modified_str = str(datetime(1970, 1, 1) + seconds_to_timedelta(last_modified)).split('.')[0]
-                # remove seconds
-                first_modified_str = ":".join(first_modified_str.split(":")[:-1])
-                last_modified_str = ":".join(last_modified_str.split(":")[:-1])
-
-                out_str += f"<td>{first_modified_str}</td>"
-                out_str += f"<td>{last_modified_str}</td>"
-                annotation_time_upper = last_modified - first_modified
-                annotation_time_upper = f'{int(floor(annotation_time_upper / 3600)):0>2d}h {int(floor((annotation_time_upper % 3600) / 60)):0>2d}m'
-                out_str += f"<td>{annotation_time_upper}</td>"
-
-                # consider time that's in any action within 10 minutes
-                times = sorted([item.start_time for item in _data] + [item.end_time for item in _data])
-                annotation_time = sum([b-a for a, b in zip(times, times[1:]) if (b-a) < 10*60])
-                annotation_time = f'{int(floor(annotation_time / 3600)):0>2d}h {int(floor((annotation_time % 3600) / 60)):0>2d}m'
-
-                out_str += f"<td>{annotation_time}</td>"
-
-            out_str += "</tr>\n"
-
-    out_str += "</table>"
-    return HttpResponse(out_str, content_type='text/html')
+    yield out_str
+
+    for row in rows:
+        out_str = "<tr>"
+        if with_campaign:
+            out_str += f"<td>{escape(row['campaign'])}</td>"
+        out_str += f"<td>{escape(row['username'])} {row['status_emoji']}</td>"
+        out_str += f"<td>{escape(row['progress'])}</td>"
+        out_str += f"<td>{escape(row['first_modified_trim'])}</td>"
+        out_str += f"<td>{escape(row['last_modified_trim'])}</td>"
+        out_str += f"<td>{escape(row['coarse_time_html'])}</td>"
+        out_str += f"<td>{escape(row['annotation_time_html'])}</td>"
+        yield out_str + "</tr>\n"
+
+    yield "</table>"
 
 
 def stat_reliable_testing(_data, campaign_opts, result_type):
@@ -5,12 +5,24 @@ import tempfile
 from pathlib import Path
 
 from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client
 from django.test import TestCase
 from django.test import override_settings
 from django.urls import reverse
 
+from Appraise.request_timing import current_timer
+from Appraise.request_timing import reset_timing_histograms
+from Appraise.request_timing import timed_phase
+from Appraise.request_timing import timing_histograms
+from Campaign.models import Campaign
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentTask
+from EvalData.models import Market
+from EvalData.models import Metadata
+from EvalData.models import TextPair
+
 
 class UploadViewTests(TestCase):
 	def setUp(self):
@@ -54,3 +66,153 @@ class UploadViewTests(TestCase):
 		response = self.client.post(reverse('upload-file'), {'file': upload}, follow=True)
 		self.assertEqual(response.status_code, 200)
 		self.assertTrue(Path(self.upload_dir, 'sample.txt').exists())
+
+
+class DashboardLanguagesTests(TestCase):
+	def setUp(self):
+		super().setUp()
+		self.client = Client()
+		self.user = get_user_model().objects.create_user(
+			username='annotator', password='password'
+		)
+		self.user.groups.add(
+			Group.objects.create(name='deu'), Group.objects.create(name='ces')
+		)
+
+		campaign = Campaign.objects.create(campaignName='Test', createdBy=self.user)
+		market = Market.objects.create(
+			sourceLanguageCode='eng',
+			targetLanguageCode='deu',
+			domainName='TEST',
+			createdBy=self.user,
+		)
+		metadata = Metadata.objects.create(
+			market=market,
+			corpusName='TEST',
+			versionInfo='1.0',
+			source='MANUAL',
+			createdBy=self.user,
+		)
+		self.task = DirectAssessmentTask(
+			campaign=campaign, requiredAnnotations=1, batchNo=1, createdBy=self.user
+		)
+		self.task.set_market(market)
+		self.task.save()
+		self.task.items.add(
+			TextPair.objects.create(
+				itemID=1,
+				itemType='TGT',
+				metadata=metadata,
+				sourceID='src.txt',
+				sourceText='Source',
+				targetID='tgt.txt',
+				targetText='Target',
+				createdBy=self.user,
+			)
+		)
+		self.task.activate()
+
+	def _languages(self):
+		self.client.login(username='annotator', password='password')
+		response = self.client.get(reverse('dashboard'))
+		self.assertEqual(response.status_code, 200)
+		return response.context['all_languages']
+
+	def test_lists_languages_with_free_tasks(self):
+		self.assertEqual([x[0] for x in self._languages()['direct']], ['deu'])
+
+	def test_omits_languages_without_free_tasks(self):
+		self.task.complete()
+		self.assertEqual(self._languages(), {})
+
+	def test_omits_languages_with_free_tasks_assigned_to_user(self):
+		self.task.requiredAnnotations = 2
+		self.task.save()
+		self.task.assignedTo.add(self.user)
+		DirectAssessmentResult.objects.create(
+			score=50,
+			start_time=0,
+			end_time=1,
+			item=self.task.items.first(),
+			task=self.task,
+			createdBy=self.user,
+			completed=True,
+		)
+		self.assertEqual(self._languages(), {})
+
+
+class RequestTimingTests(TestCase):
+	def setUp(self):
+		super().setUp()
+		reset_timing_histograms()
+		self.addCleanup(reset_timing_histograms)
+
+		user_model = get_user_model()
+		self.staff_user = user_model.objects.create_user(
+			username='staff', email='staff@example.com', password='password', is_staff=True
+		)
+		self.normal_user = user_model.objects.create_user(
+			username='regular', email='regular@example.com', password='password'
+		)
+
+	def test_phase_outside_of_request_is_ignored(self):
+		with timed_phase('agenda'):
+			self.assertIsNone(current_timer())
+
+	def test_adds_server_timing_header_for_staff(self):
+		self.client.login(username='staff', password='password')
+		response = self.client.get(reverse('dashboard'))
+		self.assertEqual(response.status_code, 200)
+
+		metrics = [x.split(';')[0] for x in response['Server-Timing'].split(', ')]
+		self.assertEqual(metrics, ['task', 'agenda', 'stats', 'render', 'total'])
+		self.assertIn('queries"', response['Server-Timing'])
+		self.assertEqual(len(response.context['debug_times']), 4)
+
+	def test_omits_server_timing_header_for_other_users(self):
+		self.client.login(username='regular', password='password')
+		response = self.client.get(reverse('dashboard'))
+		self.assertEqual(response.status_code, 200)
+		self.assertFalse(response.has_header('Server-Timing'))
+
+		self.client.logout()
+		response = self.client.get(reverse('dashboard'))
+		self.assertFalse(response.has_header('Server-Timing'))
+
+	def test_denies_non_staff_user(self):
+		self.client.login(username='regular', password='password')
+		response = self.client.get(reverse('request-timings'))
+		self.assertEqual(response.status_code, 403)
+
+	def test_collects_histograms_per_view(self):
+		self.client.login(username='regular', password='password')
+		self.client.get(reverse('dashboard'))
+		self.client.get(reverse('dashboard'))
+
+		self.client.login(username='staff', password='password')
+		response = self.client.get(reverse('request-timings'))
+		self.assertEqual(response.status_code, 200)
+
+		timings = response.json()
+		total = timings['views']['dashboard']['total']
+		self.assertEqual(total['count'], 2)
+		self.assertEqual(sum(total['buckets']), 2)
+		self.assertEqual(len(total['buckets']), len(timings['buckets_ms']) + 1)
+		self.assertGreater(total['queries'], 0)
+		self.assertEqual(timings['views']['dashboard']['render']['count'], 2)
+
+	def test_times_streaming_responses_until_sent(self):
+		campaign = Campaign.objects.create(
+			campaignName='TimedCampaign', campaignOptions='', createdBy=self.staff_user
+		)
+		DirectAssessmentTask.objects.create(
+			campaign=campaign, requiredAnnotations=1, batchNo=1, createdBy=self.staff_user
+		)
+
+		response = self.client.get(reverse('campaign_status', args=['TimedCampaign']))
+		self.assertTrue(response.streaming)
+		self.assertFalse(response.has_header('Server-Timing'))
+		self.assertNotIn('campaign_status', timing_histograms())
+
+		response.getvalue()
+		self.assertEqual(timing_histograms()['campaign_status']['total']['count'], 1)
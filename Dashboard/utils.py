@@ -13,6 +13,7 @@ from uuid import UUID
 
 from scipy.stats import mannwhitneyu  # type: ignore
 
+from Appraise.annotation_time import coarse_span
 from Appraise.settings import SECRET_KEY
 from EvalData.models import DataAssessmentResult
 from EvalData.models import DirectAssessmentContextResult
@@ -153,7 +154,7 @@ def run_quality_control(username):
     # Compute the total annotation time
     # Be very generous, essentially last action - first action (not individual times)
     times = [x[1] for x in _data] + [x[0] for x in _data]
-    annotation_time = max(times) - min(times) if times else 0
+    annotation_time = coarse_span(times, times) or 0
 
     print(
         f"User '{username}', items= {len(_x)}, p-value= {pvalue}, time= {annotation_time}"
@@ -4,7 +4,6 @@ Appraise evaluation framework
 See LICENSE for usage details
 """
 
-from datetime import datetime
 from hashlib import md5
 from inspect import currentframe
 from inspect import getframeinfo
@@ -19,17 +18,24 @@ from django.contrib.auth.models import Group
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
 from django.core.files.storage import FileSystemStorage
+from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
 
+from Appraise.request_timing import debug_times
+from Appraise.request_timing import HISTOGRAM_BUCKETS_MS
+from Appraise.request_timing import mark_phase
+from Appraise.request_timing import timing_histograms
 from Appraise.settings import BASE_CONTEXT
 from Appraise.utils import _get_logger
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from Dashboard.models import UserInviteToken
 from Dashboard.utils import generate_confirmation_token
-from EvalData.models import DirectAssessmentTask
+from EvalData.models import seconds_to_timedelta
 from EvalData.models import TASK_DEFINITIONS
 from EvalData.models import TaskAgenda
+from EvalData.models import TaskAvailability
+from EvalData.models import UserAnnotationStats
 from Dashboard.forms import UploadFileForm
 
 TASK_TYPES = tuple([tup[1] for tup in TASK_DEFINITIONS])
@@ -309,7 +315,7 @@ def dashboard(request):
     """
     Appraise dashboard page.
     """
-    _t1 = datetime.now()
+    mark_phase('task')
 
     template_context = {'active_page': 'dashboard'}
     template_context.update(BASE_CONTEXT)
@@ -317,10 +323,10 @@ def dashboard(request):
     annotations = 0  # Completed items
     hits = 0  # Completed HITs
     total_hits = 0  # Total number of HITs expected from the user
-    for result_cls in TASK_RESULTS:
-        annotations += result_cls.get_completed_for_user(request.user)
-        _hits, _total = result_cls.get_hit_status_for_user(request.user)
-        hits, total_hits = hits + _hits, total_hits + _total
+    user_stats = UserAnnotationStats.for_user(request.user, TASK_RESULTS)
+    for stats in user_stats:
+        annotations += stats.completedItems
+        hits, total_hits = hits + stats.completedHits, total_hits + stats.totalHits
 
     # If user still has an assigned task, only offer link to this task.
     current_task = None
@@ -341,7 +347,7 @@ def dashboard(request):
 
     print('  Current task: {0}'.format(current_task))
 
-    _t2 = datetime.now()
+    mark_phase('agenda')
 
     # If there is no current task, check if user is done with work agenda.
     work_completed = False
@@ -353,9 +359,7 @@ def dashboard(request):
             print('Identified work agenda', agenda)
 
             tasks_to_complete = []
-            for serialized_open_task in agenda.serialized_open_tasks():
-                open_task = serialized_open_task.get_object_instance()
-
+            for serialized_open_task, open_task in agenda.resolved_open_tasks():
                 # Skip tasks which are not available anymore
                 if open_task is None:
                     continue
@@ -398,65 +402,58 @@ def dashboard(request):
                 languages.remove('eng')
 
         # Remove any language for which no free task is available.
-        from Campaign.models import Campaign
-
-        # Mapping: task type => campaigns as QuerySet
-        campaign_map = {task_cls: None for task_cls in TASK_TYPES}
+        # Mapping: campaign id => (campaign, task type name => code => free tasks)
+        campaign_map = {}
+        for availability in TaskAvailability.objects.select_related(
+            'campaign'
+        ).order_by('campaign___str_name', 'campaign_id'):
+            campaign, free_tasks = campaign_map.setdefault(
+                availability.campaign_id, (availability.campaign, {})
+            )
+            free_tasks.setdefault(availability.taskType, {})[
+                availability.targetLanguageCode
+            ] = availability.freeTasks
 
-        for campaign in Campaign.objects.all():
+        for campaign, free_tasks in campaign_map.values():
             print('Campaign: {0}'.format(campaign.campaignName))
 
-            for task_cls in campaign_map:
-                campaign_map[task_cls] = task_cls.objects.filter(
-                    campaign__campaignName=campaign.campaignName
-                )
+            campaign_types = [x for x in TASK_TYPES if x.__name__ in free_tasks]
+            for task_cls in campaign_types:
+                languages_map[task_cls][campaign.campaignName] = []
+                languages_map[task_cls][campaign.campaignName].extend(languages)
 
-            for task_cls in campaign_map:
-                if campaign_map[task_cls].exists():
-                    languages_map[task_cls][campaign.campaignName] = []
-                    languages_map[task_cls][campaign.campaignName].extend(languages)
+            # Free tasks are looked up for the first task type in the campaign
+            _cls = campaign_types[0]
+            can_take_task = _cls._user_can_take_free_task(campaign, request.user)
 
             for code in languages:
-                next_task_available = None
-
-                _cls = DirectAssessmentTask
-                for task_cls in campaign_map:
-                    if campaign_map[task_cls].exists():
-                        _cls = task_cls
-                        break
-
-                next_task_available = _cls.get_next_free_task_for_language(
-                    code, campaign, request.user
-                )
-
-                if not next_task_available:
-                    for task_cls in campaign_map:
-                        if campaign_map[task_cls].exists():
-                            languages_map[task_cls][campaign.campaignName].remove(code)
+                # Free tasks may all be assigned to the user already
+                if (
+                    can_take_task
+                    and free_tasks[_cls.__name__].get(code, 0) > 0
+                    and _cls._free_tasks_for_language(
+                        code, campaign, request.user
+                    ).exists()
+                ):
+                    continue
 
-            # _type and _languages variables are only for debug
-            _type = None
-            _languages = {}
-            for task_cls in campaign_map:
-                if campaign_map[task_cls].exists():
-                    _type = TASK_NAMES[task_cls]
-                    _languages = languages_map[task_cls]
-                    break
+                for task_cls in campaign_types:
+                    languages_map[task_cls][campaign.campaignName].remove(code)
 
             print(
                 "campaign = {0}, type = {1}, languages = {2}".format(
                     campaign.campaignName,
-                    _type,
-                    _languages.get(campaign.campaignName, 'none'),
+                    TASK_NAMES[_cls],
+                    languages_map[_cls][campaign.campaignName],
                 )
             )
 
-    _t3 = datetime.now()
+    mark_phase('stats')
 
     # Collect total annotation time
     times = {'days': 0, 'hours': 0, 'minutes': 0, 'seconds': 0}
-    for task_cls in TASK_RESULTS:
-        duration = task_cls.get_time_for_user(request.user)
+    for stats in user_stats:
+        duration = seconds_to_timedelta(stats.annotationTime)
         secs = duration.total_seconds()
         days = duration.days
         times['days'] += days
@@ -464,8 +461,6 @@ def dashboard(request):
         times['minutes'] += int(((secs - (days * 86400)) % 3600) / 60)
         times['seconds'] += int((secs - (days * 86400)) % 60)
 
-    _t4 = datetime.now()
-
     # All languages per task type
     # Mapping: task name => list of (code, language, campaign, task_url)
     all_languages = {}
@@ -510,15 +505,33 @@ def dashboard(request):
             'current_type': current_type,
             'current_url': current_url,
             'all_languages': all_languages,
-            'debug_times': (_t2 - _t1, _t3 - _t2, _t4 - _t3, _t4 - _t1),
+            'debug_times': debug_times(),
             'template_debug': 'debug' in request.GET,
             'work_completed': work_completed,
         }
     )
 
+    mark_phase('render')
     return render(request, 'Dashboard/dashboard.html', template_context)
 
 
+@login_required
+def request_timings(request):
+    """
+    Per-view request phase histograms of this server process, for staff.
+    """
+    if not (request.user.is_staff or request.user.is_superuser):
+        LOGGER.warning(
+            'User "%s" attempted to access request timings without privileges.',
+            request.user.username or 'Anonymous',
+        )
+        raise PermissionDenied
+
+    return JsonResponse(
+        {'buckets_ms': list(HISTOGRAM_BUCKETS_MS), 'views': timing_histograms()}
+    )
+
+
 @login_required
 def upload_file(request):
     if not (request.user.is_staff or request.user.is_superuser):
@@ -701,6 +701,23 @@ class TaskAgendaAdmin(admin.ModelAdmin):
     reset_taskagenda.short_description = "Reset task agenda"  # type: ignore
 
 
+class TaskProgressAdmin(admin.ModelAdmin):
+    """
+    Model admin for TaskProgress object model.
+    """
+
+    list_display = [
+        'user',
+        'taskType',
+        'taskID',
+        'completedItems',
+        'completedDocuments',
+        'dateModified',
+    ]
+    list_filter = ['taskType', 'trustedUser']
+    search_fields = ['user__username']
+
+
 class PairwiseAssessmentTaskAdmin(BaseMetadataAdmin):
     """
     Model admin for PairwiseAssessmentTask instances.
@@ -945,3 +962,4 @@ admin.site.register(
 )
 admin.site.register(WorkAgenda, WorkAgendaAdmin)
 admin.site.register(TaskAgenda, TaskAgendaAdmin)
+admin.site.register(TaskProgress, TaskProgressAdmin)
@@ -10,3 +10,23 @@ from django.apps import AppConfig
 # pylint: disable=missing-docstring
 class EvaldataConfig(AppConfig):
     name = 'EvalData'
+
+    def ready(self):
+        # pylint: disable=import-outside-toplevel
+        from EvalData.models import CAMPAIGN_TASK_TYPES
+        from EvalData.models import DirectAssessmentDocumentTask
+        from EvalData.models import PairwiseAssessmentDocumentTask
+        from EvalData.models import RESULT_TYPES
+        from EvalData.models.task_availability import connect_availability_signals
+        from EvalData.models.task_completion import connect_completion_signals
+        from EvalData.models.task_documents import connect_document_signals
+        from EvalData.models.user_stats import connect_stats_signals
+        from EvalData.task_cache import connect_signals
+
+        connect_signals()
+        connect_completion_signals(RESULT_TYPES)
+        connect_availability_signals(CAMPAIGN_TASK_TYPES.values())
+        connect_stats_signals(RESULT_TYPES)
+        connect_document_signals(
+            (DirectAssessmentDocumentTask, PairwiseAssessmentDocumentTask)
+        )
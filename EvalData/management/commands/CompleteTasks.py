@@ -0,0 +1,77 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from EvalData.models import TASK_DEFINITIONS
+from EvalData.models import TaskCompletion
+
+
+class Command(BaseCommand):
+    help = 'Completes active tasks with enough unique annotated items'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Recompute unique annotated item counters from result data first',
+        )
+        parser.add_argument(
+            '--trusted',
+            action='store_true',
+            help='Use the lower number of required items for trusted users',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report tasks which would be completed',
+        )
+
+    def handle(self, *args, **options):
+        for task_definition in TASK_DEFINITIONS:
+            task_cls, result_cls = task_definition[1], task_definition[2]
+
+            if options['rebuild']:
+                self._rebuild_counters(task_cls, result_cls)
+
+            task_ids = TaskCompletion.complete_tasks(
+                task_cls, trusted_user=options['trusted'], dry_run=options['dry_run']
+            )
+            for task_id in task_ids:
+                self.stdout.write('{0}[{1}]'.format(task_cls.__name__, task_id))
+
+            _action = 'can be completed' if options['dry_run'] else 'completed'
+            self.stdout.write(
+                '{0} {1} instances {2}'.format(
+                    len(task_ids), task_cls.__name__, _action
+                )
+            )
+
+    def _rebuild_counters(self, task_cls, result_cls):
+        unique_items = (
+            result_cls.objects.filter(activated=False, completed=True)
+            .values_list('task_id')
+            .annotate(_count=Count('item_id', distinct=True))
+            .order_by()
+        )
+        counters = [
+            TaskCompletion(
+                taskType=task_cls.__name__, taskID=task_id, uniqueItems=count
+            )
+            for task_id, count in unique_items
+            if task_id is not None
+        ]
+
+        with transaction.atomic():
+            TaskCompletion.objects.filter(taskType=task_cls.__name__).delete()
+            TaskCompletion.objects.bulk_create(counters)
+
+        self.stdout.write(
+            'Rebuilt {0} {1} counters'.format(len(counters), task_cls.__name__)
+        )
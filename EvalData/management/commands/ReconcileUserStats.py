@@ -0,0 +1,76 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+
+from EvalData.models import RESULT_TYPES
+from EvalData.models import UserAnnotationStats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes per-user annotation statistics from result data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            default=None,
+            help='Only process the user with this username',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report outdated statistics, do not update them',
+        )
+        parser.add_argument(
+            '--outdated',
+            action='store_true',
+            help='Only process statistics marked outdated by changed results',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.all()
+        if options['user']:
+            users = users.filter(username=options['user'])
+            if not users.exists():
+                raise CommandError('User {0} does not exist'.format(options['user']))
+
+        marked = None
+        if options['outdated']:
+            marked = set(
+                UserAnnotationStats.objects.filter(
+                    outdated=True, user__in=users
+                ).values_list('user_id', 'resultType')
+            )
+            users = users.filter(id__in={x[0] for x in marked})
+
+        checked = 0
+        outdated = 0
+        for user in users.order_by('id'):
+            for result_cls in RESULT_TYPES:
+                if marked is not None and (user.id, result_cls.__name__) not in marked:
+                    continue
+
+                with transaction.atomic():
+                    _, changed = UserAnnotationStats.reconcile(user, result_cls)
+                    if options['verify']:
+                        transaction.set_rollback(True)
+
+                checked += 1
+                if changed:
+                    outdated += 1
+                    self.stdout.write(
+                        '{0}[{1}] outdated'.format(result_cls.__name__, user.username)
+                    )
+
+        _action = 'outdated' if options['verify'] else 'updated'
+        self.stdout.write(
+            '{0}/{1} user statistics {2}'.format(outdated, checked, _action)
+        )
@@ -0,0 +1,39 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Campaign.models import Campaign
+from EvalData.models import CAMPAIGN_TASK_TYPES
+from EvalData.models import TaskAvailability
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds free task capacity per campaign, task type and language'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign',
+            type=str,
+            default=None,
+            help='Only process tasks of the campaign with this name',
+        )
+
+    def handle(self, *args, **options):
+        campaign = None
+        if options['campaign']:
+            try:
+                campaign = Campaign.get_campaign_or_raise(options['campaign'])
+            except LookupError as error:
+                raise CommandError(error)
+
+        for task_cls in CAMPAIGN_TASK_TYPES.values():
+            rows = TaskAvailability.rebuild(task_cls, campaign)
+            self.stdout.write(
+                'Stored {0} {1} availability rows'.format(rows, task_cls.__name__)
+            )
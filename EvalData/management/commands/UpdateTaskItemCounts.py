@@ -0,0 +1,54 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.core.management.base import BaseCommand
+from django.db.models import Count
+from django.db.models import Q
+from django.db.models import Value
+
+from EvalData.models import CAMPAIGN_TASK_TYPES
+
+
+class Command(BaseCommand):
+    help = 'Stores item and document counts on existing tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Also update tasks which already have an item count',
+        )
+
+    def handle(self, *args, **options):
+        for task_cls in CAMPAIGN_TASK_TYPES.values():
+            tasks = task_cls.objects.all()
+            if not options['force']:
+                tasks = tasks.filter(itemCount__isnull=True)
+
+            item_cls = task_cls._meta.get_field('items').related_model
+            document_count = Value(0)
+            if any(x.name == 'isCompleteDocument' for x in item_cls._meta.fields):
+                document_count = Count(
+                    'items', filter=Q(items__isCompleteDocument=True)
+                )
+
+            counts = tasks.annotate(
+                _items=Count('items'), _documents=document_count
+            ).values_list('id', '_items', '_documents')
+
+            updated = []
+            for task_id, items, documents in counts.order_by('id'):
+                updated.append(
+                    task_cls(id=task_id, itemCount=items, documentCount=documents)
+                )
+
+            task_cls.objects.bulk_update(
+                updated, ['itemCount', 'documentCount'], batch_size=500
+            )
+            self.stdout.write(
+                'Updated {0} {1} instances'.format(len(updated), task_cls.__name__)
+            )
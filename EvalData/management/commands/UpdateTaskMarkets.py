@@ -0,0 +1,51 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.core.management.base import BaseCommand
+
+from EvalData.models import CAMPAIGN_TASK_TYPES
+from EvalData.models import Market
+
+
+class Command(BaseCommand):
+    help = 'Stores market ID and language codes on existing tasks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Also update tasks which already have a market ID',
+        )
+
+    def handle(self, *args, **options):
+        markets = {}
+        for task_cls in CAMPAIGN_TASK_TYPES.values():
+            tasks = task_cls.objects.all()
+            if not options['force']:
+                tasks = tasks.filter(marketID='')
+
+            updated = 0
+            for task in tasks.order_by('id'):
+                first_item = task.items.select_related('metadata').first()
+                if first_item is None:
+                    continue
+
+                market_id = first_item.metadata.market_id
+                if market_id not in markets:
+                    markets[market_id] = Market.objects.get(id=market_id)
+
+                task.set_market(markets[market_id])
+                task_cls.objects.filter(id=task.id).update(
+                    marketID=task.marketID,
+                    sourceLanguageCode=task.sourceLanguageCode,
+                    targetLanguageCode=task.targetLanguageCode,
+                )
+                updated += 1
+
+            self.stdout.write(
+                'Updated {0} {1} instances'.format(updated, task_cls.__name__)
+            )
@@ -0,0 +1,83 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0111,C0330,E1101
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+
+from Campaign.models import Campaign
+from EvalData.models import TASK_DEFINITIONS
+from EvalData.models import TaskProgress
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds or verifies task progress cursors from result data'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--campaign',
+            type=str,
+            default=None,
+            help='Only process tasks of the campaign with this name',
+        )
+        parser.add_argument(
+            '--verify',
+            action='store_true',
+            help='Only report outdated cursors, do not update them',
+        )
+
+    def handle(self, *args, **options):
+        campaign = None
+        if options['campaign']:
+            try:
+                campaign = Campaign.get_campaign_or_raise(options['campaign'])
+            except LookupError as error:
+                raise CommandError(error)
+
+        verify_only = options['verify']
+        checked = 0
+        outdated = 0
+        for task_definition in TASK_DEFINITIONS:
+            task_cls, result_cls = task_definition[1], task_definition[2]
+
+            tasks = task_cls.objects.all()
+            if campaign:
+                tasks = tasks.filter(campaign=campaign)
+
+            for task in tasks.order_by('id'):
+                user_ids = set(
+                    result_cls.objects.filter(task=task).values_list(
+                        'createdBy', flat=True
+                    )
+                )
+                user_ids.update(
+                    TaskProgress.objects.filter(
+                        taskType=task_cls.__name__, taskID=task.id
+                    ).values_list('user', flat=True)
+                )
+
+                for user in User.objects.filter(id__in=user_ids):
+                    old_values, new_values = TaskProgress.refresh(
+                        task, user, verify_only=verify_only
+                    )
+                    checked += 1
+                    if old_values != new_values:
+                        outdated += 1
+                        self.stdout.write(
+                            '{0}[{1}] {2}: {3} -> {4}'.format(
+                                task_cls.__name__,
+                                task.id,
+                                user.username,
+                                old_values,
+                                new_values,
+                            )
+                        )
+
+        _action = 'outdated' if verify_only else 'updated'
+        self.stdout.write(
+            '{0}/{1} task progress cursors {2}'.format(outdated, checked, _action)
+        )
@@ -0,0 +1,86 @@
+# Generated by Django 4.2.22 on 2026-10-17 07:04
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('EvalData', '0057_pairwiseassessmentdocumentresult_browser_info'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskProgress',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'taskType',
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name='Task type'
+                    ),
+                ),
+                (
+                    'taskID',
+                    models.PositiveIntegerField(db_index=True, verbose_name='Task ID'),
+                ),
+                (
+                    'trustedUser',
+                    models.BooleanField(
+                        default=False,
+                        help_text='(trust status the cursor was computed for)',
+                        verbose_name='Trusted user?',
+                    ),
+                ),
+                (
+                    'completedItems',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Completed items'
+                    ),
+                ),
+                (
+                    'nextItemID',
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text='(primary key of the next item, empty if done)',
+                        null=True,
+                        verbose_name='Next item ID',
+                    ),
+                ),
+                (
+                    'completedDocuments',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Completed documents'
+                    ),
+                ),
+                (
+                    'dateModified',
+                    models.DateTimeField(auto_now=True, verbose_name='Date modified'),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='User',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Task progress',
+                'verbose_name_plural': 'Task progress',
+                'unique_together': {('user', 'taskType', 'taskID')},
+            },
+        ),
+    ]
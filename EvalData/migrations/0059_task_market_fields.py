@@ -0,0 +1,244 @@
+# Generated by Django 4.2.22 on 2026-10-17 07:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0058_taskprogress'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataassessmenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='dataassessmenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='dataassessmenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentcontexttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentcontexttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentcontexttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentdocumenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentdocumenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentdocumenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='multimodalassessmenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='multimodalassessmenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='multimodalassessmenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmentdocumenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmentdocumenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmentdocumenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmenttask',
+            name='marketID',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=72,
+                verbose_name='Market ID',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmenttask',
+            name='sourceLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Source language',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmenttask',
+            name='targetLanguageCode',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                default='',
+                max_length=10,
+                verbose_name='Target language',
+            ),
+        ),
+    ]
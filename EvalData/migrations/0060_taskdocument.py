@@ -0,0 +1,77 @@
+# Generated by Django 4.2.22 on 2026-10-17 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0059_task_market_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskDocument',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'taskType',
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name='Task type'
+                    ),
+                ),
+                (
+                    'taskID',
+                    models.PositiveIntegerField(db_index=True, verbose_name='Task ID'),
+                ),
+                (
+                    'position',
+                    models.PositiveIntegerField(
+                        help_text='(0-based, in order of first item)',
+                        verbose_name='Position',
+                    ),
+                ),
+                (
+                    'documentID',
+                    models.CharField(max_length=100, verbose_name='Document ID'),
+                ),
+                (
+                    'firstItemID',
+                    models.PositiveIntegerField(verbose_name='First item ID'),
+                ),
+                (
+                    'lastItemID',
+                    models.PositiveIntegerField(verbose_name='Last item ID'),
+                ),
+                (
+                    'completeItemID',
+                    models.PositiveIntegerField(
+                        blank=True,
+                        help_text='(empty if the block has no complete document item)',
+                        null=True,
+                        verbose_name='Complete document item ID',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Task document',
+                'verbose_name_plural': 'Task documents',
+                'ordering': ['taskType', 'taskID', 'position'],
+                'indexes': [
+                    models.Index(
+                        fields=['taskType', 'taskID', 'documentID'],
+                        name='EvalData_ta_taskTyp_549ffe_idx',
+                    )
+                ],
+                'unique_together': {('taskType', 'taskID', 'position')},
+            },
+        ),
+    ]
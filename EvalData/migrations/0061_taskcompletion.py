@@ -0,0 +1,54 @@
+# Generated by Django 4.2.22 on 2026-10-17 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0060_taskdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCompletion',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'taskType',
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name='Task type'
+                    ),
+                ),
+                (
+                    'taskID',
+                    models.PositiveIntegerField(db_index=True, verbose_name='Task ID'),
+                ),
+                (
+                    'uniqueItems',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='(items with at least one completed result)',
+                        verbose_name='Unique annotated items',
+                    ),
+                ),
+                (
+                    'dateModified',
+                    models.DateTimeField(auto_now=True, verbose_name='Date modified'),
+                ),
+            ],
+            options={
+                'verbose_name': 'Task completion',
+                'verbose_name_plural': 'Task completion',
+                'unique_together': {('taskType', 'taskID')},
+            },
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.2.22 on 2026-10-17 08:31
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Campaign', '0015_alter_campaign_activatedby_alter_campaign_batches_and_more'),
+        ('EvalData', '0061_taskcompletion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskAvailability',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'taskType',
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name='Task type'
+                    ),
+                ),
+                (
+                    'targetLanguageCode',
+                    models.CharField(
+                        blank=True,
+                        help_text='(empty for tasks without market)',
+                        max_length=10,
+                        verbose_name='Target language',
+                    ),
+                ),
+                ('tasks', models.PositiveIntegerField(default=0, verbose_name='Tasks')),
+                (
+                    'freeTasks',
+                    models.PositiveIntegerField(default=0, verbose_name='Free tasks'),
+                ),
+                (
+                    'freeAssignments',
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text='(missing assigned users over all free tasks)',
+                        verbose_name='Free assignments',
+                    ),
+                ),
+                (
+                    'dateModified',
+                    models.DateTimeField(auto_now=True, verbose_name='Date modified'),
+                ),
+                (
+                    'campaign',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='%(app_label)s_%(class)s_campaign',
+                        related_query_name='%(app_label)s_%(class)ss',
+                        to='Campaign.campaign',
+                        verbose_name='Campaign',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'Task availability',
+                'verbose_name_plural': 'Task availability',
+                'ordering': ['campaign', 'taskType', 'targetLanguageCode'],
+                'unique_together': {('campaign', 'taskType', 'targetLanguageCode')},
+            },
+        ),
+    ]
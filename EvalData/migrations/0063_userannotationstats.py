@@ -0,0 +1,97 @@
+# Generated by Django 4.2.22 on 2026-10-17 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('EvalData', '0062_taskavailability'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAnnotationStats',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'resultType',
+                    models.CharField(
+                        db_index=True, max_length=100, verbose_name='Result type'
+                    ),
+                ),
+                (
+                    'completedItems',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Completed items'
+                    ),
+                ),
+                (
+                    'totalHits',
+                    models.PositiveIntegerField(default=0, verbose_name='Total HITs'),
+                ),
+                (
+                    'completedHits',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Completed HITs'
+                    ),
+                ),
+                (
+                    'annotationTime',
+                    models.FloatField(
+                        default=0,
+                        help_text='(in seconds)',
+                        verbose_name='Annotation time',
+                    ),
+                ),
+                (
+                    'actionTime',
+                    models.BooleanField(
+                        default=False,
+                        help_text='(time is measured between any actions, for ESA/MQM)',
+                        verbose_name='Action time?',
+                    ),
+                ),
+                (
+                    'lastStartTime',
+                    models.FloatField(
+                        blank=True, null=True, verbose_name='Last start time'
+                    ),
+                ),
+                (
+                    'lastEndTime',
+                    models.FloatField(
+                        blank=True, null=True, verbose_name='Last end time'
+                    ),
+                ),
+                (
+                    'dateModified',
+                    models.DateTimeField(auto_now=True, verbose_name='Date modified'),
+                ),
+                (
+                    'user',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name='User',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'User annotation statistics',
+                'verbose_name_plural': 'User annotation statistics',
+                'unique_together': {('user', 'resultType')},
+            },
+        ),
+    ]
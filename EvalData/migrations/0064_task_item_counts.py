@@ -0,0 +1,132 @@
+# Generated by Django 4.2.22 on 2026-10-17 09:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0063_userannotationstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataassessmenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='dataassessmenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentcontexttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentcontexttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentdocumenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmentdocumenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='directassessmenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='multimodalassessmenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='multimodalassessmenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmentdocumenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmentdocumenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmenttask',
+            name='documentCount',
+            field=models.PositiveIntegerField(
+                blank=True,
+                help_text='(number of complete document items)',
+                null=True,
+                verbose_name='Document count',
+            ),
+        ),
+        migrations.AddField(
+            model_name='pairwiseassessmenttask',
+            name='itemCount',
+            field=models.PositiveIntegerField(
+                blank=True, null=True, verbose_name='Item count'
+            ),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.22 on 2026-10-17 10:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('EvalData', '0064_task_item_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userannotationstats',
+            name='outdated',
+            field=models.BooleanField(
+                default=False,
+                help_text='(results changed since the statistics were computed)',
+                verbose_name='Outdated?',
+            ),
+        ),
+    ]
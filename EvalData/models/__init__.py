@@ -13,6 +13,11 @@ from .multi_modal_assessment import *
 from .pairwise_assessment import *
 from .pairwise_assessment_document import *
 from .task_agenda import *
+from .task_availability import *
+from .task_completion import *
+from .task_documents import *
+from .task_progress import *
+from .user_stats import *
 
 # Task definitions: user-friendly name, task class, task result class, URL name
 TASK_DEFINITIONS = (
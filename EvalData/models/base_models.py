@@ -8,20 +8,27 @@ See LICENSE for usage details
 from datetime import timezone
 
 utc = timezone.utc
+from collections import defaultdict
 from datetime import datetime
 from datetime import timedelta
 from difflib import SequenceMatcher
-from traceback import format_exc
+from typing import Dict
 from typing import Set
+from typing import Type
 
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.db import models
+from django.db import transaction
+from django.db.models.functions import Coalesce
+from django.db.models.functions import RowNumber
 from django.utils.html import escape
 from django.utils.text import format_lazy as f
 from django.utils.translation import gettext_lazy as _
 
 from Appraise.utils import _get_logger
+from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
@@ -37,6 +44,8 @@ MAX_ITEMTYPE_LENGTH = 5
 MAX_REQUIREDANNOTATIONS_VALUE = 50
 MAX_TYPENAME_LENGTH = 100
 MAX_PRIMARYID_LENGTH = 50
+MAX_MARKETID_LENGTH = 2 * MAX_LANGUAGECODE_LENGTH + MAX_DOMAINNAME_LENGTH + 2
+MAX_FREE_TASK_CLAIM_ATTEMPTS = 5
 
 SET_ITEMTYPE_CHOICES = (
     ('SRC', 'Source text'),
@@ -60,6 +69,251 @@ def seconds_to_timedelta(value):
     return timedelta(days=_days, hours=_hours, minutes=_mins, seconds=_secs)
 
 
+def next_item_with_completed_count(task, result_cls, user, trusted_user):
+    """
+    Returns (next_item, completed_items) for the given task and user.
+
+    The next item is the first item (in id order) which has no completed
+    result by user; trusted users only get items matching the
+    trusted_item_filter() of the task. The completed count is the number
+    of items preceding the next item, or all items if there is none.
+
+    The stored TaskProgress cursor is used if it is still valid; otherwise
+    both values are resolved in a single anti-join query and the cursor
+    is updated.
+    """
+    # The task_progress module depends on this one, so import it on use
+    from EvalData.models.task_progress import TaskProgress
+
+    cursor = TaskProgress.next_item_from_cursor(task, result_cls, user, trusted_user)
+    if cursor is not None:
+        return cursor
+
+    next_item, completed_items = _resolve_next_item(
+        task, result_cls, user, trusted_user
+    )
+    TaskProgress.store(task, result_cls, user, trusted_user, next_item, completed_items)
+    return (next_item, completed_items)
+
+
+def _resolve_next_item(task, result_cls, user, trusted_user):
+    """
+    Resolves (next_item, completed_items) from the result table.
+
+    Both values are resolved in a single anti-join query; the total item
+    count is only queried separately if no next item exists.
+    """
+    items_field = task._meta.get_field('items')
+    through_cls = items_field.remote_field.through
+    task_column = items_field.m2m_field_name()
+    item_column = items_field.m2m_reverse_field_name()
+
+    annotated_results = result_cls.objects.filter(
+        item=models.OuterRef('pk'),
+        activated=False,
+        completed=True,
+        createdBy=user,
+    )
+    preceding_items = (
+        through_cls.objects.filter(
+            **{
+                task_column: task.pk,
+                '{0}__lt'.format(item_column): models.OuterRef('pk'),
+            }
+        )
+        .values(task_column)
+        .annotate(_count=models.Count('pk'))
+        .values('_count')
+    )
+
+    candidates = task.items.filter(~models.Exists(annotated_results))
+    if trusted_user:
+        candidates = candidates.filter(task.trusted_item_filter())
+
+    next_item = (
+        candidates.annotate(
+            _preceding_items=Coalesce(models.Subquery(preceding_items), 0)
+        )
+        .order_by('id')
+        .first()
+    )
+
+    if next_item is None:
+        return (None, task.item_count())
+
+    LOGGER.debug(
+        'Identified next item: %s/%s for trusted=%s',
+        next_item.id,
+        next_item.itemType,
+        trusted_user,
+    )
+    return (next_item, next_item._preceding_items)
+
+
+def first_result_for_each_item(task, result_cls, items, user):
+    """
+    Returns the first completed result by user for each of the given items.
+
+    Results are ordered by dateModified; items without a result get None.
+    All results are fetched in a single query, using a window function
+    where the database supports it. Otherwise, all results for the items
+    are fetched and the first one per item is picked in Python.
+    """
+    results = result_cls.objects.filter(
+        item_id__in=[item.id for item in items],
+        completed=True,
+        createdBy=user,
+        task=task,
+    )
+
+    first_results = {}
+    if connection.features.supports_over_clause:
+        results = results.annotate(
+            _row_number=models.Window(
+                RowNumber(),
+                partition_by=[models.F('item_id')],
+                order_by=[models.F('dateModified').asc(), models.F('id').asc()],
+            )
+        ).filter(_row_number=1)
+        for result in results:
+            first_results[result.item_id] = result
+
+    else:
+        for result in results.order_by('item_id', 'dateModified', 'id'):
+            first_results.setdefault(result.item_id, result)
+
+    block_results = []
+    for item in items:
+        result = first_results.get(item.id)
+        if result is not None:
+            result.item = item
+        block_results.append(result)
+
+    return block_results
+
+
+def bulk_submit_results(task, result_cls, user, submissions, score_fields):
+    """
+    Stores results by user for multiple items of task at once.
+
+    Each submission is a dict with item_id and task_id, identifying the
+    item by itemID and primary key as in the annotation views, the
+    start_timestamp and end_timestamp, and values for the given score
+    fields, a dict mapping result field names to a (parser, required)
+    tuple. Items are validated against the task with a single query;
+    existing results are updated and new ones created in one transaction.
+
+    Returns a list with one dict per submission, in submission order,
+    reporting whether it was accepted and, if not, why.
+    """
+    # These modules depend on this one, so import them on use
+    from EvalData.models.task_completion import TaskCompletion
+    from EvalData.models.task_progress import TaskProgress
+    from EvalData.models.user_stats import UserAnnotationStats
+
+    item_pks = set()
+    for submission in submissions:
+        try:
+            item_pks.add(int(submission.get('task_id')))
+        except (TypeError, ValueError):
+            pass
+
+    items = task.items.in_bulk(item_pks)
+    existing_results = first_result_for_each_item(
+        task, result_cls, list(items.values()), user
+    )
+    existing_results = {x.item_id: x for x in existing_results if x is not None}
+
+    utc_now = datetime.utcnow().replace(tzinfo=utc)
+    new_results = []
+    updated_results = []
+    statuses = []
+    for submission in submissions:
+        status = {
+            'item_id': submission.get('item_id'),
+            'task_id': submission.get('task_id'),
+            'accepted': False,
+            'error': None,
+        }
+        statuses.append(status)
+
+        try:
+            item = items.get(int(submission.get('task_id')))
+            item_id = int(submission.get('item_id'))
+        except (TypeError, ValueError):
+            item, item_id = None, None
+
+        if item is None or item.itemID != item_id:
+            status['error'] = 'Item not found in task'
+            continue
+
+        if item.id not in item_pks:
+            status['error'] = 'Item submitted more than once'
+            continue
+
+        try:
+            values = {
+                'start_time': float(submission['start_timestamp']),
+                'end_time': float(submission['end_timestamp']),
+            }
+            for field_name, (parser, required) in score_fields.items():
+                value = submission.get(field_name)
+                if value in (None, ''):
+                    if required:
+                        raise KeyError(field_name)
+                    continue
+                values[field_name] = parser(value)
+
+        except (KeyError, TypeError, ValueError) as error:
+            status['error'] = 'Missing or invalid value: {0}'.format(error)
+            continue
+
+        item_pks.discard(item.id)
+        result = existing_results.get(item.id)
+        if result is None:
+            result = result_cls(
+                item=item,
+                task=task,
+                createdBy=user,
+                activated=False,
+                completed=True,
+                **values,
+            )
+            new_results.append(result)
+        else:
+            for field_name, value in values.items():
+                setattr(result, field_name, value)
+            updated_results.append(result)
+
+        result.dateCompleted = utc_now
+        status['accepted'] = True
+
+    with transaction.atomic():
+        result_cls.objects.bulk_create(new_results)
+        if updated_results:
+            result_cls.objects.bulk_update(
+                updated_results,
+                ['start_time', 'end_time', 'dateCompleted'] + list(score_fields),
+            )
+
+        if new_results:
+            TaskCompletion.add_items(
+                task,
+                result_cls,
+                [result.item_id for result in new_results],
+                createdBy=user,
+            )
+            TaskProgress.advance(task, user, [x.item for x in new_results])
+
+        # Bulk operations do not send signals, so update statistics here
+        if new_results:
+            UserAnnotationStats.add_results(result_cls, user, new_results)
+        if updated_results:
+            UserAnnotationStats.mark_outdated(user, result_cls)
+
+    return statuses
+
+
 class ObjectID(models.Model):
     """
     Encodes an object type and ID for retrieval.
@@ -83,34 +337,49 @@ class ObjectID(models.Model):
         """
         Returns actual object instance for current ObjectID instance.
         """
-        instance = None
-        try:
-            # TODO: add registry of type names to models.py and ensure only
-            #   those are used for typeName. Furthermore, verify that the
-            #   given primaryID does not contain ')'.
-
-            _code = '{0}.objects.get(id={1})'.format(self.typeName, self.primaryID)
-
-            # TODO: Hack
-            from EvalData.models import (
-                DataAssessmentTask,
-                DirectAssessmentTask,
-                DirectAssessmentContextTask,
-                DirectAssessmentDocumentTask,
-                MultiModalAssessmentTask,
-                PairwiseAssessmentDocumentTask,
-                PairwiseAssessmentTask,
-            )
+        return ObjectID.get_object_instances([self]).get(self.id)
 
-            instance = eval(_code)
+    @staticmethod
+    def get_object_instances(object_ids):
+        """
+        Returns dictionary mapping ObjectID ids to object instances.
 
-        except:
-            _msg = 'ObjectID {0}.{1} invalid'.format(self.typeName, self.primaryID)
-            LOGGER.warn(_msg)
-            LOGGER.warn(format_exc())
+        Object ids are grouped by type name and each type is retrieved
+        with a single in_bulk() query. Only types known to the annotation
+        task registry can be resolved; unknown types and missing objects
+        are mapped to None.
+        """
+        primary_ids_by_type = defaultdict(set)
+        for object_id in object_ids:
+            try:
+                primary_ids_by_type[object_id.typeName].add(int(object_id.primaryID))
+            except ValueError:
+                pass
+
+        instances_by_type = {}
+        for type_name, primary_ids in primary_ids_by_type.items():
+            task_cls = AnnotationTaskRegistry.get_class(type_name)
+            if task_cls is not None:
+                instances_by_type[type_name] = task_cls.objects.in_bulk(primary_ids)
+
+        instances = {}
+        for object_id in object_ids:
+            instance = None
+            try:
+                _pk = int(object_id.primaryID)
+                instance = instances_by_type.get(object_id.typeName, {}).get(_pk)
+            except ValueError:
+                pass
+
+            if instance is None:
+                _msg = 'ObjectID {0}.{1} invalid'.format(
+                    object_id.typeName, object_id.primaryID
+                )
+                LOGGER.warning(_msg)
+
+            instances[object_id.id] = instance
 
-        finally:
-            return instance
+        return instances
 
     def __str__(self):
         return str(self.id) + '.' + self.typeName + '.' + self.primaryID
@@ -124,6 +393,7 @@ class AnnotationTaskRegistry:
     """
 
     _ANNOTATION_TASK_REGISTRY = set()  # type: Set[str]
+    _ANNOTATION_TASK_CLASSES = {}  # type: Dict[str, Type]
 
     @staticmethod
     def register(obj):
@@ -132,8 +402,16 @@ class AnnotationTaskRegistry:
         """
         _name = obj.__name__
         AnnotationTaskRegistry._ANNOTATION_TASK_REGISTRY.add(_name)
+        AnnotationTaskRegistry._ANNOTATION_TASK_CLASSES[_name] = obj
         return obj
 
+    @staticmethod
+    def get_class(name):
+        """
+        Get annotation task class for given type name, or None.
+        """
+        return AnnotationTaskRegistry._ANNOTATION_TASK_CLASSES.get(name)
+
     @staticmethod
     def get_types():
         """
@@ -411,6 +689,290 @@ class BasePairwiseAssessmentResult(BaseMetadata):
         abstract = True
 
 
+class BaseAnnotationTask(BaseMetadata):
+    """
+    Abstract base class for annotation tasks.
+
+    Stores the market of the task items, so that market and language
+    lookups do not need to query items, metadata and market instances,
+    and the number of items, so that progress reporting does not need to
+    count them.
+    """
+
+    marketID = models.CharField(
+        blank=True,
+        db_index=True,
+        default='',
+        max_length=MAX_MARKETID_LENGTH,
+        verbose_name=_('Market ID'),
+    )
+
+    sourceLanguageCode = models.CharField(
+        blank=True,
+        db_index=True,
+        default='',
+        max_length=MAX_LANGUAGECODE_LENGTH,
+        verbose_name=_('Source language'),
+    )
+
+    targetLanguageCode = models.CharField(
+        blank=True,
+        db_index=True,
+        default='',
+        max_length=MAX_LANGUAGECODE_LENGTH,
+        verbose_name=_('Target language'),
+    )
+
+    itemCount = models.PositiveIntegerField(
+        blank=True, null=True, verbose_name=_('Item count')
+    )
+
+    documentCount = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name=_('Document count'),
+        help_text=_('(number of complete document items)'),
+    )
+
+    # pylint: disable=C0111,R0903
+    class Meta(BaseMetadata.Meta):
+        abstract = True
+
+    @classmethod
+    def trusted_item_filter(cls):
+        """
+        Returns Q object matching the items annotated by trusted users.
+        """
+        return models.Q(itemType='TGT')
+
+    def is_trusted_user(self, user):
+        """
+        Returns True if user is a trusted user in the task campaign.
+        """
+        # Avoids fetching the campaign, trusted users are cached by its id
+        campaign_cls = self._meta.get_field('campaign').related_model
+        return user.id in campaign_cls.trusted_user_ids_for_campaign(self.campaign_id)
+
+    def set_market(self, market):
+        """
+        Copies market ID and language codes from the given market.
+        """
+        self.marketID = str(market)
+        self.sourceLanguageCode = market.sourceLanguageCode
+        self.targetLanguageCode = market.targetLanguageCode
+
+    def set_item_counts(self, items):
+        """
+        Stores the number of the given task items and complete documents.
+        """
+        self.itemCount = len(items)
+        self.documentCount = len(
+            [x for x in items if getattr(x, 'isCompleteDocument', False)]
+        )
+
+    def item_count(self):
+        # Tasks created before item counts were stored on tasks need a
+        # backfill, see the UpdateTaskItemCounts management command
+        if self.itemCount is None:
+            return self.items.count()
+        return self.itemCount
+
+    @classmethod
+    def item_counts(cls, task_ids):
+        """
+        Returns dict mapping ids of existing tasks to their item counts.
+
+        Items are only counted for tasks without a stored item count.
+        """
+        counts = dict(
+            cls.objects.filter(id__in=task_ids).values_list('id', 'itemCount')
+        )
+        missing_ids = [x for x, count in counts.items() if count is None]
+        if missing_ids:
+            counts.update(
+                cls.objects.filter(id__in=missing_ids)
+                .annotate(_items=models.Count('items'))
+                .values_list('id', '_items')
+            )
+        return counts
+
+    @classmethod
+    def item_count_subquery(cls, task_id):
+        """
+        Returns expression for the item count of the task with given id.
+
+        Items are only counted for tasks without a stored item count. The
+        expression is NULL for missing tasks.
+        """
+        items_field = cls._meta.get_field('items')
+        through_cls = items_field.remote_field.through
+        task_column = items_field.m2m_field_name()
+
+        stored_count = cls.objects.filter(pk=task_id).values('itemCount')[:1]
+        item_count = (
+            through_cls.objects.filter(**{task_column: task_id})
+            .values(task_column)
+            .annotate(_count=models.Count('pk'))
+            .values('_count')
+        )
+        return Coalesce(models.Subquery(stored_count), models.Subquery(item_count))
+
+    def _market_tokens(self):
+        # Tasks created before markets were stored on tasks need a backfill,
+        # see the UpdateTaskMarkets management command
+        if not self.marketID:
+            return str(self.items.first().metadata.market).split('_')
+        return self.marketID.split('_')
+
+    def marketName(self):
+        if not self.marketID:
+            return str(self.items.first().metadata.market)
+        return self.marketID
+
+    def marketSourceLanguage(self):
+        tokens = self._market_tokens()
+        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
+            return LANGUAGE_CODES_AND_NAMES[tokens[0]]
+        return None
+
+    def marketSourceLanguageCode(self):
+        tokens = self._market_tokens()
+        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
+            return tokens[0]
+        return None
+
+    def marketTargetLanguage(self):
+        tokens = self._market_tokens()
+        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
+            return LANGUAGE_CODES_AND_NAMES[tokens[1]]
+        return None
+
+    def marketTargetLanguageCode(self):
+        tokens = self._market_tokens()
+        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
+            return tokens[1]
+        return None
+
+    @classmethod
+    def _user_can_take_free_task(cls, campaign, user):
+        """
+        Returns False if user may not be assigned any further free tasks.
+        """
+        # pylint: disable=unused-argument
+        return True
+
+    @classmethod
+    def _tasks_for_language(cls, code, campaign=None):
+        """
+        Returns queryset of tasks for target language code.
+        """
+        items_field = cls._meta.get_field('items')
+        market_items = items_field.related_model.objects.filter(
+            **{items_field.related_query_name(): models.OuterRef('pk')},
+            metadata__market__targetLanguageCode=code,
+        )
+
+        # Tasks without stored market fall back to the market of their items
+        tasks = cls.objects.filter(
+            models.Q(targetLanguageCode=code)
+            | models.Q(targetLanguageCode='') & models.Exists(market_items)
+        )
+        if campaign:
+            tasks = tasks.filter(campaign=campaign)
+
+        return tasks
+
+    @classmethod
+    def _free_tasks_for_language(cls, code, campaign=None, user=None):
+        """
+        Returns queryset of active tasks for target language code which
+        have fewer assigned users than required annotations and which
+        are not yet assigned to user, in id order.
+        """
+        assigned_field = cls._meta.get_field('assignedTo')
+        task_column = assigned_field.m2m_field_name()
+        assigned_users = (
+            assigned_field.remote_field.through.objects.filter(
+                **{task_column: models.OuterRef('pk')}
+            )
+            .values(task_column)
+            .annotate(_count=models.Count('pk'))
+            .values('_count')
+        )
+
+        free_tasks = cls._tasks_for_language(code, campaign).filter(
+            activated=True, completed=False
+        )
+        free_tasks = free_tasks.annotate(
+            _assigned_users=Coalesce(models.Subquery(assigned_users), 0)
+        ).filter(_assigned_users__lt=models.F('requiredAnnotations'))
+        if user is not None:
+            free_tasks = free_tasks.exclude(assignedTo=user)
+
+        return free_tasks.order_by('id')
+
+    @classmethod
+    def get_next_free_task_for_language(cls, code, campaign=None, user=None):
+        """
+        Returns next free task for target language code and user, or None.
+
+        No task is returned if no user is given. This does not assign the
+        task; use claim_next_free_task_for_language() to atomically assign
+        the task to a user.
+        """
+        if user is None or not cls._user_can_take_free_task(campaign, user):
+            return None
+
+        return cls._free_tasks_for_language(code, campaign, user).first()
+
+    @classmethod
+    def get_next_free_task_for_language_and_campaign(cls, code, campaign):
+        return cls.get_next_free_task_for_language(code, campaign)
+
+    @classmethod
+    def claim_next_free_task_for_language(cls, code, campaign, user):
+        """
+        Assigns next free task for target language code to user.
+
+        On databases supporting it, the task row is claimed with
+        SELECT ... FOR UPDATE SKIP LOCKED, so concurrent requests pick
+        different tasks. Otherwise (e.g., SQLite), the assignment is
+        rolled back if a concurrent request has filled the task in the
+        meantime and the next free task is tried.
+
+        Returns the assigned task or None if there is no free task.
+        """
+        if not cls._user_can_take_free_task(campaign, user):
+            return None
+
+        skip_locked = connection.features.has_select_for_update_skip_locked
+        for _ in range(MAX_FREE_TASK_CLAIM_ATTEMPTS):
+            with transaction.atomic():
+                free_tasks = cls._free_tasks_for_language(code, campaign, user)
+                if skip_locked:
+                    free_tasks = free_tasks.select_for_update(
+                        skip_locked=True, of=('self',)
+                    )
+
+                free_task = free_tasks.first()
+                if free_task is None:
+                    return None
+
+                free_task.assignedTo.add(user)
+                if skip_locked:
+                    return free_task
+
+                if free_task.assignedTo.count() <= free_task.requiredAnnotations:
+                    return free_task
+
+                transaction.set_rollback(True)
+
+        LOGGER.warning(
+            'Failed to claim free {0} for user {1}'.format(cls.__name__, user)
+        )
+        return None
+
+
 class Market(BaseMetadata):
     """
     Models a language/locale market.
@@ -424,7 +986,7 @@ class Market(BaseMetadata):
     # For monolingual content, source and target codes are identical.
     ###
     marketID = models.CharField(
-        max_length=2 * MAX_LANGUAGECODE_LENGTH + MAX_DOMAINNAME_LENGTH + 2,
+        max_length=MAX_MARKETID_LENGTH,
         editable=False,
         unique=True,
     )
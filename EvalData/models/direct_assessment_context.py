@@ -19,10 +19,13 @@ from django.utils.translation import gettext_lazy as _
 from Appraise.utils import _get_logger, _compute_user_total_annotation_time
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models.base_models import AnnotationTaskRegistry
+from EvalData.models.base_models import BaseAnnotationTask
 from EvalData.models.base_models import BaseMetadata
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
+from EvalData.models.base_models import next_item_with_completed_count
 from EvalData.models.base_models import seconds_to_timedelta
 from EvalData.models.base_models import TextPair
+from EvalData.models.task_completion import TaskCompletion
 
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
@@ -75,7 +78,7 @@ class TextPairWithContext(TextPair):
 
 
 @AnnotationTaskRegistry.register
-class DirectAssessmentContextTask(BaseMetadata):
+class DirectAssessmentContextTask(BaseAnnotationTask):
     """
     Models a direct assessment context evaluation task.
     """
@@ -134,33 +137,6 @@ class DirectAssessmentContextTask(BaseMetadata):
     def dataName(self):
         return str(self.batchData)
 
-    def marketName(self):
-        return str(self.items.first().metadata.market)
-
-    def marketSourceLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[0]]
-        return None
-
-    def marketSourceLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[0]
-        return None
-
-    def marketTargetLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[1]]
-        return None
-
-    def marketTargetLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[1]
-        return None
-
     def completed_items_for_user(self, user):
         results = DirectAssessmentContextResult.objects.filter(
             task=self, activated=False, completed=True, createdBy=user
@@ -168,46 +144,19 @@ class DirectAssessmentContextTask(BaseMetadata):
 
         return len(set(results))
 
-    def is_trusted_user(self, user):
-        from Campaign.models import TrustedUser
-
-        trusted_user = TrustedUser.objects.filter(user=user, campaign=self.campaign)
-        return trusted_user.exists()
-
     def next_item_for_user(self, user, return_completed_items=False):
         trusted_user = self.is_trusted_user(user)
 
-        next_item = None
-        completed_items = 0
-        for item in self.items.all().order_by('id'):
-            result = DirectAssessmentContextResult.objects.filter(
-                item=item, activated=False, completed=True, createdBy=user
-            )
-
-            if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
-                )
-                if not trusted_user or item.itemType == 'TGT':
-                    next_item = item
-                    break
-
-            completed_items += 1
+        next_item, completed_items = next_item_with_completed_count(
+            self, DirectAssessmentContextResult, user, trusted_user
+        )
 
         if not next_item:
             LOGGER.info('No next item found for task {0}'.format(self.id))
-            annotations = DirectAssessmentContextResult.objects.filter(
-                task=self, activated=False, completed=True
-            ).values_list('item_id', flat=True)
-            uniqueAnnotations = len(set(annotations))
-
-            required_user_results = 100
-            if trusted_user:
-                required_user_results = 70
-
-            _total_required = self.requiredAnnotations * required_user_results
+            uniqueAnnotations = TaskCompletion.unique_items(
+                self, DirectAssessmentContextResult
+            )
+            _total_required = TaskCompletion.required_items(self, trusted_user)
             LOGGER.info(
                 'Unique annotations={0}/{1}'.format(uniqueAnnotations, _total_required)
             )
@@ -236,54 +185,6 @@ class DirectAssessmentContextTask(BaseMetadata):
 
         return None
 
-    @classmethod
-    def get_next_free_task_for_language(cls, code, campaign=None, user=None):
-        active_tasks = cls.objects.filter(
-            activated=True,
-            completed=False,
-            items__metadata__market__targetLanguageCode=code,
-        )
-
-        if campaign:
-            active_tasks = active_tasks.filter(campaign=campaign)
-
-        for active_task in active_tasks.order_by('id'):
-            active_users = active_task.assignedTo.count()
-            if active_users < active_task.requiredAnnotations:
-                if user and not user in active_task.assignedTo.all():
-                    return active_task
-
-        return None
-
-        # It seems that assignedTo is converted to an integer count.
-        active_tasks = active_tasks.order_by('id').values_list(
-            'id', 'requiredAnnotations', 'assignedTo'
-        )
-
-        for active_task in active_tasks:
-            print(active_task)
-            active_users = active_task[2] or 0
-            if active_users < active_task[1]:
-                return cls.objects.get(pk=active_task[0])
-
-        return None
-
-        # TODO: this needs to be removed.
-        for active_task in active_tasks:
-            market = active_task.items.first().metadata.market
-            if not market.targetLanguageCode == code:
-                continue
-
-            active_users = active_task.assignedTo.count()
-            if active_users < active_task.requiredAnnotations:
-                return active_task
-
-        return None
-
-    @classmethod
-    def get_next_free_task_for_language_and_campaign(cls, code, campaign):
-        return cls.get_next_free_task_for_language(code, campaign)
-
     @classmethod
     def import_from_json(cls, campaign, batch_user, batch_data, max_count):
         """
@@ -380,11 +281,13 @@ class DirectAssessmentContextTask(BaseMetadata):
                 batchData=batch_data,
                 createdBy=batch_user,
             )
+            new_task.set_market(batch_meta.market)
             new_task.save()
 
             # for new_item in new_items:
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
+            new_task.set_item_counts(new_items)
             new_task.save()
 
             _msg = 'Success processing batch {0}, task {1}'.format(
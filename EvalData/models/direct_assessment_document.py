@@ -13,24 +13,36 @@ from zipfile import is_zipfile
 from zipfile import ZipFile
 
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.db import models
 from django.utils.text import format_lazy as f
 from django.utils.translation import gettext_lazy as _
 
+from Appraise.annotation_time import gap_total_time
 from Appraise.utils import _get_logger, _compute_user_total_annotation_time
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models.base_models import AnnotationTaskRegistry
+from EvalData.models.base_models import BaseAnnotationTask
 from EvalData.models.base_models import BaseAssessmentResult
 from EvalData.models.base_models import BaseMetadata
+from EvalData.models.base_models import bulk_submit_results
+from EvalData.models.base_models import first_result_for_each_item
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
+from EvalData.models.base_models import next_item_with_completed_count
 from EvalData.models.base_models import seconds_to_timedelta
 from EvalData.models.direct_assessment_context import TextPairWithContext
+from EvalData.models.task_completion import TaskCompletion
+from EvalData.models.task_documents import TaskDocument
+from EvalData.models.task_progress import TaskProgress
 
 LOGGER = _get_logger(name=__name__)
 
+# Progress summaries are rebuilt whenever the next document is loaded
+PROGRESS_SUMMARY_CACHE_TIMEOUT = 60 * 60
+
 
 @AnnotationTaskRegistry.register
-class DirectAssessmentDocumentTask(BaseMetadata):
+class DirectAssessmentDocumentTask(BaseAnnotationTask):
     """
     Models a direct assessment document evaluation task.
 
@@ -96,33 +108,6 @@ class DirectAssessmentDocumentTask(BaseMetadata):
     def dataName(self):
         return str(self.batchData)
 
-    def marketName(self):
-        return str(self.items.first().metadata.market)
-
-    def marketSourceLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[0]]
-        return None
-
-    def marketSourceLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[0]
-        return None
-
-    def marketTargetLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[1]]
-        return None
-
-    def marketTargetLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[1]
-        return None
-
     def completed_items_for_user(self, user):
         results = DirectAssessmentDocumentResult.objects.filter(
             task=self, activated=False, completed=True, createdBy=user
@@ -130,46 +115,19 @@ class DirectAssessmentDocumentTask(BaseMetadata):
 
         return len(set(results))
 
-    def is_trusted_user(self, user):
-        from Campaign.models import TrustedUser
-
-        trusted_user = TrustedUser.objects.filter(user=user, campaign=self.campaign)
-        return trusted_user.exists()
-
     def next_item_for_user(self, user, return_completed_items=False):
         trusted_user = self.is_trusted_user(user)
 
-        next_item = None
-        completed_items = 0
-        for item in self.items.all().order_by('id'):
-            result = DirectAssessmentDocumentResult.objects.filter(
-                item=item, activated=False, completed=True, createdBy=user
-            )
-
-            if not result.exists():
-                print(
-                    'Identified next item: {}/{} (itemID={}) for trusted={}'.format(
-                        item.id, item.itemType, item.itemID, trusted_user
-                    )
-                )
-                if not trusted_user or item.itemType == 'TGT':
-                    next_item = item
-                    break
-
-            completed_items += 1
+        next_item, completed_items = next_item_with_completed_count(
+            self, DirectAssessmentDocumentResult, user, trusted_user
+        )
 
         if not next_item:
             LOGGER.info('No next item found for task {0}'.format(self.id))
-            annotations = DirectAssessmentDocumentResult.objects.filter(
-                task=self, activated=False, completed=True
-            ).values_list('item_id', flat=True)
-            uniqueAnnotations = len(set(annotations))
-
-            required_user_results = 100
-            if trusted_user:
-                required_user_results = 70
-
-            _total_required = self.requiredAnnotations * required_user_results
+            uniqueAnnotations = TaskCompletion.unique_items(
+                self, DirectAssessmentDocumentResult
+            )
+            _total_required = TaskCompletion.required_items(self, trusted_user)
             LOGGER.info(
                 'Unique annotations={0}/{1}'.format(uniqueAnnotations, _total_required)
             )
@@ -202,20 +160,7 @@ class DirectAssessmentDocumentTask(BaseMetadata):
                 return (next_item, completed_items, 0, 0, [], [], 0)
 
         # Retrieve all items from the document which next_item belongs to
-        _items = self.items.filter(
-            documentID=next_item.documentID,
-        ).order_by('id')
-
-        block_items = []
-        current_block = False
-        for item in _items:
-            block_items.append(item)
-            if item.id == next_item.id:
-                current_block = True
-            if item.isCompleteDocument:
-                if current_block:
-                    break
-                block_items.clear()
+        block_items = TaskDocument.document_items(self, next_item)
 
         # Get results for completed items in this block
         block_results = self.get_results_for_each_item(block_items, user)
@@ -227,13 +172,10 @@ class DirectAssessmentDocumentTask(BaseMetadata):
         completed_items_in_block = len(
             [res for res in block_results if res is not None]
         )
-        completed_blocks = DirectAssessmentDocumentResult.objects.filter(
-            task=self,
-            item__isCompleteDocument=True,
-            completed=True,
-            createdBy=user,
-        ).count()
-        total_blocks = self.items.filter(isCompleteDocument=True).count()
+        completed_blocks = TaskProgress.completed_documents_for_user(
+            self, DirectAssessmentDocumentResult, user
+        )
+        total_blocks = TaskDocument.total_documents(self)
 
         print(
             f'Completed {completed_blocks}/{total_blocks} documents, {completed_items_in_block}/{len(block_items)} items in the current document, completed {completed_items} items in total'
@@ -249,10 +191,12 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             total_blocks,  # the total number of documents in the task
         )
 
-    def next_document_for_user_mqmesa(self, user):
+    def next_document_for_user_mqmesa(self, user, skip_item=None):
         """
         Returns the next item and all items from its document.
         Used for MQM/ESA views
+        If skip_item is given, its document is skipped, so that the
+        document following the current one can be prefetched.
         Specifically a tuple with:
             next_item,
             items_completed,
@@ -263,39 +207,31 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             doc_items_results,
         """
 
-        # get all items and try to find a matching result
-        # TODO: probably can be optimized better
+        all_items = self.items_with_results_for_user(user)
+        _document_key = self._document_key_mqmesa()
 
-        items_user = DirectAssessmentDocumentResult.objects.filter(
-            activated=False, completed=True, createdBy=user
-        )
-        all_items = [
-            (
-                item,
-                items_user.filter(item=item).last(),
+        summary, next_item = self._progress_summary_mqmesa(all_items, _document_key)
+        if skip_item is not None:
+            skip_document_key = _document_key(skip_item)
+            next_item = next(
+                (
+                    i
+                    for i, r in all_items
+                    if not r and _document_key(i) != skip_document_key
+                ),
+                None,
             )
-            for item in self.items.all().order_by('id')
-        ]
-        unfinished_items = [i for i, r in all_items if not r]
 
-        campaign_opts = str(self.campaign.campaignOptions).lower().split(";")
-        # for Contrastive ESA, just documentID identifies documents
-        if "contrastiveesa" in campaign_opts:
-            docs_total = len({i.documentID for i, r in all_items})
-            items_completed = len([i for i, r in all_items if r and r.completed])
-            docs_completed = docs_total - len(
-                {i.documentID for i, r in all_items if r is None or not r.completed}
-            )
-        # otherwise, documentID + targetID uniquely identifies documents
-        else:
-            docs_total = len({(i.documentID, i.targetID) for i, r in all_items})
-            items_completed = len([i for i, r in all_items if r and r.completed])
-            docs_completed = docs_total - len(
-                {(i.documentID, i.targetID) for i, r in all_items if r is None or not r.completed}
-            )
-        items_total = len(all_items)
+        cache.set(
+            self._progress_summary_key(user), summary, PROGRESS_SUMMARY_CACHE_TIMEOUT
+        )
+
+        items_completed = summary['items_completed']
+        items_total = summary['items_total']
+        docs_completed = summary['docs_completed']
+        docs_total = summary['docs_total']
 
-        if not unfinished_items:
+        if next_item is None:
             return (
                 None,
                 items_completed,
@@ -306,17 +242,9 @@ class DirectAssessmentDocumentTask(BaseMetadata):
                 docs_total,
             )
 
-        # things are ordered with batch order
-        next_item = unfinished_items[0]
-
-        if "contrastiveesa" in campaign_opts:
-            doc_items_all = [(i, r) for i, r in all_items if i.documentID == next_item.documentID ]
-        else:
-            doc_items_all = [
-                (i, r)
-                for i, r in all_items
-                # match document name and system
-                if i.documentID == next_item.documentID and i.targetID == next_item.targetID
+        next_document_key = _document_key(next_item)
+        doc_items_all = [
+            (i, r) for i, r in all_items if _document_key(i) == next_document_key
         ]
         doc_items = [i for i, r in doc_items_all]
         doc_items_results = [r for i, r in doc_items_all]
@@ -336,23 +264,185 @@ class DirectAssessmentDocumentTask(BaseMetadata):
             doc_items_results,  # all score results from the current document
         )
 
-    def get_results_for_each_item(self, block_items, user):
-        """Returns the latest result object for each item or none."""
-        # TODO: optimize, this possibly makes too many individual queries
-        block_results = []
-
-        for item in block_items:
-            result = (
-                DirectAssessmentDocumentResult.objects.filter(
-                    item__id=item.id,
-                    completed=True,
-                    createdBy=user,
-                    task=self,
-                )
-                .order_by('item__id', 'dateModified')
+    def _document_key_mqmesa(self):
+        """
+        Returns function mapping items to their document for MQM/ESA views.
+        """
+        campaign_opts = str(self.campaign.campaignOptions).lower().split(";")
+        # for Contrastive ESA, just documentID identifies documents
+        if "contrastiveesa" in campaign_opts:
+            return lambda item: item.documentID
+
+        # otherwise, documentID + targetID uniquely identifies documents
+        return lambda item: (item.documentID, item.targetID)
+
+    def _progress_summary_key(self, user):
+        return 'mqmesa-progress:{0}:{1}'.format(self.id, user.id)
+
+    @staticmethod
+    def _progress_summary_mqmesa(all_items, document_key):
+        """
+        Returns (summary, next_item) for the given items and results.
+
+        The summary contains item and document counters and the number of
+        unfinished items for each unfinished document. All values are
+        collected in a single pass over all items.
+        """
+        next_item = None
+        items_completed = 0
+        documents = set()
+        unfinished_items = defaultdict(int)
+        for item, result in all_items:
+            _key = document_key(item)
+            documents.add(_key)
+            if result and result.completed:
+                items_completed += 1
+            else:
+                unfinished_items[_key] += 1
+            # things are ordered with batch order
+            if next_item is None and not result:
+                next_item = item
+
+        summary = {
+            'items_completed': items_completed,
+            'items_total': len(all_items),
+            'docs_completed': len(documents) - len(unfinished_items),
+            'docs_total': len(documents),
+            'unfinished_items': dict(unfinished_items),
+        }
+        return (summary, next_item)
+
+    def progress_delta_mqmesa(self, user, item):
+        """
+        Returns updated progress counters after a result for item was created.
+
+        The new result is applied to the cached progress summary if the
+        summary is still current, i.e., if it counts one completed item less
+        than the result table. Summaries are cached per process, so results
+        may have been saved elsewhere; otherwise, the whole task state is
+        recomputed. The next item is only looked up if the document of the
+        item has been completed, in which case item_id and task_id identify it.
+        """
+        _document_key = self._document_key_mqmesa()
+        summary_key = self._progress_summary_key(user)
+        document_key = _document_key(item)
+
+        summary = cache.get(summary_key)
+        if summary is not None and (
+            document_key not in summary['unfinished_items']
+            or summary['items_completed'] + 1 != self._completed_items_count(user)
+        ):
+            summary = None
+
+        if summary is None:
+            all_items = self.items_with_results_for_user(user)
+            summary, _ = self._progress_summary_mqmesa(all_items, _document_key)
+
+        else:
+            unfinished_items = summary['unfinished_items']
+            summary['items_completed'] += 1
+            unfinished_items[document_key] -= 1
+            if unfinished_items[document_key] <= 0:
+                del unfinished_items[document_key]
+                summary['docs_completed'] += 1
+
+        cache.set(summary_key, summary, PROGRESS_SUMMARY_CACHE_TIMEOUT)
+
+        delta = {
+            'items_completed': summary['items_completed'],
+            'items_total': summary['items_total'],
+            'docs_completed': summary['docs_completed'],
+            'docs_total': summary['docs_total'],
+            'document_completed': False,
+            'item_id': None,
+            'task_id': None,
+        }
+        if document_key not in summary['unfinished_items']:
+            annotated_results = DirectAssessmentDocumentResult.objects.filter(
+                item=models.OuterRef('pk'),
+                activated=False,
+                completed=True,
+                createdBy=user,
+            )
+            next_item = (
+                self.items.filter(~models.Exists(annotated_results))
+                .order_by('id')
                 .first()
             )
-            block_results.append(result)
+            delta['document_completed'] = True
+            if next_item is not None:
+                delta['item_id'] = next_item.itemID
+                delta['task_id'] = next_item.id
+
+        return delta
+
+    def _completed_items_count(self, user):
+        """
+        Returns number of task items with a completed result of the user.
+        """
+        return (
+            DirectAssessmentDocumentResult.objects.filter(
+                item__in=self.items.values('id'),
+                activated=False,
+                completed=True,
+                createdBy=user,
+            )
+            .values('item_id')
+            .distinct()
+            .count()
+        )
+
+    def items_with_results_for_user(self, user):
+        """
+        Returns all task items with the latest result of the user, or None.
+
+        Items are ordered by id. This uses one query for the items and one
+        for the results of the user, instead of one query per item.
+        """
+        items = list(self.items.all().order_by('id'))
+        items_by_id = {item.id: item for item in items}
+
+        latest_results = {}
+        for result in DirectAssessmentDocumentResult.objects.filter(
+            item__in=self.items.values('id'),
+            activated=False,
+            completed=True,
+            createdBy=user,
+        ).order_by('id'):
+            # Later results replace earlier ones for the same item
+            result.item = items_by_id[result.item_id]
+            latest_results[result.item_id] = result
+
+        return [(item, latest_results.get(item.id)) for item in items]
+
+    def submit_results(self, user, submissions):
+        """
+        Stores results for multiple items of this task submitted at once.
+
+        See bulk_submit_results() for the format of submissions and the
+        returned per-item status.
+        """
+        statuses = bulk_submit_results(
+            self,
+            DirectAssessmentDocumentResult,
+            user,
+            submissions,
+            {
+                'score': (int, True),
+                # MQM annotations may be sent as JSON string or decoded
+                'mqm': (lambda x: x if isinstance(x, str) else json.dumps(x), False),
+            },
+        )
+
+        # The cached MQM/ESA progress summary does not include new results
+        cache.delete(self._progress_summary_key(user))
+        return statuses
+
+    def get_results_for_each_item(self, block_items, user):
+        """Returns the latest result object for each item or none."""
+        block_results = first_result_for_each_item(
+            self, DirectAssessmentDocumentResult, block_items, user
+        )
 
         # Sanity checks for items and results
         if len(block_items) != len(block_results):
@@ -374,29 +464,6 @@ class DirectAssessmentDocumentTask(BaseMetadata):
 
         return None
 
-    @classmethod
-    def get_next_free_task_for_language(cls, code, campaign=None, user=None):
-        active_tasks = cls.objects.filter(
-            activated=True,
-            completed=False,
-            items__metadata__market__targetLanguageCode=code,
-        )
-
-        if campaign:
-            active_tasks = active_tasks.filter(campaign=campaign)
-
-        for active_task in active_tasks.order_by('id'):
-            active_users = active_task.assignedTo.count()
-            if active_users < active_task.requiredAnnotations:
-                if user and not user in active_task.assignedTo.all():
-                    return active_task
-
-        return None
-
-    @classmethod
-    def get_next_free_task_for_language_and_campaign(cls, code, campaign):
-        return cls.get_next_free_task_for_language(code, campaign)
-
     @classmethod
     def import_from_json(cls, campaign, batch_user, batch_data, max_count):
         """
@@ -494,12 +561,15 @@ class DirectAssessmentDocumentTask(BaseMetadata):
                 batchData=batch_data,
                 createdBy=batch_user,
             )
+            new_task.set_market(batch_meta.market)
             new_task.save()
 
             # for new_item in new_items:
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
+            new_task.set_item_counts(new_items)
             new_task.save()
+            TaskDocument.build(new_task)
 
             _msg = 'Success processing batch {0}, task {1}'.format(
                 str(batch_data), batch_task['task']['batchNo']
@@ -624,8 +694,9 @@ class DirectAssessmentDocumentResult(BaseAssessmentResult):
 
         if is_esa_or_mqm:
             # consider time that's in any action within 10 minutes
-            times = sorted([item.start_time for item in results] + [item.end_time for item in results])
-            annotation_time = sum([b-a for a, b in zip(times, times[1:]) if (b-a) < 10*60])
+            annotation_time = gap_total_time(
+                [item.start_time for item in results], [item.end_time for item in results]
+            )
             return seconds_to_timedelta(annotation_time)
         else:
             timestamps = []
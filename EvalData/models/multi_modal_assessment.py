@@ -19,12 +19,15 @@ from django.utils.translation import gettext_lazy as _
 from Appraise.utils import _get_logger, _compute_user_total_annotation_time
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models.base_models import AnnotationTaskRegistry
+from EvalData.models.base_models import BaseAnnotationTask
 from EvalData.models.base_models import BaseMetadata
 from EvalData.models.base_models import EvalItem
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
+from EvalData.models.base_models import next_item_with_completed_count
 from EvalData.models.base_models import MAX_SEGMENTID_LENGTH
 from EvalData.models.base_models import MAX_SEGMENTTEXT_LENGTH
 from EvalData.models.base_models import seconds_to_timedelta
+from EvalData.models.task_completion import TaskCompletion
 
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
@@ -88,7 +91,7 @@ class TextPairWithImage(EvalItem):
 
 
 @AnnotationTaskRegistry.register
-class MultiModalAssessmentTask(BaseMetadata):
+class MultiModalAssessmentTask(BaseAnnotationTask):
     """
     Models a multimodal assessment evaluation task.
     """
@@ -147,33 +150,6 @@ class MultiModalAssessmentTask(BaseMetadata):
     def dataName(self):
         return str(self.batchData)
 
-    def marketName(self):
-        return str(self.items.first().metadata.market)
-
-    def marketSourceLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[0]]
-        return None
-
-    def marketSourceLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[0]
-        return None
-
-    def marketTargetLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[1]]
-        return None
-
-    def marketTargetLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[1]
-        return None
-
     def completed_items_for_user(self, user):
         results = MultiModalAssessmentResult.objects.filter(
             task=self, activated=False, completed=True, createdBy=user
@@ -181,46 +157,19 @@ class MultiModalAssessmentTask(BaseMetadata):
 
         return len(set(results))
 
-    def is_trusted_user(self, user):
-        from Campaign.models import TrustedUser
-
-        trusted_user = TrustedUser.objects.filter(user=user, campaign=self.campaign)
-        return trusted_user.exists()
-
     def next_item_for_user(self, user, return_completed_items=False):
         trusted_user = self.is_trusted_user(user)
 
-        next_item = None
-        completed_items = 0
-        for item in self.items.all().order_by('id'):
-            result = MultiModalAssessmentResult.objects.filter(
-                item=item, activated=False, completed=True, createdBy=user
-            )
-
-            if not result.exists():
-                print(
-                    'identified next item: {0}/{1} for trusted={2}'.format(
-                        item.id, item.itemType, trusted_user
-                    )
-                )
-                if not trusted_user or item.itemType == 'TGT':
-                    next_item = item
-                    break
-
-            completed_items += 1
+        next_item, completed_items = next_item_with_completed_count(
+            self, MultiModalAssessmentResult, user, trusted_user
+        )
 
         if not next_item:
             LOGGER.info('No next item found for task {0}'.format(self.id))
-            annotations = MultiModalAssessmentResult.objects.filter(
-                task=self, activated=False, completed=True
-            ).values_list('item_id', flat=True)
-            uniqueAnnotations = len(set(annotations))
-
-            required_user_results = 100
-            if trusted_user:
-                required_user_results = 70
-
-            _total_required = self.requiredAnnotations * required_user_results
+            uniqueAnnotations = TaskCompletion.unique_items(
+                self, MultiModalAssessmentResult
+            )
+            _total_required = TaskCompletion.required_items(self, trusted_user)
             LOGGER.info(
                 'Unique annotations={0}/{1}'.format(uniqueAnnotations, _total_required)
             )
@@ -249,30 +198,6 @@ class MultiModalAssessmentTask(BaseMetadata):
 
         return None
 
-    @classmethod
-    def get_next_free_task_for_language(cls, code, campaign=None, user=None):
-        active_tasks = cls.objects.filter(
-            activated=True,
-            completed=False,
-            items__metadata__market__targetLanguageCode=code,
-        )
-
-        if campaign:
-            active_tasks = active_tasks.filter(campaign=campaign)
-
-        for active_task in active_tasks.order_by('id'):
-            active_users = active_task.assignedTo.count()
-            print(active_users, active_task.requiredAnnotations)
-            if active_users < active_task.requiredAnnotations:
-                if user and not user in active_task.assignedTo.all():
-                    return active_task
-
-        return None
-
-    @classmethod
-    def get_next_free_task_for_language_and_campaign(cls, code, campaign):
-        return cls.get_next_free_task_for_language(code, campaign)
-
     @classmethod
     def import_from_json(cls, campaign, batch_user, batch_data, max_count):
         """
@@ -361,11 +286,13 @@ class MultiModalAssessmentTask(BaseMetadata):
                 batchData=batch_data,
                 createdBy=batch_user,
             )
+            new_task.set_market(batch_meta.market)
             new_task.save()
 
             # for new_item in new_items:
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
+            new_task.set_item_counts(new_items)
             new_task.save()
 
             _msg = 'Success processing batch {0}, task {1}'.format(
@@ -19,10 +19,17 @@ from django.utils.translation import gettext_lazy as _
 from Appraise.utils import _get_logger, _compute_user_total_annotation_time
 from Dashboard.models import LANGUAGE_CODES_AND_NAMES
 from EvalData.models.base_models import AnnotationTaskRegistry
+from EvalData.models.base_models import BaseAnnotationTask
 from EvalData.models.base_models import BaseMetadata
+from EvalData.models.base_models import bulk_submit_results
+from EvalData.models.base_models import first_result_for_each_item
 from EvalData.models.base_models import MAX_REQUIREDANNOTATIONS_VALUE
+from EvalData.models.base_models import next_item_with_completed_count
 from EvalData.models.base_models import seconds_to_timedelta
 from EvalData.models.base_models import TextSegmentWithTwoTargets
+from EvalData.models.task_completion import TaskCompletion
+from EvalData.models.task_documents import TaskDocument
+from EvalData.models.task_progress import TaskProgress
 
 # TODO: Unclear if these are needed?
 # from Appraise.settings import STATIC_URL, BASE_CONTEXT
@@ -59,7 +66,7 @@ class TextSegmentWithTwoTargetsWithContext(TextSegmentWithTwoTargets):
 
 
 @AnnotationTaskRegistry.register
-class PairwiseAssessmentDocumentTask(BaseMetadata):
+class PairwiseAssessmentDocumentTask(BaseAnnotationTask):
     """
     Models a pairwise assessment document evaluation task.
 
@@ -125,33 +132,6 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
     def dataName(self):
         return str(self.batchData)
 
-    def marketName(self):
-        return str(self.items.first().metadata.market)
-
-    def marketSourceLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[0]]
-        return None
-
-    def marketSourceLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[0] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[0]
-        return None
-
-    def marketTargetLanguage(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return LANGUAGE_CODES_AND_NAMES[tokens[1]]
-        return None
-
-    def marketTargetLanguageCode(self):
-        tokens = str(self.items.first().metadata.market).split('_')
-        if len(tokens) == 3 and tokens[1] in LANGUAGE_CODES_AND_NAMES.keys():
-            return tokens[1]
-        return None
-
     def completed_items_for_user(self, user):
         results = PairwiseAssessmentDocumentResult.objects.filter(
             task=self, activated=False, completed=True, createdBy=user
@@ -159,46 +139,19 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
 
         return len(set(results))
 
-    def is_trusted_user(self, user):
-        from Campaign.models import TrustedUser
-
-        trusted_user = TrustedUser.objects.filter(user=user, campaign=self.campaign)
-        return trusted_user.exists()
-
     def next_item_for_user(self, user, return_completed_items=False):
         trusted_user = self.is_trusted_user(user)
 
-        next_item = None
-        completed_items = 0
-        for item in self.items.all().order_by('id'):
-            result = PairwiseAssessmentDocumentResult.objects.filter(
-                item=item, activated=False, completed=True, createdBy=user
-            )
-
-            if not result.exists():
-                print(
-                    'Identified next item: {}/{} (itemID={}) for trusted={}'.format(
-                        item.id, item.itemType, item.itemID, trusted_user
-                    )
-                )
-                if not trusted_user or item.itemType == 'TGT':
-                    next_item = item
-                    break
-
-            completed_items += 1
+        next_item, completed_items = next_item_with_completed_count(
+            self, PairwiseAssessmentDocumentResult, user, trusted_user
+        )
 
         if not next_item:
             LOGGER.info('No next item found for task {0}'.format(self.id))
-            annotations = PairwiseAssessmentDocumentResult.objects.filter(
-                task=self, activated=False, completed=True
-            ).values_list('item_id', flat=True)
-            uniqueAnnotations = len(set(annotations))
-
-            required_user_results = 100
-            if trusted_user:
-                required_user_results = 70
-
-            _total_required = self.requiredAnnotations * required_user_results
+            uniqueAnnotations = TaskCompletion.unique_items(
+                self, PairwiseAssessmentDocumentResult
+            )
+            _total_required = TaskCompletion.required_items(self, trusted_user)
             LOGGER.info(
                 'Unique annotations={0}/{1}'.format(uniqueAnnotations, _total_required)
             )
@@ -230,20 +183,7 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
             return (next_item, completed_items, 0, 0, [], [], 0)
 
         # Retrieve all items from the document which next_item belongs to
-        _items = self.items.filter(
-            documentID=next_item.documentID,
-        ).order_by('id')
-
-        block_items = []
-        current_block = False
-        for item in _items:
-            block_items.append(item)
-            if item.id == next_item.id:
-                current_block = True
-            if item.isCompleteDocument:
-                if current_block:
-                    break
-                block_items.clear()
+        block_items = TaskDocument.document_items(self, next_item)
 
         # Get results for completed items in this block
         block_results = self.get_results_for_each_item(block_items, user)
@@ -255,13 +195,10 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
         completed_items_in_block = len(
             [res for res in block_results if res is not None]
         )
-        completed_blocks = PairwiseAssessmentDocumentResult.objects.filter(
-            task=self,
-            item__isCompleteDocument=True,
-            completed=True,
-            createdBy=user,
-        ).count()
-        total_blocks = self.items.filter(isCompleteDocument=True).count()
+        completed_blocks = TaskProgress.completed_documents_for_user(
+            self, PairwiseAssessmentDocumentResult, user
+        )
+        total_blocks = TaskDocument.total_documents(self)
 
         print(
             'Completed {}/{} documents, {}/{} items in the current document, completed {} items in total'.format(
@@ -283,23 +220,30 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
             total_blocks,  # the total number of documents in the task
         )
 
+    def submit_results(self, user, submissions):
+        """
+        Stores results for multiple items of this task submitted at once.
+
+        See bulk_submit_results() for the format of submissions and the
+        returned per-item status.
+        """
+        return bulk_submit_results(
+            self,
+            PairwiseAssessmentDocumentResult,
+            user,
+            submissions,
+            {
+                'score1': (int, True),
+                'score2': (int, False),
+                'browser_info': (str, False),
+            },
+        )
+
     def get_results_for_each_item(self, block_items, user):
         """Returns the latest result object for each item or none."""
-        # TODO: optimize, this possibly makes too many individual queries
-        block_results = []
-
-        for item in block_items:
-            result = (
-                PairwiseAssessmentDocumentResult.objects.filter(
-                    item__id=item.id,
-                    completed=True,
-                    createdBy=user,  # TODO: is passing user as an argument needed?
-                    task=self,
-                )
-                .order_by('item__id', 'dateModified')
-                .first()
-            )
-            block_results.append(result)
+        block_results = first_result_for_each_item(
+            self, PairwiseAssessmentDocumentResult, block_items, user
+        )
 
         # Sanity checks for items and results
         if len(block_items) != len(block_results):
@@ -322,54 +266,6 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
 
         return None
 
-    @classmethod
-    def get_next_free_task_for_language(cls, code, campaign=None, user=None):
-        active_tasks = cls.objects.filter(
-            activated=True,
-            completed=False,
-            items__metadata__market__targetLanguageCode=code,
-        )
-
-        if campaign:
-            active_tasks = active_tasks.filter(campaign=campaign)
-
-        for active_task in active_tasks.order_by('id'):
-            active_users = active_task.assignedTo.count()
-            if active_users < active_task.requiredAnnotations:
-                if user and not user in active_task.assignedTo.all():
-                    return active_task
-
-        return None
-
-        # It seems that assignedTo is converted to an integer count.
-        active_tasks = active_tasks.order_by('id').values_list(
-            'id', 'requiredAnnotations', 'assignedTo'
-        )
-
-        for active_task in active_tasks:
-            print(active_task)
-            active_users = active_task[2] or 0
-            if active_users < active_task[1]:
-                return cls.objects.get(pk=active_task[0])
-
-        return None
-
-        # TODO: this needs to be removed.
-        for active_task in active_tasks:
-            market = active_task.items.first().metadata.market
-            if not market.targetLanguageCode == code:
-                continue
-
-            active_users = active_task.assignedTo.count()
-            if active_users < active_task.requiredAnnotations:
-                return active_task
-
-        return None
-
-    @classmethod
-    def get_next_free_task_for_language_and_campaign(cls, code, campaign):
-        return cls.get_next_free_task_for_language(code, campaign)
-
     @classmethod
     def import_from_json(cls, campaign, batch_user, batch_data, max_count):
         """
@@ -488,12 +384,15 @@ class PairwiseAssessmentDocumentTask(BaseMetadata):
                 batchData=batch_data,
                 createdBy=batch_user,
             )
+            new_task.set_market(batch_meta.market)
             new_task.save()
 
             # for new_item in new_items:
             #    new_task.items.add(new_item)
             new_task.items.add(*new_items)
+            new_task.set_item_counts(new_items)
             new_task.save()
+            TaskDocument.build(new_task)
 
             _msg = 'Success processing batch {0}, task {1}'.format(
                 str(batch_data), batch_task['task']['batchNo']
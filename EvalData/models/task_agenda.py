@@ -12,9 +12,11 @@ from re import compile as re_compile
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.functions import Cast
 from django.utils.translation import gettext_lazy as _
 
 from deprecated import add_deprecated_method
+from EvalData.models.base_models import AnnotationTaskRegistry
 from EvalData.models.base_models import ObjectID
 from EvalData.models.data_assessment import DataAssessmentResult
 from EvalData.models.direct_assessment import DirectAssessmentResult
@@ -67,13 +69,72 @@ class TaskAgenda(models.Model):
         return self._open_tasks.count() == 0
 
     def open_tasks(self):
-        return (x.get_object_instance() for x in self._open_tasks.all())
+        return [x for _, x in self.resolved_open_tasks() if x is not None]
 
     def serialized_open_tasks(self):
         return list(self._open_tasks.all())
 
+    def resolved_open_tasks(self):
+        """
+        Returns list of (serialized task, task instance) pairs for open tasks.
+
+        Task instances are resolved with one query per task type; the task
+        instance is None if the serialized task cannot be resolved.
+        """
+        return self._resolve_tasks(self._open_tasks.all())
+
     def completed_tasks(self):
-        return (x.get_object_instance() for x in self._completed_tasks.all())
+        return [x for _, x in self.resolved_completed_tasks() if x is not None]
+
+    def resolved_completed_tasks(self):
+        """
+        Returns list of (serialized task, task instance) pairs for completed tasks.
+        """
+        return self._resolve_tasks(self._completed_tasks.all())
+
+    @classmethod
+    def total_items(cls, agenda_ids, completed=False):
+        """
+        Returns dict mapping agenda id to total items of its open tasks.
+
+        Totals of completed tasks are returned if completed is True. Each
+        total is computed with one aggregate query over the agenda tasks
+        and stored task item counts; agendas without any existing task are
+        left out.
+        """
+        through_cls = cls._open_tasks.through
+        if completed:
+            through_cls = cls._completed_tasks.through
+
+        task_id = Cast(models.OuterRef('objectid__primaryID'), models.BigIntegerField())
+        item_count = models.Case(
+            *(
+                models.When(
+                    objectid__typeName=type_name,
+                    then=AnnotationTaskRegistry.get_class(
+                        type_name
+                    ).item_count_subquery(task_id),
+                )
+                for type_name in sorted(AnnotationTaskRegistry.get_types())
+            ),
+            output_field=models.IntegerField(),
+        )
+
+        totals = (
+            through_cls.objects.filter(taskagenda_id__in=agenda_ids)
+            .annotate(_items=item_count)
+            .values('taskagenda_id')
+            .annotate(_total=models.Sum('_items'), _tasks=models.Count('_items'))
+            .filter(_tasks__gt=0)
+            .values_list('taskagenda_id', '_total')
+        )
+        return dict(totals)
+
+    @staticmethod
+    def _resolve_tasks(serialized_tasks):
+        serialized_tasks = list(serialized_tasks)
+        instances = ObjectID.get_object_instances(serialized_tasks)
+        return [(x, instances[x.id]) for x in serialized_tasks]
 
     def activate_task(self, task):
         return self.activate_completed_task(task, only_completed=False)
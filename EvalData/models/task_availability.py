@@ -0,0 +1,223 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.utils.translation import gettext_lazy as _
+
+from EvalData.models.base_models import MAX_LANGUAGECODE_LENGTH
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+
+
+class TaskAvailability(models.Model):
+    """
+    Models free task capacity per campaign, task type and target language.
+
+    Stores the number of tasks, the number of active tasks with fewer
+    assigned users than required annotations, and the number of missing
+    assignments on those tasks. Rows are refreshed when tasks are saved,
+    deleted or (un)assigned, so that the dashboard can determine all
+    available languages with a single query.
+    """
+
+    campaign = models.ForeignKey(
+        'Campaign.Campaign',
+        on_delete=models.CASCADE,
+        related_name='%(app_label)s_%(class)s_campaign',
+        related_query_name="%(app_label)s_%(class)ss",
+        verbose_name=_('Campaign'),
+    )
+
+    taskType = models.CharField(
+        db_index=True,
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Task type'),
+    )
+
+    targetLanguageCode = models.CharField(
+        blank=True,
+        max_length=MAX_LANGUAGECODE_LENGTH,
+        verbose_name=_('Target language'),
+        help_text=_('(empty for tasks without market)'),
+    )
+
+    tasks = models.PositiveIntegerField(default=0, verbose_name=_('Tasks'))
+
+    freeTasks = models.PositiveIntegerField(default=0, verbose_name=_('Free tasks'))
+
+    freeAssignments = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Free assignments'),
+        help_text=_('(missing assigned users over all free tasks)'),
+    )
+
+    dateModified = models.DateTimeField(auto_now=True, verbose_name=_('Date modified'))
+
+    class Meta:
+        ordering = ['campaign', 'taskType', 'targetLanguageCode']
+        unique_together = ('campaign', 'taskType', 'targetLanguageCode')
+        verbose_name = _('Task availability')
+        verbose_name_plural = _('Task availability')
+
+    def __str__(self):
+        return '{0}.{1}[{2}]: {3}'.format(
+            self.campaign_id, self.taskType, self.targetLanguageCode, self.freeTasks
+        )
+
+    @staticmethod
+    def _task_language_code(task):
+        if task.targetLanguageCode:
+            return task.targetLanguageCode
+
+        # Tasks without stored market fall back to the market of their items
+        code = task.items.values_list(
+            'metadata__market__targetLanguageCode', flat=True
+        ).first()
+        return code or ''
+
+    @classmethod
+    def refresh(cls, task_cls, campaign_id, code):
+        """
+        Recomputes availability for the given task type, campaign and code.
+        """
+        if not code:
+            # Tasks without stored market and items cannot be resolved
+            tasks = task_cls.objects.filter(
+                campaign=campaign_id, targetLanguageCode='', items__isnull=True
+            )
+            counts = {'tasks': tasks.count(), 'free_tasks': 0, 'free_assignments': 0}
+
+        else:
+            counts = task_cls._tasks_for_language(code, campaign_id).aggregate(
+                tasks=models.Count('id')
+            )
+            counts.update(
+                task_cls._free_tasks_for_language(code, campaign_id).aggregate(
+                    free_tasks=models.Count('id'),
+                    free_assignments=Coalesce(
+                        models.Sum(
+                            models.F('requiredAnnotations')
+                            - models.F('_assigned_users')
+                        ),
+                        0,
+                    ),
+                )
+            )
+
+        _filter = {
+            'campaign_id': campaign_id,
+            'taskType': task_cls.__name__,
+            'targetLanguageCode': code,
+        }
+        if not counts['tasks']:
+            cls.objects.filter(**_filter).delete()
+            return None
+
+        availability, _ = cls.objects.update_or_create(
+            **_filter,
+            defaults={
+                'tasks': counts['tasks'],
+                'freeTasks': counts['free_tasks'],
+                'freeAssignments': counts['free_assignments'],
+            },
+        )
+        return availability
+
+    @classmethod
+    def refresh_tasks(cls, tasks):
+        """
+        Recomputes availability for all rows the given tasks belong to.
+        """
+        refreshed = set()
+        for task in tasks:
+            if task.campaign_id is None:
+                continue
+
+            key = (task.__class__, task.campaign_id, cls._task_language_code(task))
+            if key not in refreshed:
+                cls.refresh(*key)
+                refreshed.add(key)
+
+    @classmethod
+    def rebuild(cls, task_cls, campaign=None):
+        """
+        Rebuilds availability for the given task type from its tasks.
+
+        Returns the number of stored rows.
+        """
+        tasks = task_cls.objects.filter(campaign__isnull=False)
+        if campaign:
+            tasks = tasks.filter(campaign=campaign)
+
+        keys = set(
+            tasks.exclude(targetLanguageCode='')
+            .values_list('campaign_id', 'targetLanguageCode')
+            .distinct()
+        )
+
+        # Tasks without stored market need their items to resolve the code
+        for task in tasks.filter(targetLanguageCode=''):
+            keys.add((task.campaign_id, cls._task_language_code(task)))
+
+        rows = cls.objects.filter(taskType=task_cls.__name__)
+        if campaign:
+            rows = rows.filter(campaign=campaign)
+        stale_ids = [
+            row_id
+            for row_id, campaign_id, code in rows.values_list(
+                'id', 'campaign_id', 'targetLanguageCode'
+            )
+            if (campaign_id, code) not in keys
+        ]
+        cls.objects.filter(id__in=stale_ids).delete()
+
+        rows = 0
+        for campaign_id, code in sorted(keys):
+            if cls.refresh(task_cls, campaign_id, code) is not None:
+                rows += 1
+
+        return rows
+
+
+def _refresh_for_task(sender, instance, **kwargs):
+    # pylint: disable=unused-argument
+    TaskAvailability.refresh_tasks((instance,))
+
+
+def _refresh_for_assignment(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Refreshes availability of tasks whose assigned users have changed.
+    """
+    # pylint: disable=unused-argument,too-many-arguments
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        TaskAvailability.refresh_tasks((instance,))
+        return
+
+    TaskAvailability.refresh_tasks(kwargs['model'].objects.filter(pk__in=pk_set or []))
+
+
+def connect_availability_signals(task_classes):
+    """
+    Connects availability refreshes to changes of the given tasks.
+    """
+    for task_cls in task_classes:
+        _uid = 'task-availability-{0}'.format(task_cls.__name__)
+        post_save.connect(_refresh_for_task, sender=task_cls, dispatch_uid=_uid)
+        post_delete.connect(
+            _refresh_for_task, sender=task_cls, dispatch_uid=_uid + '-delete'
+        )
+        m2m_changed.connect(
+            _refresh_for_assignment,
+            sender=task_cls.assignedTo.through,
+            dispatch_uid=_uid + '-assigned',
+        )
@@ -0,0 +1,200 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from datetime import datetime
+from datetime import timezone
+
+from django.db import models
+from django.db.models.signals import post_save
+from django.utils.translation import gettext_lazy as _
+
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+from EvalData.models.task_availability import TaskAvailability
+
+# Number of unique annotated items required per required annotation
+REQUIRED_USER_RESULTS = 100
+REQUIRED_TRUSTED_USER_RESULTS = 70
+
+
+class TaskCompletion(models.Model):
+    """
+    Models the number of unique annotated items of an annotation task.
+
+    The counter is incremented whenever a completed result is stored for
+    an item which did not have a completed result before, so that task
+    completion can be decided without scanning the result table. It is
+    initialised from the result table on first use for existing tasks.
+    """
+
+    taskType = models.CharField(
+        db_index=True,
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Task type'),
+    )
+
+    taskID = models.PositiveIntegerField(db_index=True, verbose_name=_('Task ID'))
+
+    uniqueItems = models.PositiveIntegerField(
+        default=0,
+        verbose_name=_('Unique annotated items'),
+        help_text=_('(items with at least one completed result)'),
+    )
+
+    dateModified = models.DateTimeField(auto_now=True, verbose_name=_('Date modified'))
+
+    class Meta:
+        unique_together = ('taskType', 'taskID')
+        verbose_name = _('Task completion')
+        verbose_name_plural = _('Task completion')
+
+    def __str__(self):
+        return '{0}.{1}: {2}'.format(self.taskType, self.taskID, self.uniqueItems)
+
+    @classmethod
+    def for_task(cls, task):
+        """
+        Returns queryset for the counter of the given task.
+        """
+        return cls.objects.filter(taskType=task.__class__.__name__, taskID=task.id)
+
+    @staticmethod
+    def count_unique_items(task, result_cls):
+        """
+        Counts unique annotated items of the given task from the result table.
+        """
+        return result_cls.objects.filter(
+            task=task, activated=False, completed=True
+        ).aggregate(_count=models.Count('item_id', distinct=True))['_count']
+
+    @staticmethod
+    def required_items(task, trusted_user=False):
+        """
+        Returns number of unique annotated items required to complete task.
+        """
+        required_user_results = REQUIRED_USER_RESULTS
+        if trusted_user:
+            required_user_results = REQUIRED_TRUSTED_USER_RESULTS
+
+        return task.requiredAnnotations * required_user_results
+
+    @classmethod
+    def rebuild(cls, task, result_cls):
+        """
+        Recomputes the counter for the given task from the result table.
+
+        Returns the number of unique annotated items.
+        """
+        unique_items = cls.count_unique_items(task, result_cls)
+        cls.objects.update_or_create(
+            taskType=task.__class__.__name__,
+            taskID=task.id,
+            defaults={'uniqueItems': unique_items},
+        )
+        return unique_items
+
+    @classmethod
+    def unique_items(cls, task, result_cls):
+        """
+        Returns number of unique annotated items of the given task.
+        """
+        unique_items = cls.for_task(task).values_list('uniqueItems', flat=True).first()
+        if unique_items is None:
+            unique_items = cls.rebuild(task, result_cls)
+
+        return unique_items
+
+    @classmethod
+    def add_items(cls, task, result_cls, item_ids, **exclude):
+        """
+        Updates the counter after completed results for item_ids were stored.
+
+        Items which have other completed results, i.e., results which do
+        not match the exclude filter, are not counted again.
+        """
+        item_ids = set(item_ids)
+        annotated_items = set(
+            result_cls.objects.filter(
+                task=task, item_id__in=item_ids, activated=False, completed=True
+            )
+            .exclude(**exclude)
+            .values_list('item_id', flat=True)
+        )
+        new_items = len(item_ids - annotated_items)
+        if not new_items:
+            return
+
+        updated = cls.for_task(task).update(
+            uniqueItems=models.F('uniqueItems') + new_items,
+            dateModified=datetime.now(timezone.utc),
+        )
+        if not updated:
+            cls.rebuild(task, result_cls)
+
+    @classmethod
+    def complete_tasks(cls, task_cls, trusted_user=False, dry_run=False):
+        """
+        Completes all active tasks with enough unique annotated items.
+
+        Returns the list of ids of completed tasks.
+        """
+        required_results = REQUIRED_USER_RESULTS
+        if trusted_user:
+            required_results = REQUIRED_TRUSTED_USER_RESULTS
+
+        counters = cls.objects.filter(
+            taskType=task_cls.__name__,
+            taskID=models.OuterRef('pk'),
+        )
+        task_ids = list(
+            task_cls.objects.filter(activated=True)
+            .annotate(_unique_items=models.Subquery(counters.values('uniqueItems')[:1]))
+            .filter(
+                _unique_items__gte=models.F('requiredAnnotations') * required_results
+            )
+            .values_list('id', flat=True)
+        )
+        if task_ids and not dry_run:
+            utc_now = datetime.now(timezone.utc)
+            task_cls.objects.filter(id__in=task_ids).update(
+                activated=False,
+                dateActivated=None,
+                completed=True,
+                dateCompleted=utc_now,
+                retired=False,
+                dateRetired=None,
+            )
+
+            # Bulk updates do not send signals, so refresh availability here
+            TaskAvailability.refresh_tasks(task_cls.objects.filter(id__in=task_ids))
+
+        return task_ids
+
+
+def _count_result(sender, instance, created, **kwargs):
+    """
+    Counts newly created completed results.
+    """
+    # pylint: disable=unused-argument
+    if not created or instance.activated or not instance.completed:
+        return
+
+    if instance.task_id is None or instance.item_id is None:
+        return
+
+    TaskCompletion.add_items(instance.task, sender, (instance.item_id,), pk=instance.pk)
+
+
+def connect_completion_signals(result_types):
+    """
+    Connects task completion counters to result creation.
+    """
+    for result_cls in result_types:
+        post_save.connect(
+            _count_result,
+            sender=result_cls,
+            dispatch_uid='task-completion-{0}'.format(result_cls.__name__),
+        )
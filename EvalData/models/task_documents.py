@@ -0,0 +1,209 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from django.db import models
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.utils.translation import gettext_lazy as _
+
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+from EvalData.models.direct_assessment_context import MAX_DOCUMENTID_LENGTH
+
+
+class TaskDocument(models.Model):
+    """
+    Models a document block of a document-level annotation task.
+
+    A document block consists of the items sharing the same document ID,
+    in id order, up to and including the next complete document item.
+    Blocks are identified by their first and last item ids, so that the
+    items of a document can be retrieved with an indexed range read.
+
+    The index is built when a task is imported, or lazily on first use
+    for existing tasks, and is dropped when the task items change.
+    """
+
+    taskType = models.CharField(
+        db_index=True,
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Task type'),
+    )
+
+    taskID = models.PositiveIntegerField(db_index=True, verbose_name=_('Task ID'))
+
+    position = models.PositiveIntegerField(
+        verbose_name=_('Position'), help_text=_('(0-based, in order of first item)')
+    )
+
+    documentID = models.CharField(
+        max_length=MAX_DOCUMENTID_LENGTH, verbose_name=_('Document ID')
+    )
+
+    firstItemID = models.PositiveIntegerField(verbose_name=_('First item ID'))
+
+    lastItemID = models.PositiveIntegerField(verbose_name=_('Last item ID'))
+
+    completeItemID = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name=_('Complete document item ID'),
+        help_text=_('(empty if the block has no complete document item)'),
+    )
+
+    class Meta:
+        indexes = [models.Index(fields=['taskType', 'taskID', 'documentID'])]
+        ordering = ['taskType', 'taskID', 'position']
+        unique_together = ('taskType', 'taskID', 'position')
+        verbose_name = _('Task document')
+        verbose_name_plural = _('Task documents')
+
+    def __str__(self):
+        return '{0}.{1}[{2}]: {3}'.format(
+            self.taskType, self.taskID, self.position, self.documentID
+        )
+
+    @classmethod
+    def for_task(cls, task):
+        """
+        Returns queryset for the document index of the given task.
+        """
+        return cls.objects.filter(taskType=task.__class__.__name__, taskID=task.id)
+
+    @classmethod
+    def build(cls, task):
+        """
+        Builds the document index for the given task from its items.
+
+        The task row is locked while the index is replaced, so that
+        concurrent lazy builds for the same task run one after another
+        instead of failing on the unique position constraint.
+
+        Returns the list of created TaskDocument instances.
+        """
+        blocks = []
+        open_blocks = {}
+        for item_id, document_id, is_complete in task.items.order_by('id').values_list(
+            'id', 'documentID', 'isCompleteDocument'
+        ):
+            block = open_blocks.setdefault(document_id, [item_id, item_id])
+            block[1] = item_id
+            if is_complete:
+                blocks.append((document_id, block[0], item_id, item_id))
+                del open_blocks[document_id]
+
+        # Trailing items without a complete document item form a block, too
+        for document_id, (first_item_id, last_item_id) in open_blocks.items():
+            blocks.append((document_id, first_item_id, last_item_id, None))
+
+        documents = [
+            cls(
+                taskType=task.__class__.__name__,
+                taskID=task.id,
+                position=position,
+                documentID=document_id,
+                firstItemID=first_item_id,
+                lastItemID=last_item_id,
+                completeItemID=complete_item_id,
+            )
+            for position, (
+                document_id,
+                first_item_id,
+                last_item_id,
+                complete_item_id,
+            ) in enumerate(sorted(blocks, key=lambda block: block[1]))
+        ]
+
+        with transaction.atomic():
+            # Concurrent builds wait here until the first one has committed
+            list(
+                task.__class__.objects.select_for_update()
+                .filter(id=task.id)
+                .values_list('id')
+            )
+            cls.for_task(task).delete()
+            cls.objects.bulk_create(documents)
+
+        return documents
+
+    @classmethod
+    def document_for_item(cls, task, item):
+        """
+        Returns the TaskDocument which contains the given item, or None.
+
+        Builds the document index if it does not contain the item yet.
+        """
+        _filter = {
+            'documentID': item.documentID,
+            'firstItemID__lte': item.id,
+            'lastItemID__gte': item.id,
+        }
+        document = cls.for_task(task).filter(**_filter).first()
+        if document is None:
+            cls.build(task)
+            document = cls.for_task(task).filter(**_filter).first()
+
+        return document
+
+    @classmethod
+    def document_items(cls, task, item):
+        """
+        Returns all items from the document block containing the given item.
+        """
+        document = cls.document_for_item(task, item)
+        if document is None:
+            return []
+
+        return list(
+            task.items.filter(
+                documentID=document.documentID,
+                id__gte=document.firstItemID,
+                id__lte=document.lastItemID,
+            ).order_by('id')
+        )
+
+    @classmethod
+    def total_documents(cls, task):
+        """
+        Returns the number of complete documents in the given task.
+        """
+        counts = cls.for_task(task).aggregate(
+            blocks=models.Count('id'), documents=models.Count('completeItemID')
+        )
+        if not counts['blocks']:
+            documents = cls.build(task)
+            return len([x for x in documents if x.completeItemID is not None])
+
+        return counts['documents']
+
+
+def _invalidate_task_documents(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drops the document index of tasks whose items have changed.
+    """
+    # pylint: disable=unused-argument,too-many-arguments
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        TaskDocument.for_task(instance).delete()
+        return
+
+    TaskDocument.objects.filter(
+        taskType=kwargs['model'].__name__, taskID__in=pk_set or []
+    ).delete()
+
+
+def connect_document_signals(task_classes):
+    """
+    Connects document index invalidation to item changes of the given tasks.
+    """
+    for task_cls in task_classes:
+        m2m_changed.connect(
+            _invalidate_task_documents,
+            sender=task_cls.items.through,
+            dispatch_uid='task-documents-{0}'.format(task_cls.__name__),
+        )
@@ -0,0 +1,225 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from django.contrib.auth.models import User
+from django.db import models
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+
+
+class TaskProgress(models.Model):
+    """
+    Models the progress cursor of a user on an annotation task.
+
+    Stores the number of completed items, the id of the next item to be
+    annotated and the number of completed documents, so that the next
+    item for a user can be resolved with a single primary key lookup.
+    The cursor is advanced when results are stored and rebuilt whenever it
+    no longer points to an item which still needs to be annotated.
+    """
+
+    user = models.ForeignKey(User, models.CASCADE, verbose_name=_('User'))
+
+    taskType = models.CharField(
+        db_index=True,
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Task type'),
+    )
+
+    taskID = models.PositiveIntegerField(db_index=True, verbose_name=_('Task ID'))
+
+    trustedUser = models.BooleanField(
+        default=False,
+        verbose_name=_('Trusted user?'),
+        help_text=_('(trust status the cursor was computed for)'),
+    )
+
+    completedItems = models.PositiveIntegerField(
+        default=0, verbose_name=_('Completed items')
+    )
+
+    nextItemID = models.PositiveIntegerField(
+        blank=True,
+        null=True,
+        verbose_name=_('Next item ID'),
+        help_text=_('(primary key of the next item, empty if done)'),
+    )
+
+    completedDocuments = models.PositiveIntegerField(
+        default=0, verbose_name=_('Completed documents')
+    )
+
+    dateModified = models.DateTimeField(auto_now=True, verbose_name=_('Date modified'))
+
+    class Meta:
+        unique_together = ('user', 'taskType', 'taskID')
+        verbose_name = _('Task progress')
+        verbose_name_plural = _('Task progress')
+
+    def __str__(self):
+        return '{0}.{1}[{2}]: {3}'.format(
+            self.taskType, self.taskID, self.user, self.completedItems
+        )
+
+    @classmethod
+    def for_task(cls, task, user):
+        """
+        Returns queryset for the cursor of the given task and user.
+        """
+        return cls.objects.filter(
+            user=user, taskType=task.__class__.__name__, taskID=task.id
+        )
+
+    @classmethod
+    def next_item_from_cursor(cls, task, result_cls, user, trusted_user):
+        """
+        Returns (next_item, completed_items) from the stored cursor.
+
+        Returns None if there is no cursor for the given trust status, if
+        the task has been finished or if the cursor is stale, i.e., the
+        item it points to has been annotated in the meantime.
+        """
+        cursor = cls.for_task(task, user).filter(trustedUser=trusted_user)
+        annotated_results = result_cls.objects.filter(
+            item=models.OuterRef('pk'),
+            activated=False,
+            completed=True,
+            createdBy=user,
+        )
+        next_item = (
+            task.items.filter(
+                id=models.Subquery(cursor.values('nextItemID')[:1]),
+            )
+            .filter(~models.Exists(annotated_results))
+            .annotate(
+                _completed_items=models.Subquery(cursor.values('completedItems')[:1])
+            )
+            .first()
+        )
+        if next_item is None:
+            return None
+
+        return (next_item, next_item._completed_items)
+
+    @classmethod
+    def store(cls, task, result_cls, user, trusted_user, next_item, completed_items):
+        """
+        Creates or updates the cursor for the given task and user.
+        """
+        completed_documents = 0
+        item_fields = {x.name for x in task.items.model._meta.get_fields()}
+        if 'isCompleteDocument' in item_fields:
+            completed_documents = result_cls.objects.filter(
+                task=task,
+                item__isCompleteDocument=True,
+                completed=True,
+                createdBy=user,
+            ).count()
+
+        cls.objects.update_or_create(
+            user=user,
+            taskType=task.__class__.__name__,
+            taskID=task.id,
+            defaults={
+                'trustedUser': trusted_user,
+                'completedItems': completed_items,
+                'nextItemID': next_item.id if next_item else None,
+                'completedDocuments': completed_documents,
+            },
+        )
+
+    @classmethod
+    def completed_documents_for_user(cls, task, result_cls, user):
+        """
+        Returns number of documents in task completed by user.
+        """
+        completed_documents = (
+            cls.for_task(task, user)
+            .values_list('completedDocuments', flat=True)
+            .first()
+        )
+        if completed_documents is not None:
+            return completed_documents
+
+        return result_cls.objects.filter(
+            task=task,
+            item__isCompleteDocument=True,
+            completed=True,
+            createdBy=user,
+        ).count()
+
+    @classmethod
+    def advance(cls, task, user, items):
+        """
+        Advances the cursor of user past the given newly annotated items.
+
+        Called inside the transaction which stores the results, instead of
+        resolving the next item again. Complete document items among items
+        add to the completed documents. A cursor pointing at one of the
+        items moves on to the next item of the task which still needs to be
+        annotated; other cursors are kept, as next_item_from_cursor()
+        detects when they become stale. Users without a cursor are skipped.
+        """
+        cursor = cls.for_task(task, user).select_for_update().first()
+        if cursor is None:
+            return
+
+        cursor.completedDocuments += len(
+            [x for x in items if getattr(x, 'isCompleteDocument', False)]
+        )
+
+        annotated_ids = {x.id for x in items}
+        if cursor.nextItemID in annotated_ids:
+            next_items = task.items.filter(id__gt=cursor.nextItemID).exclude(
+                id__in=annotated_ids
+            )
+            if cursor.trustedUser:
+                next_items = next_items.filter(task.trusted_item_filter())
+
+            next_item_id = (
+                next_items.order_by('id').values_list('id', flat=True).first()
+            )
+            if next_item_id is None:
+                cursor.completedItems = task.item_count()
+
+            # Trusted users skip items, which have to be counted then
+            elif cursor.trustedUser:
+                cursor.completedItems = task.items.filter(id__lt=next_item_id).count()
+
+            else:
+                cursor.completedItems += len(
+                    [x for x in annotated_ids if cursor.nextItemID <= x < next_item_id]
+                )
+
+            cursor.nextItemID = next_item_id
+
+        cursor.save()
+
+    @classmethod
+    def refresh(cls, task, user, verify_only=False):
+        """
+        Recomputes the cursor for the given task and user.
+
+        Returns a tuple (old, new) of cursor values; old is None if there
+        was no cursor before. If verify_only is set, all changes are
+        rolled back and the stored cursor is left untouched.
+        """
+        fields = ('completedItems', 'nextItemID', 'completedDocuments')
+        with transaction.atomic():
+            old_values = cls.for_task(task, user).values_list(*fields).first()
+            cls.for_task(task, user).delete()
+
+            # Recomputes the cursor from the result table and stores it
+            task.next_item_for_user(user)
+
+            new_values = cls.for_task(task, user).values_list(*fields).first()
+            if verify_only:
+                transaction.set_rollback(True)
+
+        return (old_values, new_values)
@@ -0,0 +1,357 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from collections import Counter
+from math import isclose
+
+from django.contrib.auth.models import User
+from django.db import models
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.utils.translation import gettext_lazy as _
+
+from Appraise.annotation_time import clamped_total_time
+from Appraise.annotation_time import gap_total_time
+from Appraise.annotation_time import INACTIVITY_CLAMPED_SECONDS
+from Appraise.annotation_time import INACTIVITY_SECONDS
+from Appraise.annotation_time import MAX_ACTION_GAP_SECONDS
+from EvalData.models.base_models import MAX_TYPENAME_LENGTH
+
+# Number of TGT results after which a HIT counts as completed
+HIT_COMPLETION_RESULTS = 70
+
+# Result types which measure time between any actions for ESA/MQM campaigns
+ACTION_TIME_RESULT_TYPES = ('DirectAssessmentDocumentResult',)
+
+
+def _is_action_time_campaign(campaign_options):
+    options = str(campaign_options or '').lower().split(';')
+    return 'esa' in options or 'mqm' in options
+
+
+def _clamp_time(seconds):
+    if seconds >= INACTIVITY_SECONDS:
+        return INACTIVITY_CLAMPED_SECONDS
+    return seconds
+
+
+class UserAnnotationStats(models.Model):
+    """
+    Models annotation statistics of a user for one result type.
+
+    Stores the number of unique completed items, total and completed HITs
+    and the total annotation time, as computed by the get_*_for_user()
+    class methods of the result type. The statistics are updated when
+    results are created; results arriving out of time order or deleted
+    results cause the row to be recomputed from the result table. Changed
+    results only mark the row as outdated, to be recomputed by the
+    ReconcileUserStats command.
+    """
+
+    user = models.ForeignKey(User, models.CASCADE, verbose_name=_('User'))
+
+    resultType = models.CharField(
+        db_index=True,
+        max_length=MAX_TYPENAME_LENGTH,
+        verbose_name=_('Result type'),
+    )
+
+    completedItems = models.PositiveIntegerField(
+        default=0, verbose_name=_('Completed items')
+    )
+
+    totalHits = models.PositiveIntegerField(default=0, verbose_name=_('Total HITs'))
+
+    completedHits = models.PositiveIntegerField(
+        default=0, verbose_name=_('Completed HITs')
+    )
+
+    annotationTime = models.FloatField(
+        default=0, verbose_name=_('Annotation time'), help_text=_('(in seconds)')
+    )
+
+    actionTime = models.BooleanField(
+        default=False,
+        verbose_name=_('Action time?'),
+        help_text=_('(time is measured between any actions, for ESA/MQM)'),
+    )
+
+    lastStartTime = models.FloatField(
+        blank=True, null=True, verbose_name=_('Last start time')
+    )
+
+    lastEndTime = models.FloatField(
+        blank=True, null=True, verbose_name=_('Last end time')
+    )
+
+    outdated = models.BooleanField(
+        default=False,
+        verbose_name=_('Outdated?'),
+        help_text=_('(results changed since the statistics were computed)'),
+    )
+
+    dateModified = models.DateTimeField(auto_now=True, verbose_name=_('Date modified'))
+
+    class Meta:
+        unique_together = ('user', 'resultType')
+        verbose_name = _('User annotation statistics')
+        verbose_name_plural = _('User annotation statistics')
+
+    def __str__(self):
+        return '{0}[{1}]: {2}'.format(self.resultType, self.user, self.completedItems)
+
+    @classmethod
+    def compute(cls, user, result_cls):
+        """
+        Computes statistics for the given user and result type.
+
+        Returns a dict of field values.
+        """
+        results = result_cls.objects.filter(
+            createdBy=user, activated=False, completed=True
+        )
+
+        hits = {}
+        item_ids = set()
+        timestamps = []
+        for item_id, task_id, item_type, start_time, end_time in results.order_by(
+            'id'
+        ).values_list('item_id', 'task_id', 'item__itemType', 'start_time', 'end_time'):
+            item_ids.add(item_id)
+            timestamps.append((start_time, end_time))
+            if item_type.lower() == 'tgt':
+                hits[task_id] = hits.get(task_id, 0) + 1
+
+        action_time = False
+        if result_cls.__name__ in ACTION_TIME_RESULT_TYPES:
+            action_time = any(
+                _is_action_time_campaign(x)
+                for x in results.values_list(
+                    'task__campaign__campaignOptions', flat=True
+                ).distinct()
+            )
+
+        starts = [x[0] for x in timestamps]
+        ends = [x[1] for x in timestamps]
+        last_start_time, last_end_time = None, None
+        if action_time:
+            annotation_time = gap_total_time(starts, ends)
+            if timestamps:
+                last_start_time = last_end_time = max(starts + ends)
+
+        else:
+            annotation_time = clamped_total_time(starts, ends)
+            if timestamps:
+                # Sorting is stable, so the last result with maximal start wins
+                ordered = sorted(timestamps, key=lambda x: x[0])
+                last_start_time, last_end_time = ordered[-1]
+
+        return {
+            'completedItems': len(item_ids),
+            'totalHits': len(hits),
+            'completedHits': len(
+                [x for x in hits.values() if x >= HIT_COMPLETION_RESULTS]
+            ),
+            'annotationTime': annotation_time,
+            'actionTime': action_time,
+            'lastStartTime': last_start_time,
+            'lastEndTime': last_end_time,
+        }
+
+    @classmethod
+    def reconcile(cls, user, result_cls):
+        """
+        Recomputes statistics for the given user and result type.
+
+        Returns a tuple (stats, changed).
+        """
+        values = cls.compute(user, result_cls)
+        values['outdated'] = False
+        stats, created = cls.objects.get_or_create(
+            user_id=getattr(user, 'id', user),
+            resultType=result_cls.__name__,
+            defaults=values,
+        )
+        if created:
+            return (stats, True)
+
+        # Incremental and batch sums of annotation times may differ slightly
+        changed = any(
+            getattr(stats, key) != value
+            for key, value in values.items()
+            if key != 'annotationTime'
+        ) or not isclose(stats.annotationTime, values['annotationTime'])
+        if changed:
+            for key, value in values.items():
+                setattr(stats, key, value)
+            stats.save()
+
+        return (stats, changed)
+
+    @classmethod
+    def for_user(cls, user, result_types):
+        """
+        Returns statistics of the given user for all result types.
+
+        Missing rows are computed from the result table and stored.
+        """
+        stats = {x.resultType: x for x in cls.objects.filter(user=user).order_by('id')}
+        for result_cls in result_types:
+            if result_cls.__name__ not in stats:
+                stats[result_cls.__name__], _ = cls.reconcile(user, result_cls)
+
+        return [stats[x.__name__] for x in result_types]
+
+    @classmethod
+    def mark_outdated(cls, user, result_cls):
+        """
+        Marks statistics for the given user and result type as outdated.
+        """
+        cls.objects.filter(
+            user_id=getattr(user, 'id', user), resultType=result_cls.__name__
+        ).update(outdated=True)
+
+    @classmethod
+    def add_result(cls, result_cls, result):
+        """
+        Updates statistics for a newly created completed result.
+        """
+        cls.add_results(result_cls, result.createdBy_id, [result])
+
+    @classmethod
+    def add_results(cls, result_cls, user, results):
+        """
+        Updates statistics for newly created completed results of user.
+
+        Results are added in start time order; if any of them is not the
+        latest result of the user, the statistics are recomputed instead.
+        """
+        user_id = getattr(user, 'id', user)
+        stats = cls.objects.filter(
+            user_id=user_id, resultType=result_cls.__name__
+        ).first()
+        if stats is None:
+            cls.reconcile(user_id, result_cls)
+            return
+
+        for result in sorted(results, key=lambda x: x.start_time):
+            action_time = False
+            if result_cls.__name__ in ACTION_TIME_RESULT_TYPES and result.task_id:
+                action_time = _is_action_time_campaign(
+                    result.task.campaign.campaignOptions
+                )
+
+            if not cls._add_time(stats, result, action_time):
+                cls.reconcile(user_id, result_cls)
+                return
+
+        user_results = result_cls.objects.filter(
+            createdBy_id=user_id, activated=False, completed=True
+        )
+
+        # Items count as completed if all their results are new ones
+        new_items = Counter(x.item_id for x in results)
+        for item_id, count in (
+            user_results.filter(item_id__in=new_items)
+            .values('item_id')
+            .annotate(_count=models.Count('id'))
+            .values_list('item_id', '_count')
+        ):
+            if count == new_items[item_id]:
+                stats.completedItems += 1
+
+        new_hits = Counter(
+            x.task_id for x in results if x.item.itemType.lower() == 'tgt'
+        )
+        if new_hits:
+            for task_id, count in (
+                user_results.filter(task_id__in=new_hits, item__itemType__iexact='tgt')
+                .values('task_id')
+                .annotate(_count=models.Count('id'))
+                .values_list('task_id', '_count')
+            ):
+                previous_count = count - new_hits[task_id]
+                if previous_count == 0:
+                    stats.totalHits += 1
+                if previous_count < HIT_COMPLETION_RESULTS <= count:
+                    stats.completedHits += 1
+
+        stats.save()
+
+    @staticmethod
+    def _add_time(stats, result, action_time):
+        """
+        Adds annotation time of result, if it is the latest one.
+
+        Returns False if the statistics need to be recomputed instead.
+        """
+        start_time, end_time = result.start_time, result.end_time
+        if action_time != stats.actionTime:
+            return False
+
+        if action_time:
+            if end_time < start_time:
+                return False
+
+            gaps = [end_time - start_time]
+            if stats.lastEndTime is not None:
+                if start_time < stats.lastEndTime:
+                    return False
+                gaps.insert(0, start_time - stats.lastEndTime)
+
+            for gap in gaps:
+                if gap < MAX_ACTION_GAP_SECONDS:
+                    stats.annotationTime += gap
+
+            stats.lastStartTime, stats.lastEndTime = end_time, end_time
+            return True
+
+        if stats.lastStartTime is not None and start_time < stats.lastStartTime:
+            return False
+
+        if stats.lastEndTime is None or start_time >= stats.lastEndTime:
+            stats.annotationTime += _clamp_time(end_time - start_time)
+        else:
+            stats.annotationTime += _clamp_time(end_time - stats.lastEndTime)
+
+        stats.lastStartTime, stats.lastEndTime = start_time, end_time
+        return True
+
+
+def _update_for_result(sender, instance, created, **kwargs):
+    """
+    Updates statistics for created results, marks them outdated otherwise.
+
+    Results may be saved repeatedly while being annotated, so changes are
+    not recomputed here but left to the ReconcileUserStats command.
+    """
+    # pylint: disable=unused-argument
+    if created and (instance.activated or not instance.completed):
+        return
+
+    if created:
+        UserAnnotationStats.add_result(sender, instance)
+        return
+
+    UserAnnotationStats.mark_outdated(instance.createdBy_id, sender)
+
+
+def _reconcile_for_result(sender, instance, **kwargs):
+    # pylint: disable=unused-argument
+    UserAnnotationStats.reconcile(instance.createdBy_id, sender)
+
+
+def connect_stats_signals(result_types):
+    """
+    Connects user statistics updates to result changes.
+    """
+    for result_cls in result_types:
+        _uid = 'user-stats-{0}'.format(result_cls.__name__)
+        post_save.connect(_update_for_result, sender=result_cls, dispatch_uid=_uid)
+        post_delete.connect(
+            _reconcile_for_result, sender=result_cls, dispatch_uid=_uid + '-delete'
+        )
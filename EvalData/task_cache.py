@@ -0,0 +1,150 @@
+"""
+Appraise evaluation framework
+
+See LICENSE for usage details
+"""
+
+# pylint: disable=C0103,C0330,no-member
+from django.core.cache import cache
+from django.db import models
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+
+from Appraise.utils import _get_logger
+from EvalData.models import AnnotationTaskRegistry
+from EvalData.models import RESULT_TYPES
+from EvalData.models import TaskAgenda
+
+LOGGER = _get_logger(name=__name__)
+
+# Cached current tasks are validated on use, so this mostly bounds memory use.
+# Invalidation only reaches the cache of the current process unless a shared
+# cache backend is configured in CACHES; other processes rely on validation.
+CURRENT_TASK_CACHE_TIMEOUT = 60 * 60
+
+
+def _current_task_key(user_id, campaign_id):
+    return 'current-task:{0}:{1}'.format(user_id, campaign_id or '*')
+
+
+def get_cached_current_task(user, campaign=None, agendas=None):
+    """
+    Returns cached current task for user and campaign, or None.
+
+    If agendas are given, the cached task is only returned if it is still
+    open in one of them; this is checked in the query loading the task.
+    """
+    cached = cache.get(_current_task_key(user.id, campaign.id if campaign else None))
+    if cached is None:
+        return None
+
+    type_name, task_id = cached
+    task_cls = AnnotationTaskRegistry.get_class(type_name)
+    if task_cls is None:
+        return None
+
+    tasks = task_cls.objects.filter(id=task_id)
+    if agendas is not None:
+        tasks = tasks.filter(
+            models.Exists(
+                agendas.filter(
+                    _open_tasks__typeName=type_name, _open_tasks__primaryID=task_id
+                )
+            )
+        )
+
+    return tasks.first()
+
+
+def set_cached_current_task(user, campaign, task):
+    """
+    Caches current task for user and campaign.
+    """
+    cache.set(
+        _current_task_key(user.id, campaign.id if campaign else None),
+        (task.__class__.__name__, task.id),
+        CURRENT_TASK_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_cached_current_task(user_id, campaign_id, keep_task=None):
+    """
+    Removes cached current tasks for user and campaign.
+
+    This includes the campaign-independent entry for the user. Entries
+    pointing to keep_task, given as (type name, task id), are kept.
+    """
+    for _key in (
+        _current_task_key(user_id, campaign_id),
+        _current_task_key(user_id, None),
+    ):
+        if keep_task is None or cache.get(_key) != keep_task:
+            cache.delete(_key)
+
+
+def _invalidate_for_result(sender, instance, **kwargs):
+    """
+    New results for other tasks may change the current task.
+
+    Results for the cached task itself do not invalidate the entry, as
+    cached tasks are validated with next_item_for_user() before use.
+    """
+    # pylint: disable=unused-argument
+    task = instance.task
+    if task is None:
+        return
+
+    invalidate_cached_current_task(
+        instance.createdBy_id,
+        task.campaign_id,
+        keep_task=(task.__class__.__name__, task.id),
+    )
+
+
+def _invalidate_for_agenda(sender, instance, **kwargs):
+    # pylint: disable=unused-argument
+    invalidate_cached_current_task(instance.user_id, instance.campaign_id)
+
+
+def _invalidate_for_agenda_tasks(sender, instance, action, reverse, pk_set, **kwargs):
+    # pylint: disable=unused-argument,too-many-arguments
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        _invalidate_for_agenda(sender, instance)
+        return
+
+    for agenda in TaskAgenda.objects.filter(pk__in=pk_set or []):
+        _invalidate_for_agenda(sender, agenda)
+
+
+def connect_signals():
+    """
+    Connects cache invalidation to result and task agenda changes.
+    """
+    for result_cls in RESULT_TYPES:
+        post_save.connect(
+            _invalidate_for_result,
+            sender=result_cls,
+            dispatch_uid='current-task-{0}'.format(result_cls.__name__),
+        )
+
+    post_save.connect(
+        _invalidate_for_agenda, sender=TaskAgenda, dispatch_uid='current-task-agenda'
+    )
+    post_delete.connect(
+        _invalidate_for_agenda,
+        sender=TaskAgenda,
+        dispatch_uid='current-task-agenda-delete',
+    )
+    for through_cls in (
+        TaskAgenda._open_tasks.through,
+        TaskAgenda._completed_tasks.through,
+    ):
+        m2m_changed.connect(
+            _invalidate_for_agenda_tasks,
+            sender=through_cls,
+            dispatch_uid='current-task-{0}'.format(through_cls.__name__),
+        )
@@ -1,13 +1,35 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from Campaign.models import Campaign
+from Campaign.models import TrustedUser
+from EvalData.models import DirectAssessmentDocumentResult
+from EvalData.models import DirectAssessmentDocumentTask
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentTask
 from EvalData.models import Market
 from EvalData.models import Metadata
 from EvalData.models import ObjectID
+from EvalData.models import PairwiseAssessmentResult
+from EvalData.models import PairwiseAssessmentTask
 from EvalData.models import TaskAgenda
+from EvalData.models import TaskAvailability
+from EvalData.models import TaskCompletion
+from EvalData.models import TaskDocument
+from EvalData.models import TaskProgress
+from EvalData.models import TextPair
+from EvalData.models import TextPairWithContext
 from EvalData.models import TextSegment
+from EvalData.models import TextSegmentWithTwoTargets
+from EvalData.models import UserAnnotationStats
 
 
 class TaskAgendaTests(TestCase):
@@ -55,6 +77,971 @@ class TaskAgendaTests(TestCase):
         self.assertFalse(dummy_task in agenda._open_tasks.all())
         self.assertTrue(dummy_task in agenda._completed_tasks.all())
 
+    def test_open_tasks_resolved_in_bulk(self):
+        """
+        Open tasks are resolved with one query per task type.
+        """
+        agenda = TaskAgenda.objects.create(
+            user=self.valid_user, campaign=self.valid_campaign
+        )
+
+        tasks = []
+        for batch_no in (1, 2, 3):
+            task = DirectAssessmentTask.objects.create(
+                campaign=self.valid_campaign,
+                requiredAnnotations=1,
+                batchNo=batch_no,
+                createdBy=self.valid_user,
+            )
+            agenda._open_tasks.add(
+                ObjectID.objects.create(
+                    typeName='DirectAssessmentTask', primaryID=task.id
+                )
+            )
+            tasks.append(task)
+
+        invalid_task = ObjectID.objects.create(typeName='Market', primaryID='1')
+        agenda._open_tasks.add(invalid_task)
+
+        # One query for the serialized tasks, one for the task instances.
+        with self.assertNumQueries(2):
+            resolved_tasks = agenda.resolved_open_tasks()
+
+        self.assertEqual(len(resolved_tasks), 4)
+        self.assertIn((invalid_task, None), resolved_tasks)
+        self.assertEqual(sorted(agenda.open_tasks(), key=lambda x: x.id), tasks)
+        self.assertEqual(invalid_task.get_object_instance(), None)
+        self.assertEqual(agenda.completed_tasks(), [])
+
+
+class TaskTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create a DirectAssessmentTask with mixed TGT/BAD items.
+        """
+        super(TaskTestCase, cls).setUpClass()
+
+        cls.valid_user = User.objects.create(username='dummy-user')
+
+        cls.valid_campaign = Campaign()
+        cls.valid_campaign.createdBy = cls.valid_user
+        cls.valid_campaign.save()
+
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=cls.valid_user,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=cls.valid_user,
+        )
+
+        cls.task = DirectAssessmentTask.objects.create(
+            campaign=cls.valid_campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=cls.valid_user,
+        )
+        cls.items = []
+        for item_id, item_type in enumerate(('TGT', 'BAD', 'TGT', 'CHK'), 1):
+            item = TextPair.objects.create(
+                itemID=item_id,
+                itemType=item_type,
+                metadata=metadata,
+                sourceID='src.txt',
+                sourceText='Source {0}'.format(item_id),
+                targetID='tgt.txt',
+                targetText='Target {0}'.format(item_id),
+                createdBy=cls.valid_user,
+            )
+            cls.task.items.add(item)
+            cls.items.append(item)
+
+
+class NextItemForUserTests(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _annotate(self, item):
+        DirectAssessmentResult.objects.create(
+            score=50,
+            start_time=0,
+            end_time=1,
+            item=item,
+            task=self.task,
+            createdBy=self.valid_user,
+            completed=True,
+        )
+
+    def test_first_item_for_new_user(self):
+        next_item, completed_items = self.task.next_item_for_user(
+            self.valid_user, return_completed_items=True
+        )
+        self.assertEqual(next_item, self.items[0])
+        self.assertEqual(completed_items, 0)
+
+    def test_skips_annotated_items(self):
+        self._annotate(self.items[0])
+        next_item, completed_items = self.task.next_item_for_user(
+            self.valid_user, return_completed_items=True
+        )
+        self.assertEqual(next_item, self.items[1])
+        self.assertEqual(completed_items, 1)
+
+    def test_trusted_user_only_gets_tgt_items(self):
+        TrustedUser.objects.create(user=self.valid_user, campaign=self.valid_campaign)
+        self._annotate(self.items[0])
+        next_item, completed_items = self.task.next_item_for_user(
+            self.valid_user, return_completed_items=True
+        )
+        self.assertEqual(next_item, self.items[2])
+        self.assertEqual(completed_items, 2)
+
+    def test_no_next_item_counts_all_items(self):
+        for item in self.items:
+            self._annotate(item)
+        next_item, completed_items = self.task.next_item_for_user(
+            self.valid_user, return_completed_items=True
+        )
+        self.assertIsNone(next_item)
+        self.assertEqual(completed_items, len(self.items))
+
+    def test_resolves_next_item_from_progress_cursor(self):
+        self._annotate(self.items[0])
+        self.task.next_item_for_user(self.valid_user)
+
+        # Trusted users are cached, leaving one query for the cursor.
+        with self.assertNumQueries(1):
+            next_item, completed_items = self.task.next_item_for_user(
+                self.valid_user, return_completed_items=True
+            )
+        self.assertEqual(next_item, self.items[1])
+        self.assertEqual(completed_items, 1)
+
+    def test_stale_progress_cursor_is_rebuilt(self):
+        self.task.next_item_for_user(self.valid_user)
+        self._annotate(self.items[0])
+        next_item, completed_items = self.task.next_item_for_user(
+            self.valid_user, return_completed_items=True
+        )
+        self.assertEqual(next_item, self.items[1])
+        self.assertEqual(completed_items, 1)
+
+    def test_refresh_progress_cursor(self):
+        self.task.next_item_for_user(self.valid_user)
+        self._annotate(self.items[0])
+        self._annotate(self.items[1])
+
+        old_values, new_values = TaskProgress.refresh(
+            self.task, self.valid_user, verify_only=True
+        )
+        self.assertEqual(old_values, (0, self.items[0].id, 0))
+        self.assertEqual(new_values, (2, self.items[2].id, 0))
+        progress = TaskProgress.for_task(self.task, self.valid_user).get()
+        self.assertEqual(progress.nextItemID, self.items[0].id)
+
+        TaskProgress.refresh(self.task, self.valid_user)
+        progress = TaskProgress.for_task(self.task, self.valid_user).get()
+        self.assertEqual(progress.nextItemID, self.items[2].id)
+        self.assertEqual(progress.completedItems, 2)
+
+    def test_advance_progress_cursor(self):
+        self.task.next_item_for_user(self.valid_user)
+        self._annotate(self.items[0])
+
+        # Locking the cursor, finding the next item and saving the cursor
+        with self.assertNumQueries(3):
+            TaskProgress.advance(self.task, self.valid_user, [self.items[0]])
+
+        old_values, new_values = TaskProgress.refresh(
+            self.task, self.valid_user, verify_only=True
+        )
+        self.assertEqual(old_values, (1, self.items[1].id, 0))
+        self.assertEqual(old_values, new_values)
+
+    def test_advance_progress_cursor_of_trusted_user(self):
+        TrustedUser.objects.create(user=self.valid_user, campaign=self.valid_campaign)
+        self.task.next_item_for_user(self.valid_user)
+        self._annotate(self.items[0])
+        TaskProgress.advance(self.task, self.valid_user, [self.items[0]])
+
+        old_values, new_values = TaskProgress.refresh(
+            self.task, self.valid_user, verify_only=True
+        )
+        self.assertEqual(old_values, (2, self.items[2].id, 0))
+        self.assertEqual(old_values, new_values)
+
+
+class PairwiseProgressTests(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+        self.pairwise_task = PairwiseAssessmentTask.objects.create(
+            campaign=self.valid_campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=self.valid_user,
+        )
+        self.pairwise_items = []
+        for item_id, item_type in enumerate(('TGT', 'BAD', 'TGT-2', 'CHK'), 1):
+            item = TextSegmentWithTwoTargets.objects.create(
+                itemID=item_id,
+                itemType=item_type,
+                metadata=self.items[0].metadata,
+                segmentID='src.txt',
+                segmentText='Source {0}'.format(item_id),
+                target1ID='tgt1.txt',
+                target1Text='Target {0}'.format(item_id),
+                createdBy=self.valid_user,
+            )
+            self.pairwise_task.items.add(item)
+            self.pairwise_items.append(item)
+
+    def test_advance_progress_cursor_of_trusted_user(self):
+        TrustedUser.objects.create(user=self.valid_user, campaign=self.valid_campaign)
+        self.pairwise_task.next_item_for_user(self.valid_user)
+        PairwiseAssessmentResult.objects.create(
+            score1=50,
+            start_time=0,
+            end_time=1,
+            item=self.pairwise_items[0],
+            task=self.pairwise_task,
+            createdBy=self.valid_user,
+            completed=True,
+        )
+        TaskProgress.advance(
+            self.pairwise_task, self.valid_user, [self.pairwise_items[0]]
+        )
+
+        old_values, new_values = TaskProgress.refresh(
+            self.pairwise_task, self.valid_user, verify_only=True
+        )
+        self.assertEqual(old_values, (2, self.pairwise_items[2].id, 0))
+        self.assertEqual(old_values, new_values)
+
+
+class TaskMarketTests(TaskTestCase):
+    def test_market_accessors_fall_back_to_items(self):
+        self.assertEqual(self.task.marketName(), 'eng_deu_TEST')
+        self.assertEqual(self.task.marketSourceLanguageCode(), 'eng')
+        self.assertEqual(self.task.marketTargetLanguageCode(), 'deu')
+
+    def test_market_accessors_use_stored_market(self):
+        self.task.set_market(self.items[0].metadata.market)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.task.marketName(), 'eng_deu_TEST')
+            self.assertEqual(self.task.marketSourceLanguageCode(), 'eng')
+            self.assertEqual(self.task.marketSourceLanguage(), 'English')
+            self.assertEqual(self.task.marketTargetLanguageCode(), 'deu')
+            self.assertEqual(self.task.marketTargetLanguage(), 'German (Deutsch)')
+
+
+class TaskItemCountTests(TaskTestCase):
+    def _agenda(self, *tasks, completed=False):
+        agenda = TaskAgenda.objects.create(
+            user=self.valid_user, campaign=self.valid_campaign
+        )
+        agenda_tasks = agenda._completed_tasks if completed else agenda._open_tasks
+        for task in tasks:
+            agenda_tasks.add(
+                ObjectID.objects.create(
+                    typeName=task.__class__.__name__, primaryID=task.id
+                )
+            )
+        return agenda
+
+    def test_item_count_falls_back_to_items(self):
+        self.assertEqual(self.task.itemCount, None)
+        self.assertEqual(self.task.item_count(), 4)
+        self.assertEqual(
+            DirectAssessmentTask.item_counts([self.task.id]), {self.task.id: 4}
+        )
+
+    def test_item_count_uses_stored_count(self):
+        task = DirectAssessmentTask.objects.get(id=self.task.id)
+        task.set_item_counts(self.items[:3])
+        task.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(task.item_count(), 3)
+        self.assertEqual(task.documentCount, 0)
+
+        with self.assertNumQueries(1):
+            counts = DirectAssessmentTask.item_counts([self.task.id])
+        self.assertEqual(counts, {self.task.id: 3})
+
+    def test_backfill_command(self):
+        call_command('UpdateTaskItemCounts', stdout=StringIO())
+        task = DirectAssessmentTask.objects.get(id=self.task.id)
+        self.assertEqual(task.itemCount, 4)
+        self.assertEqual(task.documentCount, 0)
+
+    def test_agenda_totals(self):
+        other_task = DirectAssessmentTask.objects.create(
+            campaign=self.valid_campaign,
+            requiredAnnotations=1,
+            batchNo=2,
+            createdBy=self.valid_user,
+            itemCount=10,
+        )
+        agenda = self._agenda(self.task, other_task)
+        completed_agenda = self._agenda(other_task, completed=True)
+        missing_agenda = self._agenda()
+        missing_agenda._open_tasks.add(
+            ObjectID.objects.create(typeName='DirectAssessmentTask', primaryID='0')
+        )
+
+        agenda_ids = [agenda.id, completed_agenda.id, missing_agenda.id]
+        with self.assertNumQueries(1):
+            totals = TaskAgenda.total_items(agenda_ids)
+        self.assertEqual(totals, {agenda.id: 14})
+        self.assertEqual(
+            TaskAgenda.total_items(agenda_ids, completed=True),
+            {completed_agenda.id: 10},
+        )
+
+
+class TaskCompletionTests(TaskTestCase):
+    def _annotate(self, item, user=None):
+        DirectAssessmentResult.objects.create(
+            score=50,
+            start_time=0,
+            end_time=1,
+            item=item,
+            task=self.task,
+            createdBy=user or self.valid_user,
+            completed=True,
+        )
+
+    def test_counts_unique_items_on_insert(self):
+        other_user = User.objects.create(username='other-user')
+        self._annotate(self.items[0])
+        self._annotate(self.items[0], user=other_user)
+        self._annotate(self.items[1], user=other_user)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                TaskCompletion.unique_items(self.task, DirectAssessmentResult), 2
+            )
+
+    def test_counter_is_initialised_from_results(self):
+        self._annotate(self.items[0])
+        TaskCompletion.for_task(self.task).delete()
+        self._annotate(self.items[1])
+
+        self.assertEqual(
+            TaskCompletion.unique_items(self.task, DirectAssessmentResult), 2
+        )
+
+    def test_finished_user_completes_task_from_counter(self):
+        self.task.activate()
+        for item in self.items:
+            self._annotate(item)
+        self.task.next_item_for_user(self.valid_user)
+        self.assertFalse(self.task.completed)
+
+        TaskCompletion.for_task(self.task).update(uniqueItems=100)
+        TaskProgress.for_task(self.task, self.valid_user).delete()
+        self.task.next_item_for_user(self.valid_user)
+        self.assertTrue(self.task.completed)
+
+    def test_sweeper_completes_tasks(self):
+        self.task.activate()
+        for item in self.items:
+            self._annotate(item)
+        TaskCompletion.for_task(self.task).update(uniqueItems=100)
+
+        call_command('CompleteTasks', '--dry-run', stdout=StringIO())
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.activated)
+
+        call_command('CompleteTasks', stdout=StringIO())
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.completed)
+
+    def test_sweeper_rebuilds_counters(self):
+        self._annotate(self.items[0])
+        self._annotate(self.items[2])
+        TaskCompletion.for_task(self.task).update(uniqueItems=100)
+
+        call_command('CompleteTasks', '--rebuild', '--dry-run', stdout=StringIO())
+        self.assertEqual(TaskCompletion.for_task(self.task).get().uniqueItems, 2)
+
+
+class TaskAvailabilityTests(TaskTestCase):
+    def setUp(self):
+        self.task.activate()
+
+    def _availability(self):
+        return TaskAvailability.objects.get(
+            campaign=self.valid_campaign,
+            taskType='DirectAssessmentTask',
+            targetLanguageCode='deu',
+        )
+
+    def test_assignment_updates_free_tasks(self):
+        self.assertEqual(self._availability().freeTasks, 1)
+        self.assertEqual(self._availability().freeAssignments, 1)
+
+        self.task.assignedTo.add(self.valid_user)
+        self.assertEqual(self._availability().freeTasks, 0)
+
+        self.task.assignedTo.remove(self.valid_user)
+        self.assertEqual(self._availability().freeTasks, 1)
+
+    def test_completion_updates_free_tasks(self):
+        self.task.complete()
+        self.assertEqual(self._availability().tasks, 1)
+        self.assertEqual(self._availability().freeTasks, 0)
+
+    def test_rebuild_command(self):
+        TaskAvailability.objects.all().delete()
+        call_command('UpdateTaskAvailability', stdout=StringIO())
+        self.assertEqual(self._availability().freeTasks, 1)
+        self.assertFalse(
+            TaskAvailability.objects.filter(targetLanguageCode='').exists()
+        )
+
+
+class UserAnnotationStatsTests(TaskTestCase):
+    def _annotate(self, item, start_time, end_time):
+        DirectAssessmentResult.objects.create(
+            score=50,
+            start_time=start_time,
+            end_time=end_time,
+            item=item,
+            task=self.task,
+            createdBy=self.valid_user,
+            completed=True,
+        )
+
+    def _assert_stats_match_results(self):
+        stats = UserAnnotationStats.objects.get(
+            user=self.valid_user, resultType='DirectAssessmentResult'
+        )
+        self.assertEqual(
+            stats.completedItems,
+            DirectAssessmentResult.get_completed_for_user(self.valid_user),
+        )
+        self.assertEqual(
+            (stats.completedHits, stats.totalHits),
+            DirectAssessmentResult.get_hit_status_for_user(self.valid_user),
+        )
+        self.assertEqual(
+            stats.annotationTime,
+            DirectAssessmentResult.get_time_for_user(self.valid_user).total_seconds(),
+        )
+
+    def test_statistics_are_updated_incrementally(self):
+        UserAnnotationStats.for_user(self.valid_user, (DirectAssessmentResult,))
+        self._annotate(self.items[0], 0, 10)
+        self._annotate(self.items[1], 5, 20)
+        self._annotate(self.items[2], 30, 1000)
+        self._annotate(self.items[0], 1000, 1010)
+
+        stats = UserAnnotationStats.objects.get(
+            user=self.valid_user, resultType='DirectAssessmentResult'
+        )
+        self.assertEqual(stats.completedItems, 3)
+        self.assertEqual(stats.totalHits, 1)
+        self.assertEqual(stats.annotationTime, 10 + 10 + 300 + 10)
+        self._assert_stats_match_results()
+
+    def test_out_of_order_result_recomputes_statistics(self):
+        self._annotate(self.items[0], 100, 110)
+        self._annotate(self.items[1], 0, 50)
+        self._assert_stats_match_results()
+
+    def test_deleted_result_recomputes_statistics(self):
+        self._annotate(self.items[0], 0, 10)
+        self._annotate(self.items[1], 20, 30)
+        DirectAssessmentResult.objects.filter(item=self.items[1]).delete()
+        self._assert_stats_match_results()
+
+    def test_reconcile_command(self):
+        self._annotate(self.items[0], 0, 10)
+        call_command('ReconcileUserStats', stdout=StringIO())
+        UserAnnotationStats.objects.filter(resultType='DirectAssessmentResult').update(
+            completedItems=5
+        )
+
+        output = StringIO()
+        call_command('ReconcileUserStats', '--verify', stdout=output)
+        self.assertIn('1/7 user statistics outdated', output.getvalue())
+        self.assertEqual(
+            UserAnnotationStats.objects.get(
+                resultType='DirectAssessmentResult'
+            ).completedItems,
+            5,
+        )
+
+        call_command('ReconcileUserStats', stdout=StringIO())
+        self._assert_stats_match_results()
+
+
+class TrustedUserCacheTests(TaskTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_trusted_users_are_cached(self):
+        self.assertFalse(self.task.is_trusted_user(self.valid_user))
+        with self.assertNumQueries(0):
+            self.assertFalse(self.task.is_trusted_user(self.valid_user))
+
+    def test_cached_lookup_does_not_fetch_campaign(self):
+        self.assertFalse(self.task.is_trusted_user(self.valid_user))
+        task = DirectAssessmentTask.objects.get(id=self.task.id)
+        with self.assertNumQueries(0):
+            self.assertFalse(task.is_trusted_user(self.valid_user))
+
+    def test_trusted_user_changes_invalidate_cache(self):
+        self.assertFalse(self.valid_campaign.is_trusted_user(self.valid_user))
+
+        trusted_user = TrustedUser.objects.create(
+            user=self.valid_user, campaign=self.valid_campaign
+        )
+        self.assertTrue(self.valid_campaign.is_trusted_user(self.valid_user))
+
+        trusted_user.delete()
+        self.assertFalse(self.valid_campaign.is_trusted_user(self.valid_user))
+
+
+class FreeTaskAllocationTests(TaskTestCase):
+    def setUp(self):
+        self.task.activate()
+        self.task.save()
+        self.other_user = User.objects.create(username='other-user')
+
+    def test_free_task_found_from_item_market(self):
+        self.assertEqual(
+            DirectAssessmentTask.get_next_free_task_for_language(
+                'deu', self.valid_campaign, self.valid_user
+            ),
+            self.task,
+        )
+        self.assertIsNone(
+            DirectAssessmentTask.get_next_free_task_for_language(
+                'ces', self.valid_campaign, self.valid_user
+            )
+        )
+
+    def test_no_free_task_without_user(self):
+        self.assertIsNone(
+            DirectAssessmentTask.get_next_free_task_for_language(
+                'deu', self.valid_campaign
+            )
+        )
+        self.assertIsNone(
+            DirectAssessmentTask.get_next_free_task_for_language_and_campaign(
+                'deu', self.valid_campaign
+            )
+        )
+
+    def test_claim_assigns_task_until_full(self):
+        self.task.set_market(self.items[0].metadata.market)
+        self.task.save()
+
+        claimed_task = DirectAssessmentTask.claim_next_free_task_for_language(
+            'deu', self.valid_campaign, self.valid_user
+        )
+        self.assertEqual(claimed_task, self.task)
+        self.assertIn(self.valid_user, self.task.assignedTo.all())
+
+        # requiredAnnotations=1, so the task is full now
+        self.assertIsNone(
+            DirectAssessmentTask.claim_next_free_task_for_language(
+                'deu', self.valid_campaign, self.other_user
+            )
+        )
+        self.assertEqual(self.task.assignedTo.count(), 1)
+
+    def test_task_not_offered_to_assigned_user(self):
+        self.task.requiredAnnotations = 2
+        self.task.save()
+        self.task.assignedTo.add(self.valid_user)
+
+        self.assertIsNone(
+            DirectAssessmentTask.get_next_free_task_for_language(
+                'deu', self.valid_campaign, self.valid_user
+            )
+        )
+        self.assertEqual(
+            DirectAssessmentTask.get_next_free_task_for_language(
+                'deu', self.valid_campaign, self.other_user
+            ),
+            self.task,
+        )
+
+
+class DocumentTaskTestCase(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create a DirectAssessmentDocumentTask with two documents.
+
+        Each document has two segments followed by its complete document
+        item, as generated by the batch creation scripts.
+        """
+        super(DocumentTaskTestCase, cls).setUpClass()
+
+        cls.valid_user = User.objects.create(username='dummy-user')
+
+        cls.valid_campaign = Campaign()
+        cls.valid_campaign.createdBy = cls.valid_user
+        cls.valid_campaign.save()
+
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=cls.valid_user,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=cls.valid_user,
+        )
+
+        cls.task = DirectAssessmentDocumentTask.objects.create(
+            campaign=cls.valid_campaign,
+            requiredAnnotations=1,
+            batchNo=1,
+            createdBy=cls.valid_user,
+        )
+        cls.items = []
+        for document_id in ('doc1', 'doc2'):
+            for segment_id in (1, 2, 3):
+                item = TextPairWithContext.objects.create(
+                    itemID=len(cls.items) + 1,
+                    itemType='TGT',
+                    documentID=document_id,
+                    isCompleteDocument=segment_id == 3,
+                    metadata=metadata,
+                    sourceID='src.txt',
+                    sourceText='Source {0}'.format(segment_id),
+                    targetID='tgt.txt',
+                    targetText='Target {0}'.format(segment_id),
+                    createdBy=cls.valid_user,
+                )
+                cls.task.items.add(item)
+                cls.items.append(item)
+
+    def _annotate(self, item, score=50):
+        return DirectAssessmentDocumentResult.objects.create(
+            score=score,
+            start_time=0,
+            end_time=1,
+            item=item,
+            task=self.task,
+            createdBy=self.valid_user,
+            completed=True,
+        )
+
+
+class DocumentUserStatsTests(DocumentTaskTestCase):
+    def test_action_time_for_esa_campaigns(self):
+        Campaign.objects.filter(id=self.valid_campaign.id).update(campaignOptions='ESA')
+        task = DirectAssessmentDocumentTask.objects.get(id=self.task.id)
+        for item, (start_time, end_time) in zip(
+            self.items, ((0, 10), (20, 30), (1000, 1010), (1015, 1020))
+        ):
+            DirectAssessmentDocumentResult.objects.create(
+                score=50,
+                start_time=start_time,
+                end_time=end_time,
+                item=item,
+                task=task,
+                createdBy=self.valid_user,
+                completed=True,
+            )
+
+        stats = UserAnnotationStats.objects.get(
+            user=self.valid_user, resultType='DirectAssessmentDocumentResult'
+        )
+        self.assertTrue(stats.actionTime)
+        self.assertEqual(stats.annotationTime, 10 + 10 + 10 + 10 + 5 + 5)
+        self.assertEqual(
+            stats.annotationTime,
+            DirectAssessmentDocumentResult.get_time_for_user(
+                self.valid_user
+            ).total_seconds(),
+        )
+
+    def test_changed_result_marks_statistics_outdated(self):
+        result = self._annotate(self.items[0])
+        result.end_time = 20
+
+        # Only the statistics row is updated, results are not read again
+        with CaptureQueriesContext(connection) as queries:
+            result.save()
+        self.assertFalse(
+            [
+                x
+                for x in queries.captured_queries
+                if x['sql'].startswith('SELECT')
+                and 'EvalData_directassessmentdocumentresult' in x['sql']
+            ]
+        )
+
+        stats = UserAnnotationStats.objects.get(
+            user=self.valid_user, resultType='DirectAssessmentDocumentResult'
+        )
+        self.assertTrue(stats.outdated)
+        self.assertEqual(stats.annotationTime, 1)
+
+        call_command('ReconcileUserStats', '--outdated', stdout=StringIO())
+        stats.refresh_from_db()
+        self.assertFalse(stats.outdated)
+        self.assertEqual(stats.annotationTime, 20)
+
+
+class DocumentStateTests(DocumentTaskTestCase):
+    def test_items_with_latest_results(self):
+        self._annotate(self.items[0], score=10)
+        latest = self._annotate(self.items[0], score=20)
+
+        with self.assertNumQueries(2):
+            all_items = self.task.items_with_results_for_user(self.valid_user)
+            self.assertEqual(all_items[0], (self.items[0], latest))
+            self.assertEqual(all_items[0][1].item, self.items[0])
+        self.assertEqual([item for item, _ in all_items], self.items)
+        self.assertEqual([result for _, result in all_items][1:], [None] * 5)
+
+    def test_next_document_for_user_mqmesa(self):
+        for item in self.items[:3]:
+            self._annotate(item)
+        self._annotate(self.items[4])
+
+        # One query for the items, one for the results of the user
+        with self.assertNumQueries(2):
+            (
+                next_item,
+                items_completed,
+                items_total,
+                docs_completed,
+                docs_total,
+                doc_items,
+                doc_items_results,
+            ) = self.task.next_document_for_user_mqmesa(self.valid_user)
+
+        self.assertEqual(next_item, self.items[3])
+        self.assertEqual((items_completed, items_total), (4, 6))
+        self.assertEqual((docs_completed, docs_total), (1, 2))
+        self.assertEqual(doc_items, self.items[3:])
+        self.assertEqual(
+            [result is not None for result in doc_items_results],
+            [False, True, False],
+        )
+
+    def test_results_for_each_item_in_one_query(self):
+        first = self._annotate(self.items[1], score=10)
+        self._annotate(self.items[1], score=20)
+        block_items = self.items[:3]
+
+        for supports_over_clause in (True, False):
+            with mock.patch.object(
+                connection.features, 'supports_over_clause', supports_over_clause
+            ):
+                with self.assertNumQueries(1):
+                    block_results = self.task.get_results_for_each_item(
+                        block_items, self.valid_user
+                    )
+            self.assertEqual(block_results, [None, first, None])
+
+    def test_next_document_for_user_mqmesa_skips_document(self):
+        self._annotate(self.items[0])
+
+        result = self.task.next_document_for_user_mqmesa(
+            self.valid_user, skip_item=self.items[0]
+        )
+        self.assertEqual(result[0], self.items[3])
+        self.assertEqual(result[5], self.items[3:])
+
+        # Earlier documents are returned if they are still unfinished
+        result = self.task.next_document_for_user_mqmesa(
+            self.valid_user, skip_item=self.items[3]
+        )
+        self.assertEqual(result[0], self.items[1])
+
+    def test_progress_delta_mqmesa(self):
+        cache.clear()
+        self._annotate(self.items[0])
+        self.task.next_document_for_user_mqmesa(self.valid_user)
+
+        # Counters are updated from the cached summary, once it is verified
+        result = self._annotate(self.items[1])
+        with self.assertNumQueries(1):
+            delta = self.task.progress_delta_mqmesa(self.valid_user, result.item)
+        self.assertEqual(
+            delta,
+            {
+                'items_completed': 2,
+                'items_total': 6,
+                'docs_completed': 0,
+                'docs_total': 2,
+                'document_completed': False,
+                'item_id': None,
+                'task_id': None,
+            },
+        )
+
+        # Finishing a document looks up the next item
+        result = self._annotate(self.items[2])
+        with self.assertNumQueries(2):
+            delta = self.task.progress_delta_mqmesa(self.valid_user, result.item)
+        self.assertEqual(delta['items_completed'], 3)
+        self.assertEqual(delta['docs_completed'], 1)
+        self.assertTrue(delta['document_completed'])
+        self.assertEqual(delta['task_id'], self.items[3].id)
+
+    def test_progress_delta_mqmesa_without_cached_summary(self):
+        cache.clear()
+        result = self._annotate(self.items[0])
+        delta = self.task.progress_delta_mqmesa(self.valid_user, result.item)
+        self.assertEqual(delta['items_completed'], 1)
+        self.assertFalse(delta['document_completed'])
+
+    def test_progress_delta_mqmesa_with_outdated_summary(self):
+        cache.clear()
+        self.task.next_document_for_user_mqmesa(self.valid_user)
+
+        # Results saved by other processes are not in the cached summary
+        self._annotate(self.items[0])
+        self._annotate(self.items[1])
+        result = self._annotate(self.items[2])
+        delta = self.task.progress_delta_mqmesa(self.valid_user, result.item)
+        self.assertEqual(delta['items_completed'], 3)
+        self.assertEqual(delta['docs_completed'], 1)
+        self.assertTrue(delta['document_completed'])
+
+    def test_next_document_for_user_mqmesa_when_done(self):
+        for item in self.items:
+            self._annotate(item)
+
+        result = self.task.next_document_for_user_mqmesa(self.valid_user)
+        self.assertEqual(result, (None, 6, 6, 2, [], [], 2))
+
+
+class SubmitResultsTests(DocumentTaskTestCase):
+    def _submission(self, item, **kwargs):
+        submission = {
+            'item_id': item.itemID,
+            'task_id': item.id,
+            'score': 70,
+            'start_timestamp': 1.0,
+            'end_timestamp': 2.0,
+        }
+        submission.update(kwargs)
+        return submission
+
+    def test_submit_results_reports_per_item_status(self):
+        existing = self._annotate(self.items[1], score=10)
+        submissions = [
+            self._submission(self.items[0], mqm=[]),
+            self._submission(self.items[1], score='30'),
+            self._submission(self.items[2], score=None),
+            self._submission(self.items[3], item_id=99),
+            self._submission(self.items[0]),
+        ]
+
+        statuses = self.task.submit_results(self.valid_user, submissions)
+        self.assertEqual(
+            [x['accepted'] for x in statuses], [True, True, False, False, False]
+        )
+        self.assertEqual(statuses[3]['error'], 'Item not found in task')
+        self.assertEqual(statuses[4]['error'], 'Item submitted more than once')
+
+        results = DirectAssessmentDocumentResult.objects.filter(
+            createdBy=self.valid_user
+        )
+        self.assertEqual(results.count(), 2)
+        self.assertEqual(results.get(item=self.items[0]).mqm, '[]')
+        existing.refresh_from_db()
+        self.assertEqual(existing.score, 30)
+
+        # The progress cursor includes the new results
+        next_item = self.task.next_item_for_user(self.valid_user)
+        self.assertEqual(next_item, self.items[2])
+
+    def test_submit_results_updates_statistics_incrementally(self):
+        self._annotate(self.items[0])
+        submissions = [
+            self._submission(self.items[0], score=30),
+            self._submission(self.items[1], start_timestamp=3, end_timestamp=4),
+            self._submission(self.items[2], start_timestamp=5, end_timestamp=6),
+        ]
+
+        with mock.patch.object(UserAnnotationStats, 'reconcile') as reconcile:
+            self.task.submit_results(self.valid_user, submissions)
+        reconcile.assert_not_called()
+
+        stats = UserAnnotationStats.objects.get(
+            user=self.valid_user, resultType='DirectAssessmentDocumentResult'
+        )
+        self.assertTrue(stats.outdated)
+        expected = UserAnnotationStats.compute(
+            self.valid_user, DirectAssessmentDocumentResult
+        )
+        for field_name in ('completedItems', 'totalHits', 'annotationTime'):
+            self.assertEqual(getattr(stats, field_name), expected[field_name])
+
+
+class TaskDocumentTests(DocumentTaskTestCase):
+    def test_build_document_index(self):
+        documents = TaskDocument.build(self.task)
+        self.assertEqual(
+            [
+                (x.position, x.documentID, x.firstItemID, x.lastItemID)
+                for x in documents
+            ],
+            [
+                (0, 'doc1', self.items[0].id, self.items[2].id),
+                (1, 'doc2', self.items[3].id, self.items[5].id),
+            ],
+        )
+        self.assertEqual(documents[1].completeItemID, self.items[5].id)
+
+    def test_next_document_uses_index(self):
+        for item in self.items[:4]:
+            self._annotate(item)
+
+        # The index is built lazily for tasks created without it
+        self.assertFalse(TaskDocument.for_task(self.task).exists())
+        (
+            next_item,
+            completed_items,
+            completed_blocks,
+            completed_items_in_block,
+            block_items,
+            block_results,
+            total_blocks,
+        ) = self.task.next_document_for_user(self.valid_user)
+        self.assertEqual(TaskDocument.for_task(self.task).count(), 2)
+
+        self.assertEqual(next_item, self.items[4])
+        self.assertEqual((completed_items, completed_blocks), (4, 1))
+        self.assertEqual(block_items, self.items[3:])
+        self.assertEqual(completed_items_in_block, 1)
+        self.assertEqual(total_blocks, 2)
+
+    def test_item_changes_drop_index(self):
+        TaskDocument.build(self.task)
+        self.task.items.remove(self.items[5])
+        self.assertFalse(TaskDocument.for_task(self.task).exists())
+
+        # Trailing items without complete document item form a block
+        self.assertEqual(TaskDocument.total_documents(self.task), 1)
+        self.assertEqual(
+            TaskDocument.document_items(self.task, self.items[4]),
+            self.items[3:5],
+        )
+
 
 class MarketTests(TestCase):
     def test_cannot_exceed_max_length_for_source_language_code(self):
@@ -0,0 +1,417 @@
+"""
+Query count and wall time budgets for annotation, status and dashboard views.
+
+Fixtures are scaled from the Examples/ batches, so that views which issue
+queries per item, task or annotator exceed their budgets on larger scales.
+Wall time budgets depend on the machine running the tests, so they are
+only enforced if the APPRAISE_TIME_BUDGETS environment variable is set.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from Campaign.models import Campaign
+from Campaign.models import CampaignData
+from Campaign.models import CampaignTeam
+from Campaign.views import campaign_status_esa
+from Campaign.views import collect_status_rows
+from EvalData.models import DataAssessmentTask
+from EvalData.models import DirectAssessmentContextTask
+from EvalData.models import DirectAssessmentDocumentTask
+from EvalData.models import DirectAssessmentTask
+from EvalData.models import Market
+from EvalData.models import Metadata
+from EvalData.models import MultiModalAssessmentTask
+from EvalData.models import ObjectID
+from EvalData.models import PairwiseAssessmentDocumentTask
+from EvalData.models import PairwiseAssessmentTask
+from EvalData.models import TASK_DEFINITIONS
+from EvalData.models import TaskAgenda
+from EvalData.models import TaskProgress
+
+EXAMPLES_DIR = Path(settings.BASE_DIR) / 'Examples'
+
+# Fixture scales as (items per campaign, annotators per campaign)
+SCALES = ((10, 1), (100, 1), (1000, 1), (10, 50), (100, 50), (1000, 50))
+
+# Annotators complete half of their task, up to this many items
+COMPLETED_ITEMS = 50
+
+# Task type => (Examples/ directory, extra fields added to each item)
+EXAMPLE_BATCHES = {
+    DirectAssessmentTask: ('Direct', {}),
+    DirectAssessmentContextTask: ('Document', {}),
+    DirectAssessmentDocumentTask: ('Document', {}),
+    MultiModalAssessmentTask: ('Direct', {'imageURL': 'https://example.com/1.jpg'}),
+    PairwiseAssessmentTask: ('Pairwise', {}),
+    PairwiseAssessmentDocumentTask: ('PairwiseDocument', {}),
+    DataAssessmentTask: ('Data', {}),
+}
+
+RESULT_TYPES = {tup[1]: tup[2] for tup in TASK_DEFINITIONS}
+TASK_URLS = {tup[1]: tup[3] for tup in TASK_DEFINITIONS}
+
+# Budgets as (queries, queries per annotator, seconds), independent of items
+VIEW_BUDGETS = {
+    DirectAssessmentTask: (25, 0, 2.0),
+    DirectAssessmentContextTask: (25, 0, 2.0),
+    DirectAssessmentDocumentTask: (30, 0, 2.0),
+    MultiModalAssessmentTask: (25, 0, 2.0),
+    PairwiseAssessmentTask: (25, 0, 2.0),
+    PairwiseAssessmentDocumentTask: (30, 0, 2.0),
+    DataAssessmentTask: (30, 0, 2.0),
+}
+NEXT_ITEM_BUDGETS = {task_cls: (8, 0, 1.0) for task_cls in EXAMPLE_BATCHES}
+CAMPAIGN_STATUS_BUDGET = (20, 0, 5.0)
+DASHBOARD_BUDGET = (40, 0, 2.0)
+
+# Wall time budgets are opt-in, as shared CI runners may be slow
+ENFORCE_TIME_BUDGETS = bool(os.environ.get('APPRAISE_TIME_BUDGETS'))
+
+
+def _query_pattern(sql):
+    """
+    Returns SQL with literal values and value lists collapsed.
+    """
+    sql = re.sub(r"'(?:[^']|'')*'", '%s', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '%s', sql)
+    return re.sub(r'%s(, %s)+', '%s, ...', sql)
+
+
+def _scaled_batch(task_cls, items, annotators):
+    """
+    Returns batches with the given total number of items from Examples/.
+
+    Items of the first example batch are repeated in as many tasks as
+    needed; smaller scales truncate it, keeping documents complete.
+    """
+    example, extra_fields = EXAMPLE_BATCHES[task_cls]
+    with open(EXAMPLES_DIR / example / 'batches.json', encoding='utf-8') as _file:
+        example_batch = json.load(_file)[0]
+
+    example_items = [dict(x, **extra_fields) for x in example_batch['items']]
+    if items < len(example_items):
+        end = items
+        if 'isCompleteDocument' in example_items[0]:
+            while not example_items[end - 1]['isCompleteDocument']:
+                end += 1
+        example_items = example_items[:end]
+
+    tasks = max(1, items // len(example_items))
+    required_annotations = -(-annotators // tasks)
+    return [
+        {
+            'items': example_items,
+            'task': dict(
+                example_batch['task'],
+                batchNo=batch_no,
+                requiredAnnotations=required_annotations,
+            ),
+        }
+        for batch_no in range(1, tasks + 1)
+    ]
+
+
+def _result_values(result_cls):
+    values = {'rawData': '', 'activated': False, 'completed': True}
+    score_field = 'score1' if hasattr(result_cls, 'score1') else 'score'
+    values[score_field] = 50
+    return values
+
+
+class QueryBudgetTestCase(TestCase):
+    """
+    Builds one campaign per task type and scale, see SCALES.
+
+    Annotators are assigned to the tasks of each campaign round-robin and
+    have completed the first half of their task.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.media_root = tempfile.mkdtemp(prefix='appraise-budget-test-')
+        cls.media_override = override_settings(MEDIA_ROOT=cls.media_root)
+        cls.media_override.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.media_override.disable()
+        shutil.rmtree(cls.media_root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', is_staff=True)
+        language = Group.objects.create(name='deu')
+        User.objects.bulk_create(
+            [User(username='annotator{0:02d}'.format(x)) for x in range(50)]
+        )
+        cls.annotators = list(
+            User.objects.filter(username__startswith='annotator').order_by('username')
+        )
+        language.user_set.add(*cls.annotators)
+
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=cls.owner,
+        )
+        cls.metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=cls.owner,
+        )
+
+        cls.campaigns = {}
+        for task_cls in EXAMPLE_BATCHES:
+            for items, annotators in SCALES:
+                cls.campaigns[task_cls, items, annotators] = cls._create_campaign(
+                    task_cls, items, annotators
+                )
+
+        # Results are created in bulk, so derived data must be rebuilt
+        call_command('ReconcileUserStats', stdout=StringIO())
+        call_command('CompleteTasks', '--rebuild', '--dry-run', stdout=StringIO())
+        call_command('UpdateTaskAvailability', stdout=StringIO())
+
+    @classmethod
+    def _create_campaign(cls, task_cls, items, annotators):
+        name = '{0}{1}x{2}'.format(task_cls.__name__, items, annotators)
+        batch_data = CampaignData(
+            market=cls.metadata.market, metadata=cls.metadata, createdBy=cls.owner
+        )
+        batches = _scaled_batch(task_cls, items, annotators)
+        batch_data.dataFile.save(
+            '{0}.json'.format(name), ContentFile(json.dumps(batches).encode('utf-8'))
+        )
+        batch_data.save()
+
+        campaign = Campaign.objects.create(
+            campaignName=name, campaignOptions='', createdBy=cls.owner
+        )
+        campaign.batches.add(batch_data)
+        team = CampaignTeam.objects.create(
+            teamName=name,
+            owner=cls.owner,
+            requiredAnnotations=1,
+            requiredHours=1,
+            createdBy=cls.owner,
+        )
+        team.members.add(*cls.annotators[:annotators])
+        campaign.teams.add(team)
+
+        # Importing prints progress per task and item lengths
+        with redirect_stdout(StringIO()):
+            task_cls.import_from_json(campaign, cls.owner, batch_data, -1)
+
+        result_cls = RESULT_TYPES[task_cls]
+        tasks = list(task_cls.objects.filter(campaign=campaign).order_by('id'))
+        users = cls.annotators[:annotators]
+        agendas = TaskAgenda.objects.bulk_create(
+            [TaskAgenda(user=user, campaign=campaign) for user in users]
+        )
+        open_tasks = []
+        results = []
+        for index, task in enumerate(tasks):
+            task_users = users[index :: len(tasks)]
+            task.activate()
+            task.assignedTo.add(*task_users)
+
+            serialized_task = ObjectID.objects.create(
+                typeName=task_cls.__name__, primaryID=task.id
+            )
+            open_tasks.extend(
+                TaskAgenda._open_tasks.through(
+                    taskagenda=agenda, objectid=serialized_task
+                )
+                for agenda in agendas[index :: len(tasks)]
+            )
+
+            task_items = list(task.items.order_by('id'))
+            task_items = task_items[: min(len(task_items) // 2, COMPLETED_ITEMS)]
+            for user in task_users:
+                for offset, item in enumerate(task_items):
+                    results.append(
+                        result_cls(
+                            item=item,
+                            task=task,
+                            createdBy=user,
+                            start_time=1000000 + 60 * offset,
+                            end_time=1000000 + 60 * offset + 30,
+                            **_result_values(result_cls),
+                        )
+                    )
+
+        TaskAgenda._open_tasks.through.objects.bulk_create(open_tasks)
+        result_cls.objects.bulk_create(results)
+
+        # Only the first annotator is measured, who needs a progress cursor
+        TaskProgress.refresh(tasks[0], users[0])
+        return campaign
+
+    def assertWithinBudget(self, label, budget, measure, prepare=None):
+        """
+        Measures queries and time of measure(items, annotators) per scale.
+
+        If given, prepare(items, annotators) is called before measuring.
+
+        Budgets must hold on all scales; failures list the query patterns
+        which occur more often than on the smallest scale. Time budgets
+        are only checked if ENFORCE_TIME_BUDGETS is set.
+        """
+        max_queries, per_annotator, max_seconds = budget
+        baseline = None
+        for items, annotators in SCALES:
+            if prepare is not None:
+                prepare(items, annotators)
+
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                start = perf_counter()
+                measure(items, annotators)
+                seconds = perf_counter() - start
+
+            patterns = Counter(_query_pattern(x['sql']) for x in queries)
+            if baseline is None:
+                baseline = patterns
+
+            allowed = max_queries + per_annotator * annotators
+            within_time = seconds <= max_seconds or not ENFORCE_TIME_BUDGETS
+            if len(queries) <= allowed and within_time:
+                continue
+
+            grown = [
+                '  {0} -> {1}: {2}'.format(baseline[x], count, x)
+                for x, count in patterns.most_common()
+                if count > baseline[x]
+            ]
+            self.fail(
+                '{0} with {1} items, {2} annotators: {3} queries (budget {4}), '
+                '{5:.2f}s (budget {6:.2f}s); query patterns grown since {7} '
+                'items, {8} annotators:\n{9}'.format(
+                    label,
+                    items,
+                    annotators,
+                    len(queries),
+                    allowed,
+                    seconds,
+                    max_seconds,
+                    SCALES[0][0],
+                    SCALES[0][1],
+                    '\n'.join(grown) or '  none',
+                )
+            )
+
+
+class QueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.annotators[0])
+
+    def _assert_view_within_budget(self, task_cls):
+        url = reverse(TASK_URLS[task_cls])
+
+        def measure(items, annotators):
+            campaign = self.campaigns[task_cls, items, annotators]
+            response = self.client.get('{0}deu/{1}/'.format(url, campaign.campaignName))
+            self.assertEqual(response.status_code, 200)
+
+        self.assertWithinBudget(TASK_URLS[task_cls], VIEW_BUDGETS[task_cls], measure)
+
+    def _assert_next_item_within_budget(self, task_cls):
+        user = self.annotators[0]
+
+        def measure(items, annotators):
+            campaign = self.campaigns[task_cls, items, annotators]
+            task = task_cls.objects.filter(campaign=campaign).order_by('id').first()
+            self.assertIsNotNone(task.next_item_for_user(user))
+
+        self.assertWithinBudget(
+            '{0}.next_item_for_user'.format(task_cls.__name__),
+            NEXT_ITEM_BUDGETS[task_cls],
+            measure,
+        )
+
+    def test_direct_assessment_view(self):
+        self._assert_view_within_budget(DirectAssessmentTask)
+
+    def test_direct_assessment_context_view(self):
+        self._assert_view_within_budget(DirectAssessmentContextTask)
+
+    def test_direct_assessment_document_view(self):
+        self._assert_view_within_budget(DirectAssessmentDocumentTask)
+
+    def test_multimodal_assessment_view(self):
+        self._assert_view_within_budget(MultiModalAssessmentTask)
+
+    def test_pairwise_assessment_view(self):
+        self._assert_view_within_budget(PairwiseAssessmentTask)
+
+    def test_pairwise_assessment_document_view(self):
+        self._assert_view_within_budget(PairwiseAssessmentDocumentTask)
+
+    def test_data_assessment_view(self):
+        self._assert_view_within_budget(DataAssessmentTask)
+
+    def test_next_item_for_user(self):
+        for task_cls in EXAMPLE_BATCHES:
+            with self.subTest(task_cls.__name__):
+                self._assert_next_item_within_budget(task_cls)
+
+    def test_campaign_status(self):
+        self.client.force_login(self.owner)
+
+        def measure(items, annotators):
+            campaign = self.campaigns[DirectAssessmentTask, items, annotators]
+            response = self.client.get(
+                reverse('campaign_status', args=[campaign.campaignName])
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertContains(response, self.annotators[annotators - 1].username)
+
+        self.assertWithinBudget('campaign_status', CAMPAIGN_STATUS_BUDGET, measure)
+
+    def test_campaign_status_esa(self):
+        def measure(items, annotators):
+            campaign = self.campaigns[DirectAssessmentDocumentTask, items, annotators]
+            campaign.campaignOptions = 'ESA'
+            rows = collect_status_rows([campaign])[campaign.id]
+            response = campaign_status_esa(campaign.campaignName, rows)
+            self.assertContains(response, self.annotators[annotators - 1].username)
+
+        self.assertWithinBudget('campaign_status_esa', CAMPAIGN_STATUS_BUDGET, measure)
+
+    def test_dashboard(self):
+        def prepare(items, annotators):
+            # The dashboard covers all campaigns of the annotator
+            self.client.force_login(self.annotators[annotators - 1])
+
+        def measure(items, annotators):
+            response = self.client.get(reverse('dashboard'))
+            self.assertEqual(response.status_code, 200)
+
+        self.assertWithinBudget('dashboard', DASHBOARD_BUDGET, measure, prepare)
@@ -0,0 +1,134 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from Campaign.models import Campaign
+from EvalData.models import DirectAssessmentResult
+from EvalData.models import DirectAssessmentTask
+from EvalData.models import Market
+from EvalData.models import Metadata
+from EvalData.models import ObjectID
+from EvalData.models import TaskAgenda
+from EvalData.models import TextPair
+from EvalData.task_cache import get_cached_current_task
+from EvalData.task_cache import set_cached_current_task
+
+
+class CurrentTaskCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        """
+        Create two DirectAssessmentTask instances with one item each.
+        """
+        super(CurrentTaskCacheTests, cls).setUpClass()
+
+        cls.valid_user = User.objects.create(username='dummy-user')
+
+        cls.valid_campaign = Campaign()
+        cls.valid_campaign.createdBy = cls.valid_user
+        cls.valid_campaign.save()
+
+        market = Market.objects.create(
+            sourceLanguageCode='eng',
+            targetLanguageCode='deu',
+            domainName='TEST',
+            createdBy=cls.valid_user,
+        )
+        metadata = Metadata.objects.create(
+            market=market,
+            corpusName='TEST',
+            versionInfo='1.0',
+            source='MANUAL',
+            createdBy=cls.valid_user,
+        )
+
+        cls.tasks = []
+        for batch_no in (1, 2):
+            task = DirectAssessmentTask.objects.create(
+                campaign=cls.valid_campaign,
+                requiredAnnotations=1,
+                batchNo=batch_no,
+                createdBy=cls.valid_user,
+            )
+            task.items.add(
+                TextPair.objects.create(
+                    itemID=1,
+                    itemType='TGT',
+                    metadata=metadata,
+                    sourceID='src.txt',
+                    sourceText='Source',
+                    targetID='tgt.txt',
+                    targetText='Target',
+                    createdBy=cls.valid_user,
+                )
+            )
+            cls.tasks.append(task)
+
+    def setUp(self):
+        cache.clear()
+        set_cached_current_task(self.valid_user, self.valid_campaign, self.tasks[0])
+
+    def _annotate(self, task):
+        DirectAssessmentResult.objects.create(
+            score=50,
+            start_time=0,
+            end_time=1,
+            item=task.items.first(),
+            task=task,
+            createdBy=self.valid_user,
+            completed=True,
+        )
+
+    def test_cached_task_is_returned(self):
+        self.assertEqual(
+            get_cached_current_task(self.valid_user, self.valid_campaign),
+            self.tasks[0],
+        )
+        self.assertIsNone(get_cached_current_task(self.valid_user))
+
+    def test_result_for_cached_task_keeps_entry(self):
+        self._annotate(self.tasks[0])
+        self.assertEqual(
+            get_cached_current_task(self.valid_user, self.valid_campaign),
+            self.tasks[0],
+        )
+
+    def test_result_for_other_task_invalidates_entry(self):
+        self._annotate(self.tasks[1])
+        self.assertIsNone(get_cached_current_task(self.valid_user, self.valid_campaign))
+
+    def test_agenda_change_invalidates_entry(self):
+        agenda = TaskAgenda.objects.create(
+            user=self.valid_user, campaign=self.valid_campaign
+        )
+        set_cached_current_task(self.valid_user, self.valid_campaign, self.tasks[0])
+
+        agenda._open_tasks.add(
+            ObjectID.objects.create(
+                typeName='DirectAssessmentTask', primaryID=self.tasks[1].id
+            )
+        )
+        self.assertIsNone(get_cached_current_task(self.valid_user, self.valid_campaign))
+
+    def test_cached_task_must_be_open_in_agendas(self):
+        agenda = TaskAgenda.objects.create(
+            user=self.valid_user, campaign=self.valid_campaign
+        )
+        agenda._open_tasks.add(
+            ObjectID.objects.create(
+                typeName='DirectAssessmentTask', primaryID=self.tasks[0].id
+            )
+        )
+        agendas = TaskAgenda.objects.filter(user=self.valid_user)
+        set_cached_current_task(self.valid_user, self.valid_campaign, self.tasks[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                get_cached_current_task(self.valid_user, self.valid_campaign, agendas),
+                self.tasks[0],
+            )
+
+        # Changes in other processes do not invalidate the entry here
+        TaskAgenda._open_tasks.through.objects.filter(taskagenda=agenda).delete()
+        self.assertIsNone(
+            get_cached_current_task(self.valid_user, self.valid_campaign, agendas)
+        )
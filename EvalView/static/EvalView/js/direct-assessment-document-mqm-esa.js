@@ -93,6 +93,10 @@ String.prototype.capitalize = function () {
 
 var MQM_HANDLERS = {}
 var MQM_TYPE;
+// payload of the next document, prefetched while the current one is annotated
+var NEXT_DOCUMENT = null;
+// latest progress counters returned by the server
+var LAST_PROGRESS = null;
 
 async function get_error_type() {
     // ESA doesn't have error types
@@ -129,9 +133,7 @@ async function get_error_type() {
     return error_stack
 }
 
-$(document).ready(() => {
-    MQM_TYPE = JSON.parse($('#mqm-type-payload').html())
-
+function init_document_items() {
     // sliders are present only for ESA
     if (MQM_TYPE != "ESA") {
         $(".esa_slider").toggle(false)
@@ -145,13 +147,24 @@ $(document).ready(() => {
         }
     });
 
+    MQM_HANDLERS = {}
+    $(".item-box").each((_i, el) => {
+        MQM_HANDLERS[$(el).attr("data-item-id")] = new MQMItemHandler(el)
+    })
+
+    // show submit button only on MQM and not ESA
+    $(".button-submit").toggle(MQM_TYPE == "MQM")
+}
+
+$(document).ready(() => {
+    MQM_TYPE = JSON.parse($('#mqm-type-payload').html())
+
     // hide next doc button for now
     toggle_doc_button(false)
     $("#button-next-doc").on("click", () => submit_finish_document(false))
 
-    $(".item-box").each((_i, el) => {
-        MQM_HANDLERS[$(el).attr("data-item-id")] = new MQMItemHandler(el)
-    })
+    init_document_items()
+    prefetch_next_document()
 
     $("#form-next-doc > input[name='start_timestamp']").val(Date.now() / 1000)
 
@@ -171,9 +184,6 @@ $(document).ready(() => {
 
     $("#form-next-doc > input[name='start_timestamp']").val(Date.now() / 1000)
 
-    // show submit button only on MQM and not ESA
-    $(".button-submit").toggle(MQM_TYPE == "MQM")
-
     let instructions_show = localStorage.getItem("appraise-instructions-show")
     if (instructions_show == null) instructions_show = true;
     else instructions_show = instructions_show == "true";
@@ -216,6 +226,10 @@ function submit_form_ajax(item_box) {
             console.log(`Success, saved=${data.saved} next_item=${data.item_id}`);
             if (data.saved) {
                 _change_item_status_icon(item_box, 'ok');
+                // only new results come with progress counters
+                if (data.items_completed !== undefined) {
+                    LAST_PROGRESS = data;
+                }
 
             } else {
                 _change_item_status_icon(item_box, 'warning-sign');
@@ -256,14 +270,68 @@ async function submit_finish_document(override_tutorial_check=false) {
             await submit_form_ajax($(el))
         }
 
-        // trigger hidden form if all is good
-        $("#form-next-doc").trigger("submit")
+        // show the prefetched document if available, otherwise trigger
+        // hidden form to load the next document from the server
+        if (NEXT_DOCUMENT && NEXT_DOCUMENT.document) {
+            show_next_document()
+        } else {
+            $("#form-next-doc").trigger("submit")
+        }
     } catch {
         // re-enable next doc button in a few seconds if not
         await new Promise(resolve => setTimeout(resolve, 5_000))
         $("#button-next-doc").prop('disabled', false);
     }
 }
+function prefetch_next_document() {
+    NEXT_DOCUMENT = null
+
+    // prefetching is not supported by all templates
+    let next_url = $("#document-items").attr("data-next-url")
+    if (!next_url) {
+        return
+    }
+
+    $.ajax({
+        url: next_url,
+        data: { after: $(".item-box input[name='task_id']").first().val() },
+        type: 'GET',
+        dataType: 'json',
+        success: function (data) {
+            NEXT_DOCUMENT = data;
+        },
+        error: function (x, s, t) {
+            // the next document is loaded with a page reload instead
+            console.log('Prefetch error:', x, s, t);
+        },
+    });
+}
+
+function show_next_document() {
+    // the prefetched counters miss items saved since, but save responses
+    // may be missing or stale; counters only grow, so take the larger one
+    let progress = {}
+    for (const key of ['docs_completed', 'docs_total', 'items_completed', 'items_total']) {
+        progress[key] = Math.max(NEXT_DOCUMENT[key], LAST_PROGRESS ? LAST_PROGRESS[key] : 0)
+    }
+    LAST_PROGRESS = null
+    $("#task_progress").text(
+        `Completed ${progress.docs_completed}/${progress.docs_total} documents, ` +
+        `${progress.items_completed}/${progress.items_total} segments`
+    )
+
+    $("#tutorial-text").toggle(false)
+    $("#document-items").html(NEXT_DOCUMENT.document.html)
+    init_document_items()
+
+    toggle_doc_button(false)
+    $("#button-next-doc").prop('disabled', false);
+    $("#form-next-doc > input[name='start_timestamp']").val(Date.now() / 1000)
+    window.scrollTo(0, 0)
+
+    prefetch_next_document()
+}
+
 function decodeEntities(html) {
     var txt = document.createElement("textarea");
     txt.innerHTML = html;
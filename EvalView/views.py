@@ -6,15 +6,21 @@ See LICENSE for usage details
 
 from datetime import datetime
 from datetime import timezone
+from json import loads
 
 utc = timezone.utc
 
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.http import JsonResponse
 from django.shortcuts import redirect
 from django.shortcuts import render
+from django.template.loader import render_to_string
 from django.utils.html import escape
+from django.views.decorators.http import require_POST
 
+from Appraise.request_timing import debug_times
+from Appraise.request_timing import mark_phase
 from Appraise.settings import BASE_CONTEXT
 from Appraise.utils import _get_logger
 from Campaign.models import Campaign
@@ -34,6 +40,10 @@ from EvalData.models import PairwiseAssessmentDocumentTask
 from EvalData.models import PairwiseAssessmentResult
 from EvalData.models import PairwiseAssessmentTask
 from EvalData.models import TaskAgenda
+from EvalData.models import TaskProgress
+from EvalData.task_cache import get_cached_current_task
+from EvalData.task_cache import invalidate_cached_current_task
+from EvalData.task_cache import set_cached_current_task
 
 # pylint: disable=import-error
 
@@ -41,13 +51,63 @@ LOGGER = _get_logger(name=__name__)
 
 # pylint: disable=C0103,C0330
 
+# Maximum number of items accepted in a single batch submission
+MAX_SUBMITTED_ITEMS = 500
+
+
+def _get_current_task_from_agendas(user, campaign, agendas):
+    """
+    Returns (current_task, campaign) from the given task agendas for user.
+
+    The current task is cached per (user, campaign) and only validated
+    to be open in the agendas and with next_item_for_user() on cache hits.
+    Otherwise, all open tasks in the agendas are checked and tasks without
+    remaining items completed.
+    """
+    current_task = get_cached_current_task(user, campaign, agendas)
+    if current_task is not None:
+        if current_task.next_item_for_user(user) is not None:
+            LOGGER.info('Using cached current task %s', current_task)
+            return (current_task, campaign or current_task.campaign)
+
+        current_task = None
+
+    requested_campaign = campaign
+    for agenda in agendas:
+        LOGGER.info('Identified work agenda %s', agenda)
+
+        tasks_to_complete = []
+        for serialized_open_task, open_task in agenda.resolved_open_tasks():
+            # Skip tasks which are not available anymore
+            if open_task is None:
+                continue
+
+            if open_task.next_item_for_user(user) is not None:
+                current_task = open_task
+                if not campaign:
+                    campaign = agenda.campaign
+            else:
+                tasks_to_complete.append(serialized_open_task)
+
+        modified = False
+        for task in tasks_to_complete:
+            modified = agenda.complete_open_task(task) or modified
+
+        if modified:
+            agenda.save()
+
+    if current_task is not None:
+        set_cached_current_task(user, requested_campaign, current_task)
+
+    return (current_task, campaign)
+
 
 @login_required
 def direct_assessment(request, code=None, campaign_name=None):
     """
     Direct assessment annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -64,38 +124,15 @@ def direct_assessment(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -117,7 +154,7 @@ def direct_assessment(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = DirectAssessmentTask.get_next_free_task_for_language(
+        next_task = DirectAssessmentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -125,7 +162,6 @@ def direct_assessment(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -139,7 +175,7 @@ def direct_assessment(request, code=None, campaign_name=None):
             LOGGER.info(_msg)
             campaign = current_task.campaign
 
-    t2 = datetime.now()
+    mark_phase('save')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -167,19 +203,21 @@ def direct_assessment(request, code=None, campaign_name=None):
             else:
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
                 # pylint: disable=E1101
-                DirectAssessmentResult.objects.create(
-                    score=score,
-                    start_time=float(start_timestamp),
-                    end_time=float(end_timestamp),
-                    item=current_item,
-                    task=current_task,
-                    createdBy=request.user,
-                    activated=False,
-                    completed=True,
-                    dateCompleted=utc_now,
-                )
+                with transaction.atomic():
+                    DirectAssessmentResult.objects.create(
+                        score=score,
+                        start_time=float(start_timestamp),
+                        end_time=float(end_timestamp),
+                        item=current_item,
+                        task=current_task,
+                        createdBy=request.user,
+                        activated=False,
+                        completed=True,
+                        dateCompleted=utc_now,
+                    )
+                    TaskProgress.advance(current_task, request.user, [current_item])
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -197,8 +235,6 @@ def direct_assessment(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     # Define priming question
     #
     # Default:
@@ -275,7 +311,7 @@ def direct_assessment(request, code=None, campaign_name=None):
         'items_left_in_block': 10 - (completed_items - completed_blocks * 10),
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -283,6 +319,7 @@ def direct_assessment(request, code=None, campaign_name=None):
     }
     context.update(BASE_CONTEXT)
 
+    mark_phase('render')
     return render(request, html_file, context)
 
 
@@ -292,7 +329,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
     """
     Direct assessment context annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -309,38 +346,15 @@ def direct_assessment_context(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -362,7 +376,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = DirectAssessmentContextTask.get_next_free_task_for_language(
+        next_task = DirectAssessmentContextTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -370,7 +384,6 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -384,7 +397,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             LOGGER.info(_msg)
             campaign = current_task.campaign
 
-    t2 = datetime.now()
+    mark_phase('save')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -415,19 +428,21 @@ def direct_assessment_context(request, code=None, campaign_name=None):
             else:
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
                 # pylint: disable=E1101
-                DirectAssessmentContextResult.objects.create(
-                    score=score,
-                    start_time=float(start_timestamp),
-                    end_time=float(end_timestamp),
-                    item=current_item,
-                    task=current_task,
-                    createdBy=request.user,
-                    activated=False,
-                    completed=True,
-                    dateCompleted=utc_now,
-                )
+                with transaction.atomic():
+                    DirectAssessmentContextResult.objects.create(
+                        score=score,
+                        start_time=float(start_timestamp),
+                        end_time=float(end_timestamp),
+                        item=current_item,
+                        task=current_task,
+                        createdBy=request.user,
+                        activated=False,
+                        completed=True,
+                        dateCompleted=utc_now,
+                    )
+                    TaskProgress.advance(current_task, request.user, [current_item])
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -445,8 +460,6 @@ def direct_assessment_context(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     # Define priming question
     #
     # Default:
@@ -521,7 +534,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
         'items_left_in_block': 10 - (completed_items - completed_blocks * 10),
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -529,6 +542,7 @@ def direct_assessment_context(request, code=None, campaign_name=None):
     }
     context.update(BASE_CONTEXT)
 
+    mark_phase('render')
     return render(request, 'EvalView/direct-assessment-context.html', context)
 
 
@@ -539,7 +553,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     Direct assessment document annotation view.
     """
 
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -556,38 +570,15 @@ def direct_assessment_document(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -609,7 +600,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = DirectAssessmentDocumentTask.get_next_free_task_for_language(
+        next_task = DirectAssessmentDocumentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -617,7 +608,6 @@ def direct_assessment_document(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -639,7 +629,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     # Handling POST requests differs from the original direct_assessment/
     # direct_assessment_context view, but the input is the same: a score for the
     # single submitted item
-    t2 = datetime.now()
+    mark_phase('save')
     ajax = False
     item_saved = False
     error_msg = ''
@@ -687,17 +677,19 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                 ):
                     utc_now = datetime.utcnow().replace(tzinfo=utc)
                     # pylint: disable=E1101
-                    DirectAssessmentDocumentResult.objects.create(
-                        score=score,
-                        start_time=float(start_timestamp),
-                        end_time=float(end_timestamp),
-                        item=current_item,
-                        task=current_task,
-                        createdBy=request.user,
-                        activated=False,
-                        completed=True,
-                        dateCompleted=utc_now,
-                    )
+                    with transaction.atomic():
+                        DirectAssessmentDocumentResult.objects.create(
+                            score=score,
+                            start_time=float(start_timestamp),
+                            end_time=float(end_timestamp),
+                            item=current_item,
+                            task=current_task,
+                            createdBy=request.user,
+                            activated=False,
+                            completed=True,
+                            dateCompleted=utc_now,
+                        )
+                        TaskProgress.advance(current_task, request.user, [current_item])
                     print('Item {} (itemID={}) saved'.format(task_id, item_id))
                     item_saved = True
 
@@ -751,17 +743,21 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                         if found_item:
                             utc_now = datetime.utcnow().replace(tzinfo=utc)
                             # pylint: disable=E1101
-                            DirectAssessmentDocumentResult.objects.create(
-                                score=score,
-                                start_time=float(start_timestamp),
-                                end_time=float(end_timestamp),
-                                item=found_item,
-                                task=current_task,
-                                createdBy=request.user,
-                                activated=False,
-                                completed=True,
-                                dateCompleted=utc_now,
-                            )
+                            with transaction.atomic():
+                                DirectAssessmentDocumentResult.objects.create(
+                                    score=score,
+                                    start_time=float(start_timestamp),
+                                    end_time=float(end_timestamp),
+                                    item=found_item,
+                                    task=current_task,
+                                    createdBy=request.user,
+                                    activated=False,
+                                    completed=True,
+                                    dateCompleted=utc_now,
+                                )
+                                TaskProgress.advance(
+                                    current_task, request.user, [found_item]
+                                )
                             _msg = 'Item {} (itemID={}) saved, although it was not the next item'.format(
                                 task_id, item_id
                             )
@@ -796,7 +792,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
                     'please reload the page and try again.'
                 )
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     # Get all items from the document that the first unannotated item in the
     # task belongs to, and collect some additional statistics
@@ -851,8 +847,6 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     # By default, source and target items are text segments
     source_item_type = 'text'
     target_item_type = 'text'
@@ -1039,7 +1033,7 @@ def direct_assessment_document(request, code=None, campaign_name=None):
         'target_language': target_language,
         'source_item_type': source_item_type,
         'target_item_type': target_item_type,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -1071,9 +1065,43 @@ def direct_assessment_document(request, code=None, campaign_name=None):
     context.update(page_context)
     context.update(BASE_CONTEXT)
 
+    mark_phase('render')
     return render(request, 'EvalView/direct-assessment-document.html', context)
 
 
+def _mqmesa_document_scores(doc_items, doc_items_results):
+    """
+    Returns item scores for the MQM/ESA templates from the given results.
+
+    Also escapes the source texts of doc_items for rendering.
+    """
+    # TODO: hotfix for WMT24 and WMT25
+    # Tracking issue: https://github.com/AppraiseDev/Appraise/issues/185
+    for item in doc_items:
+        # don't escape HTML video, audio or images
+        if (
+            item.sourceText.strip().startswith("<video") or
+            item.sourceText.strip().startswith("<audio") or
+            item.sourceText.strip().startswith("<img")
+        ):
+            continue
+        item.sourceText = escape(item.sourceText)
+
+    # Get item scores from the latest corresponding results
+    return [
+        {
+            'completed': bool(result and result.completed),
+            # will be recomputed user-side anyway
+            'score': result.score if result else -1,
+            'mqm': result.mqm if result else item.mqm,
+            'mqm_orig': item.mqm,
+            'start_timestamp': result.start_time if result else "",
+            'end_timestamp': result.end_time if result else "",
+        }
+        for item, result in zip(doc_items, doc_items_results)
+    ]
+
+
 def direct_assessment_document_mqmesa(campaign, current_task, request):
     """
     Direct assessment document annotation view with MQM/ESA.
@@ -1082,6 +1110,7 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
     contrastive_esa = 'contrastiveesa' in campaign_opts
 
     # POST means that we want to store
+    mark_phase('save')
     if request.method == "POST":
         score = request.POST.get('score', None)
         mqm = request.POST.get('mqm', None)
@@ -1110,20 +1139,23 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
         else:
             # Use update_or_create to prevent duplicate saves when items are
             # submitted multiple times (e.g., on Submit button click + Continue button click)
-            result, created = DirectAssessmentDocumentResult.objects.update_or_create(
-                item=list(db_item)[0],
-                task=current_task,
-                createdBy=request.user,
-                defaults={
-                    'score': score,
-                    'mqm': mqm,
-                    'start_time': float(start_timestamp),
-                    'end_time': float(end_timestamp),
-                    'activated': False,
-                    'completed': True,
-                    'dateCompleted': datetime.utcnow().replace(tzinfo=utc),
-                }
-            )
+            with transaction.atomic():
+                result, created = DirectAssessmentDocumentResult.objects.update_or_create(
+                    item=list(db_item)[0],
+                    task=current_task,
+                    createdBy=request.user,
+                    defaults={
+                        'score': score,
+                        'mqm': mqm,
+                        'start_time': float(start_timestamp),
+                        'end_time': float(end_timestamp),
+                        'activated': False,
+                        'completed': True,
+                        'dateCompleted': datetime.utcnow().replace(tzinfo=utc),
+                    }
+                )
+                if created:
+                    TaskProgress.advance(current_task, request.user, [result.item])
             action = 'created' if created else 'updated'
             error_msg = f'Item {task_id} (itemID={item_id}) {action}'
             LOGGER.info(error_msg)
@@ -1131,9 +1163,19 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
 
         LOGGER.info(f'score={score}, item_id={item_id}, mqm={mqm}')
         print(f'Got request score={score}, item_id={item_id}, ajax={ajax}, mqm={mqm}')
-    else:
-        ajax = False
 
+        # Ajax saves only get the progress delta, the whole task state is
+        # recomputed when the next document is loaded. Updated results do
+        # not change any counters, so they get no delta.
+        if ajax:
+            context = {'saved': item_saved, 'error_msg': error_msg}
+            if item_saved and created:
+                context.update(
+                    current_task.progress_delta_mqmesa(request.user, result.item)
+                )
+            return JsonResponse(context)
+
+    mark_phase('item')
     # Get all items from the document that the first unannotated item in the
     # task belongs to, and collect some additional statistics
     (
@@ -1147,42 +1189,10 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
     ) = current_task.next_document_for_user_mqmesa(request.user)
 
     if not next_item:
-        if not ajax:
-            LOGGER.info('No next item detected, redirecting to dashboard')
-            return redirect('dashboard')
-        else:
-            context = {}
-            ajax_context = {'saved': item_saved, 'error_msg': error_msg}
-            context.update(ajax_context)
-            context.update(BASE_CONTEXT)
-            # Send response to the Ajax POST request
-            return JsonResponse(context)
-
-    # TODO: hotfix for WMT24 and WMT25
-    # Tracking issue: https://github.com/AppraiseDev/Appraise/issues/185
-    for item in doc_items:
-        # don't escape HTML video, audio or images
-        if (
-            item.sourceText.strip().startswith("<video") or
-            item.sourceText.strip().startswith("<audio") or
-            item.sourceText.strip().startswith("<img")
-        ):
-            continue
-        item.sourceText = escape(item.sourceText)
+        LOGGER.info('No next item detected, redirecting to dashboard')
+        return redirect('dashboard')
 
-    # Get item scores from the latest corresponding results
-    doc_items_results = [
-        {
-            'completed': bool(result and result.completed),
-            # will be recomputed user-side anyway
-            'score': result.score if result else -1,
-            'mqm': result.mqm if result else item.mqm,
-            'mqm_orig': item.mqm,
-            'start_timestamp': result.start_time if result else "",
-            'end_timestamp': result.end_time if result else "",
-        }
-        for item, result in zip(doc_items, doc_items_results)
-    ]
+    doc_items_results = _mqmesa_document_scores(doc_items, doc_items_results)
 
     LOGGER.info(f'items_completed={items_completed}, docs_completed={docs_completed}')
 
@@ -1225,15 +1235,9 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
         'ui_lang': "enu",
         'mqm_type': 'ESA' if 'esa' in campaign_opts else "MQM",
         'guidelines': guidelines,
+        'current_task_id': current_task.id,
     }
 
-    if ajax:
-        ajax_context = {'saved': item_saved, 'error_msg': error_msg}
-        context.update(ajax_context)
-        context.update(BASE_CONTEXT)
-        # Send response to the Ajax POST request
-        return JsonResponse(context)
-
     page_context = {
         'items': list(zip(doc_items, doc_items_results)),
         'reference_label': 'Source text',
@@ -1246,6 +1250,8 @@ def direct_assessment_document_mqmesa(campaign, current_task, request):
         html_page = 'EvalView/direct-assessment-document-mqm-esa-contrastive.html'
     else:
         html_page = 'EvalView/direct-assessment-document-mqm-esa.html'
+
+    mark_phase('render')
     return render(request, html_page, context)
 
 
@@ -1255,7 +1261,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
     """
     Multi modal assessment annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -1272,38 +1278,15 @@ def multimodal_assessment(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        modified = False
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -1322,7 +1305,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
 
         _msg = 'Identifying next task for code "%s", campaign="%s"'
         LOGGER.info(_msg, code, campaign)
-        next_task = MultiModalAssessmentTask.get_next_free_task_for_language(
+        next_task = MultiModalAssessmentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -1330,7 +1313,6 @@ def multimodal_assessment(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -1344,7 +1326,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
             LOGGER.info(_msg)
             campaign = current_task.campaign
 
-    t2 = datetime.now()
+    mark_phase('save')
     if request.method == "POST":
         score = request.POST.get('score', None)
         item_id = request.POST.get('item_id', None)
@@ -1372,19 +1354,21 @@ def multimodal_assessment(request, code=None, campaign_name=None):
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
 
                 # pylint: disable=E1101
-                MultiModalAssessmentResult.objects.create(
-                    score=score,
-                    start_time=float(start_timestamp),
-                    end_time=float(end_timestamp),
-                    item=current_item,
-                    task=current_task,
-                    createdBy=request.user,
-                    activated=False,
-                    completed=True,
-                    dateCompleted=utc_now,
-                )
+                with transaction.atomic():
+                    MultiModalAssessmentResult.objects.create(
+                        score=score,
+                        start_time=float(start_timestamp),
+                        end_time=float(end_timestamp),
+                        item=current_item,
+                        task=current_task,
+                        createdBy=request.user,
+                        activated=False,
+                        completed=True,
+                        dateCompleted=utc_now,
+                    )
+                    TaskProgress.advance(current_task, request.user, [current_item])
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -1402,8 +1386,6 @@ def multimodal_assessment(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     context = {
         'active_page': 'multimodal-assessment',
         'reference_text': current_item.sourceText,
@@ -1415,7 +1397,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
         'items_left_in_block': 10 - (completed_items - completed_blocks * 10),
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -1423,6 +1405,7 @@ def multimodal_assessment(request, code=None, campaign_name=None):
     }
     context.update(BASE_CONTEXT)
 
+    mark_phase('render')
     return render(request, 'EvalView/multimodal-assessment.html', context)
 
 
@@ -1432,7 +1415,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
     """
     Pairwise direct assessment annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -1449,38 +1432,15 @@ def pairwise_assessment(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -1502,7 +1462,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = PairwiseAssessmentTask.get_next_free_task_for_language(
+        next_task = PairwiseAssessmentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -1510,7 +1470,6 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -1524,7 +1483,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             LOGGER.info(_msg)
             campaign = current_task.campaign
 
-    t2 = datetime.now()
+    mark_phase('save')
     if request.method == "POST":
         score1 = request.POST.get('score', None)  # TODO: score -> score1
         score2 = request.POST.get('score2', None)
@@ -1566,24 +1525,26 @@ def pairwise_assessment(request, code=None, campaign_name=None):
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
 
                 # pylint: disable=E1101
-                PairwiseAssessmentResult.objects.create(
-                    score1=score1,
-                    score2=score2,
-                    start_time=float(start_timestamp),
-                    end_time=float(end_timestamp),
-                    item=current_item,
-                    task=current_task,
-                    createdBy=request.user,
-                    activated=False,
-                    completed=True,
-                    dateCompleted=utc_now,
-                    sourceErrors=source_error,
-                    errors1=error1,
-                    errors2=error2,
-                    metadata=metadata,
-                )
+                with transaction.atomic():
+                    PairwiseAssessmentResult.objects.create(
+                        score1=score1,
+                        score2=score2,
+                        start_time=float(start_timestamp),
+                        end_time=float(end_timestamp),
+                        item=current_item,
+                        task=current_task,
+                        createdBy=request.user,
+                        activated=False,
+                        completed=True,
+                        dateCompleted=utc_now,
+                        sourceErrors=source_error,
+                        errors1=error1,
+                        errors2=error2,
+                        metadata=metadata,
+                    )
+                    TaskProgress.advance(current_task, request.user, [current_item])
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -1599,8 +1560,6 @@ def pairwise_assessment(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     # Define priming question
     #
     # Default:
@@ -1742,7 +1701,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
             )
         )
 
-    num_items_total = current_task.items.count()
+    num_items_total = current_task.item_count()
     num_items_done = completed_items
 
     context = {
@@ -1766,7 +1725,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
         'items_left_in_block': 10 - (completed_items - completed_blocks * 10),
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -1781,6 +1740,7 @@ def pairwise_assessment(request, code=None, campaign_name=None):
     context.update(BASE_CONTEXT)
 
     html_page = 'EvalView/pairwise-assessment-v2.html' if ui_v2 else 'EvalView/pairwise-assessment.html'
+    mark_phase('render')
     return render(request, html_page, context)
 
 
@@ -1790,7 +1750,7 @@ def data_assessment(request, code=None, campaign_name=None):
     """
     Direct data assessment annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -1807,38 +1767,15 @@ def data_assessment(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -1860,7 +1797,7 @@ def data_assessment(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = DataAssessmentTask.get_next_free_task_for_language(
+        next_task = DataAssessmentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -1868,7 +1805,6 @@ def data_assessment(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -1882,7 +1818,7 @@ def data_assessment(request, code=None, campaign_name=None):
             LOGGER.info(_msg)
             campaign = current_task.campaign
 
-    t2 = datetime.now()
+    mark_phase('save')
     if request.method == "POST":
         score = request.POST.get('score', None)
         rank = request.POST.get('rank', None)
@@ -1917,20 +1853,22 @@ def data_assessment(request, code=None, campaign_name=None):
                 utc_now = datetime.utcnow().replace(tzinfo=utc)
 
                 # pylint: disable=E1101
-                DataAssessmentResult.objects.create(
-                    score=score,
-                    rank=rank,
-                    start_time=float(start_timestamp),
-                    end_time=float(end_timestamp),
-                    item=current_item,
-                    task=current_task,
-                    createdBy=request.user,
-                    activated=False,
-                    completed=True,
-                    dateCompleted=utc_now,
-                )
+                with transaction.atomic():
+                    DataAssessmentResult.objects.create(
+                        score=score,
+                        rank=rank,
+                        start_time=float(start_timestamp),
+                        end_time=float(end_timestamp),
+                        item=current_item,
+                        task=current_task,
+                        createdBy=request.user,
+                        activated=False,
+                        completed=True,
+                        dateCompleted=utc_now,
+                    )
+                    TaskProgress.advance(current_task, request.user, [current_item])
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     current_item, completed_items = current_task.next_item_for_user(
         request.user, return_completed_items=True
@@ -1946,8 +1884,6 @@ def data_assessment(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     source_label = 'Source text'
     target_label = 'Translation'
     top_question_text = [
@@ -2015,7 +1951,7 @@ def data_assessment(request, code=None, campaign_name=None):
         'items_left_in_block': 10 - (completed_items - completed_blocks * 10),
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'show_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -2023,6 +1959,7 @@ def data_assessment(request, code=None, campaign_name=None):
     }
     context.update(BASE_CONTEXT)
 
+    mark_phase('render')
     return render(request, 'EvalView/data-assessment.html', context)
 
 
@@ -2032,7 +1969,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     """
     Pairwise direct assessment document annotation view.
     """
-    t1 = datetime.now()
+    mark_phase('agenda')
 
     campaign = None
     if campaign_name:
@@ -2049,38 +1986,15 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
         request.user.username or "Anonymous",
     )
 
-    current_task = None
-
     # Try to identify TaskAgenda for current user.
     agendas = TaskAgenda.objects.filter(user=request.user)
 
     if campaign:
         agendas = agendas.filter(campaign=campaign)
 
-    for agenda in agendas:
-        LOGGER.info('Identified work agenda %s', agenda)
-
-        tasks_to_complete = []
-        for serialized_open_task in agenda.serialized_open_tasks():
-            open_task = serialized_open_task.get_object_instance()
-
-            # Skip tasks which are not available anymore
-            if open_task is None:
-                continue
-
-            if open_task.next_item_for_user(request.user) is not None:
-                current_task = open_task
-                if not campaign:
-                    campaign = agenda.campaign
-            else:
-                tasks_to_complete.append(serialized_open_task)
-
-        modified = False
-        for task in tasks_to_complete:
-            modified = agenda.complete_open_task(task) or modified
-
-        if modified:
-            agenda.save()
+    current_task, campaign = _get_current_task_from_agendas(
+        request.user, campaign, agendas
+    )
 
     if not current_task and agendas.count() > 0:
         LOGGER.info('Work agendas completed, redirecting to dashboard')
@@ -2104,7 +2018,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
             code,
             campaign,
         )
-        next_task = PairwiseAssessmentDocumentTask.get_next_free_task_for_language(
+        next_task = PairwiseAssessmentDocumentTask.claim_next_free_task_for_language(
             code, campaign, request.user
         )
 
@@ -2112,7 +2026,6 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
             LOGGER.info('No next task detected, redirecting to dashboard')
             return redirect('dashboard')
 
-        next_task.assignedTo.add(request.user)
         next_task.save()
 
         current_task = next_task
@@ -2128,7 +2041,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
 
     # Handling POST requests differs from the original direct_assessment/
     # direct_assessment_context view
-    t2 = datetime.now()
+    mark_phase('save')
     ajax = False
     item_saved = False
     error_msg = ''
@@ -2183,19 +2096,21 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
 
                     utc_now = datetime.utcnow().replace(tzinfo=utc)
                     # pylint: disable=E1101
-                    PairwiseAssessmentDocumentResult.objects.create(
-                        score1=score1,
-                        score2=score2,
-                        start_time=float(start_timestamp),
-                        end_time=float(end_timestamp),
-                        browser_info=browser_info,
-                        item=current_item,
-                        task=current_task,
-                        createdBy=request.user,
-                        activated=False,
-                        completed=True,
-                        dateCompleted=utc_now,
-                    )
+                    with transaction.atomic():
+                        PairwiseAssessmentDocumentResult.objects.create(
+                            score1=score1,
+                            score2=score2,
+                            start_time=float(start_timestamp),
+                            end_time=float(end_timestamp),
+                            browser_info=browser_info,
+                            item=current_item,
+                            task=current_task,
+                            createdBy=request.user,
+                            activated=False,
+                            completed=True,
+                            dateCompleted=utc_now,
+                        )
+                        TaskProgress.advance(current_task, request.user, [current_item])
                     print('Item {} (itemID={}) saved'.format(task_id, item_id))
                     item_saved = True
 
@@ -2253,19 +2168,23 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                         if found_item:
                             utc_now = datetime.utcnow().replace(tzinfo=utc)
                             # pylint: disable=E1101
-                            PairwiseAssessmentDocumentResult.objects.create(
-                                score1=score1,
-                                score2=score2,
-                                start_time=float(start_timestamp),
-                                end_time=float(end_timestamp),
-                                browser_info=browser_info,
-                                item=found_item,
-                                task=current_task,
-                                createdBy=request.user,
-                                activated=False,
-                                completed=True,
-                                dateCompleted=utc_now,
-                            )
+                            with transaction.atomic():
+                                PairwiseAssessmentDocumentResult.objects.create(
+                                    score1=score1,
+                                    score2=score2,
+                                    start_time=float(start_timestamp),
+                                    end_time=float(end_timestamp),
+                                    browser_info=browser_info,
+                                    item=found_item,
+                                    task=current_task,
+                                    createdBy=request.user,
+                                    activated=False,
+                                    completed=True,
+                                    dateCompleted=utc_now,
+                                )
+                                TaskProgress.advance(
+                                    current_task, request.user, [found_item]
+                                )
                             _msg = 'Item {} (itemID={}) saved, although it was not the next item'.format(
                                 task_id, item_id
                             )
@@ -2300,7 +2219,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
                     'please reload the page and try again.'
                 )
 
-    t3 = datetime.now()
+    mark_phase('item')
 
     # Get all items from the document that the first unannotated item in the
     # task belongs to, and collect some additional statistics
@@ -2376,8 +2295,6 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     source_language = current_task.marketSourceLanguage()
     target_language = current_task.marketTargetLanguage()
 
-    t4 = datetime.now()
-
     reference_label = 'Source text'
     candidate1_label = 'Translation A'
     candidate2_label = 'Translation B'
@@ -2488,7 +2405,7 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
         'items_left_in_block': len(block_items) - completed_items_in_block,
         'source_language': source_language,
         'target_language': target_language,
-        'debug_times': (t2 - t1, t3 - t2, t4 - t3, t4 - t1),
+        'debug_times': debug_times(),
         'template_debug': 'debug' in request.GET,
         'campaign': campaign.campaignName,
         'datask_id': current_task.id,
@@ -2526,4 +2443,176 @@ def pairwise_assessment_document(request, code=None, campaign_name=None):
     template = 'EvalView/pairwise-assessment-document.html'
     if new_ui:
         template = 'EvalView/pairwise-assessment-document-newui.html'
+    mark_phase('render')
     return render(request, template, context)
+
+
+def _get_task_for_user(user, task_cls, task_id):
+    """
+    Returns task with the given id if user may annotate it, or None.
+
+    The task has to be assigned to the user or be open in one of the
+    user's task agendas.
+    """
+    current_task = task_cls.objects.filter(id=task_id).first()
+    if current_task is None or current_task.assignedTo.filter(id=user.id).exists():
+        return current_task
+
+    agendas = TaskAgenda.objects.filter(
+        user=user,
+        _open_tasks__typeName=task_cls.__name__,
+        _open_tasks__primaryID=task_id,
+    )
+    if not agendas.exists():
+        return None
+
+    return current_task
+
+
+def _submit_document_results(request, task_cls):
+    """
+    Stores results for multiple items of a document task at once.
+
+    Expects a JSON body {"task": <task id>, "items": [...]}, with items
+    in the format described in bulk_submit_results(). The task has to be
+    available to the user, see _get_task_for_user(), and still active.
+    Responds with the number of saved items and the per-item status.
+    """
+    try:
+        payload = loads(request.body)
+        task_id = int(payload['task'])
+        submissions = payload['items']
+        if not isinstance(submissions, list) or not all(
+            isinstance(x, dict) for x in submissions
+        ):
+            raise TypeError('items must be a list of objects')
+
+    except (KeyError, TypeError, ValueError) as error:
+        error_msg = f'Invalid submission: {error}'
+        LOGGER.error(error_msg)
+        return JsonResponse({'saved': 0, 'error_msg': error_msg}, status=400)
+
+    if len(submissions) > MAX_SUBMITTED_ITEMS:
+        error_msg = f'Too many items, at most {MAX_SUBMITTED_ITEMS} are accepted'
+        LOGGER.error(error_msg)
+        return JsonResponse({'saved': 0, 'error_msg': error_msg}, status=400)
+
+    current_task = _get_task_for_user(request.user, task_cls, task_id)
+    if current_task is None:
+        error_msg = f'Task {task_id} is not available for the current user'
+        LOGGER.error(error_msg)
+        return JsonResponse({'saved': 0, 'error_msg': error_msg}, status=403)
+
+    if not current_task.activated or current_task.completed:
+        error_msg = f'Task {task_id} is not active anymore'
+        LOGGER.error(error_msg)
+        return JsonResponse({'saved': 0, 'error_msg': error_msg}, status=403)
+
+    statuses = current_task.submit_results(request.user, submissions)
+    saved = len([x for x in statuses if x['accepted']])
+    LOGGER.info('Saved %s/%s items for task %s', saved, len(statuses), current_task)
+
+    # Bulk inserts do not send post_save signals
+    invalidate_cached_current_task(
+        request.user.id,
+        current_task.campaign_id,
+        keep_task=(task_cls.__name__, current_task.id),
+    )
+
+    return JsonResponse({'saved': saved, 'error_msg': '', 'items': statuses})
+
+
+@login_required
+@require_POST
+def direct_assessment_document_submit(request):
+    """
+    Batch result submission for direct assessment document tasks.
+    """
+    return _submit_document_results(request, DirectAssessmentDocumentTask)
+
+
+@login_required
+@require_POST
+def pairwise_assessment_document_submit(request):
+    """
+    Batch result submission for pairwise assessment document tasks.
+    """
+    return _submit_document_results(request, PairwiseAssessmentDocumentTask)
+
+
+@login_required
+def direct_assessment_document_next(request):
+    """
+    Returns the next MQM/ESA document for the current user as JSON.
+
+    Expects the task id and, as "after", the id of an item in the current
+    document; the returned document is the first one with unannotated
+    items other than the current one. This allows the annotation page to
+    prefetch the next document while the current one is annotated.
+    """
+    try:
+        task_id = int(request.GET.get('task'))
+        after_id = int(request.GET.get('after'))
+    except (TypeError, ValueError):
+        error_msg = 'Invalid request, task and after are required'
+        return JsonResponse({'error_msg': error_msg}, status=400)
+
+    current_task = _get_task_for_user(
+        request.user, DirectAssessmentDocumentTask, task_id
+    )
+    if current_task is None:
+        error_msg = f'Task {task_id} is not available for the current user'
+        return JsonResponse({'error_msg': error_msg}, status=403)
+
+    current_item = current_task.items.filter(id=after_id).first()
+    if current_item is None:
+        error_msg = f'We could not find item {after_id} in task {task_id}.'
+        return JsonResponse({'error_msg': error_msg}, status=400)
+
+    (
+        next_item,
+        items_completed,
+        items_total,
+        docs_completed,
+        docs_total,
+        doc_items,
+        doc_items_results,
+    ) = current_task.next_document_for_user_mqmesa(
+        request.user, skip_item=current_item
+    )
+
+    context = {
+        'items_completed': items_completed,
+        'items_total': items_total,
+        'docs_completed': docs_completed,
+        'docs_total': docs_total,
+        'document': None,
+    }
+    if not next_item:
+        return JsonResponse(context)
+
+    doc_items_results = _mqmesa_document_scores(doc_items, doc_items_results)
+    items_context = {
+        'items': list(zip(doc_items, doc_items_results)),
+        'source_language': current_task.marketSourceLanguage(),
+        'target_language': current_task.marketTargetLanguage(),
+    }
+    context['document'] = {
+        'item_id': next_item.itemID,
+        'task_id': next_item.id,
+        'document_id': next_item.documentID,
+        'items': [
+            dict(
+                scores,
+                item_id=item.itemID,
+                task_id=item.id,
+                source_text=item.sourceText,
+                target_text=item.targetText,
+            )
+            for item, scores in items_context['items']
+        ],
+        'html': render_to_string(
+            'EvalView/_document-items-mqm-esa.html', items_context, request=request
+        ),
+    }
+    return JsonResponse(context)